@@ -44,6 +44,7 @@ __license__ = 'GNU Affero General Public License http://www.gnu.org/licenses/agp
 globalChannelRatio = 0.003 # a smaller ratio means a smoother edge with more segments
 globalGoldenAngle = 3.8832220774509332 # (math.sqrt(5.0) - 1.0) * math.pi
 globalGoldenRatio = 1.6180339887498948482045868 # math.sqrt(1.25) + 0.5
+globalInfinity = float('inf')
 globalTau = math.pi + math.pi # http://tauday.com/
 
 
@@ -950,17 +951,13 @@ def getIntermediateLocation( alongWay, begin, end ):
 
 def getIntersectionOfXIntersectionIndexes( totalSolidSurfaceThickness, xIntersectionIndexList ):
 	'Get x intersections from surrounding layers.'
-	xIntersectionList = []
-	solidTable = {}
-	solid = False
-	xIntersectionIndexList.sort()
-	for xIntersectionIndex in xIntersectionIndexList:
-		toggleHashtable(solidTable, xIntersectionIndex.index, '')
-		oldSolid = solid
-		solid = len(solidTable) >= totalSolidSurfaceThickness
-		if oldSolid != solid:
-			xIntersectionList.append(xIntersectionIndex.x)
-	return xIntersectionList
+	indexes, xIntersections = getXIntersectionEventsFromIndexes(xIntersectionIndexList)
+	return getXIntersectionsFromSolidCount(indexes, totalSolidSurfaceThickness, xIntersections)
+
+def getIntersectionOfXIntersectionsLists(xIntersectionsLists):
+	'Get the x intersections where every one of the x intersections lists is solid.'
+	indexes, xIntersections = getXIntersectionEvents(xIntersectionsLists)
+	return getXIntersectionsFromSolidCount(indexes, len(xIntersectionsLists), xIntersections)
 
 def getIntersectionOfXIntersectionsTables(xIntersectionsTables):
 	'Get the intersection of the XIntersections tables.'
@@ -969,12 +966,14 @@ def getIntersectionOfXIntersectionsTables(xIntersectionsTables):
 	intersectionOfXIntersectionsTables = {}
 	firstIntersectionTable = xIntersectionsTables[0]
 	for firstIntersectionTableKey in firstIntersectionTable.keys():
-		xIntersectionIndexList = []
-		for xIntersectionsTableIndex in xrange(len(xIntersectionsTables)):
-			xIntersectionsTable = xIntersectionsTables[xIntersectionsTableIndex]
-			if firstIntersectionTableKey in xIntersectionsTable:
-				addXIntersectionIndexesFromXIntersections(xIntersectionsTableIndex, xIntersectionIndexList, xIntersectionsTable[firstIntersectionTableKey])
-		xIntersections = getIntersectionOfXIntersectionIndexes(len(xIntersectionsTables), xIntersectionIndexList)
+		xIntersectionsLists = []
+		for xIntersectionsTable in xIntersectionsTables:
+			if firstIntersectionTableKey not in xIntersectionsTable:
+				break
+			xIntersectionsLists.append(xIntersectionsTable[firstIntersectionTableKey])
+		if len(xIntersectionsLists) < len(xIntersectionsTables):
+			continue
+		xIntersections = getIntersectionOfXIntersectionsLists(xIntersectionsLists)
 		if len(xIntersections) > 0:
 			intersectionOfXIntersectionsTables[firstIntersectionTableKey] = xIntersections
 	return intersectionOfXIntersectionsTables
@@ -1009,17 +1008,15 @@ def getIsWiddershinsByVector3( polygon ):
 
 def getJoinOfXIntersectionIndexes( xIntersectionIndexList ):
 	'Get joined x intersections from surrounding layers.'
-	xIntersections = []
-	solidTable = {}
-	solid = False
-	xIntersectionIndexList.sort()
-	for xIntersectionIndex in xIntersectionIndexList:
-		toggleHashtable(solidTable, xIntersectionIndex.index, '')
-		oldSolid = solid
-		solid = len(solidTable) > 0
-		if oldSolid != solid:
-			xIntersections.append(xIntersectionIndex.x)
-	return xIntersections
+	indexes, xIntersections = getXIntersectionEventsFromIndexes(xIntersectionIndexList)
+	return getXIntersectionsFromSolidCount(indexes, 1, xIntersections)
+
+def getJoinOfXIntersectionsLists(xIntersectionsLists):
+	'Get the x intersections where any of the x intersections lists is solid.'
+	if len(xIntersectionsLists) == 1:
+		return sorted(xIntersectionsLists[0])
+	indexes, xIntersections = getXIntersectionEvents(xIntersectionsLists)
+	return getXIntersectionsFromSolidCount(indexes, 1, xIntersections)
 
 def getLargestLoop(loops):
 	'Get largest loop from loops.'
@@ -1198,6 +1195,15 @@ def getMaximumByVector3Paths(paths):
 			maximum.maximize(point)
 	return maximum
 
+def getMaximumMinimumByVector3Path(path):
+	'Get the maximum and minimum vector3s of a vector3 path, reducing each component in one call.'
+	if len(path) < 1:
+		return getMaximumByVector3Path(path), getMinimumByVector3Path(path)
+	xs = [point.x for point in path]
+	ys = [point.y for point in path]
+	zs = [point.z for point in path]
+	return Vector3(max(xs), max(ys), max(zs)), Vector3(min(xs), min(ys), min(zs))
+
 def getMaximumSpan(loop):
 	'Get the maximum span of the loop.'
 	extent = getMaximumByComplexPath(loop) - getMinimumByComplexPath(loop)
@@ -1418,6 +1424,30 @@ def getPointsByVerticalDictionary(width, xIntersectionsDictionary):
 			points.append(complex(xIntersectionsDictionaryKey * width, xIntersection))
 	return points
 
+def getPreparedLoopSlabTable(loop):
+	'Get the bounding y values, the slab height and the slabs of edges of the loop, each edge being in every slab its y range overlaps.'
+	if len(loop) < 1:
+		return (0.0, 0.0, 1.0, [[]])
+	minimumY = min(point.imag for point in loop)
+	maximumY = max(point.imag for point in loop)
+	numberOfSlabs = max(1, len(loop) / 4)
+	slabHeight = (maximumY - minimumY) / float(numberOfSlabs)
+	if slabHeight <= 0.0:
+		return (minimumY, maximumY, 1.0, [[]])
+	slabs = [[] for slabIndex in xrange(numberOfSlabs)]
+	lastSlabIndex = numberOfSlabs - 1
+	for pointIndex, begin in enumerate(loop):
+		end = loop[(pointIndex + 1) % len(loop)]
+		if begin.imag == end.imag:
+			continue
+		endMinusBegin = end - begin
+		edge = (begin.real, begin.imag, end.imag, endMinusBegin.real, endMinusBegin.imag)
+		beginSlabIndex = min(int((min(begin.imag, end.imag) - minimumY) / slabHeight), lastSlabIndex)
+		endSlabIndex = min(int((max(begin.imag, end.imag) - minimumY) / slabHeight), lastSlabIndex)
+		for slabIndex in xrange(beginSlabIndex, endSlabIndex + 1):
+			slabs[slabIndex].append(edge)
+	return (minimumY, maximumY, slabHeight, slabs)
+
 def getRadiusArealizedMultiplier(sides):
 	'Get the radius multiplier for a polygon of equal area.'
 	return math.sqrt(globalTau / sides / math.sin(globalTau / sides))
@@ -1595,6 +1625,14 @@ def getStepKeyFromPoint(point):
 	'Get step key for the point.'
 	return (int(round(point.real)), int(round(point.imag)))
 
+def getSubtractionOfXIntersections(subtractFromXIntersections, subtractXIntersections):
+	'Get the x intersections where the subtractFromXIntersections are solid and the subtractXIntersections are not.'
+	if len(subtractXIntersections) == 0:
+		return sorted(subtractFromXIntersections)
+	indexes, xIntersections = getXIntersectionEvents([subtractFromXIntersections, subtractXIntersections])
+	indexes = [index - 1 for index in indexes]
+	return getXIntersectionsFromSubtraction(indexes, xIntersections)
+
 def getThreeSignificantFigures(number):
 	'Get number rounded to three significant figures as a string.'
 	absoluteNumber = abs(number)
@@ -1686,23 +1724,58 @@ def getXIntersectionIfExists( beginComplex, endComplex, y ):
 	endMinusBeginComplex = endComplex - beginComplex
 	return ( y - beginComplex.imag ) / endMinusBeginComplex.imag * endMinusBeginComplex.real + beginComplex.real
 
+def getXIntersectionEvents(xIntersectionsLists):
+	'Get the list indexes and the x intersections of the x intersections lists, in the order of the lists.'
+	indexes = []
+	xIntersections = []
+	for xIntersectionsListIndex, xIntersectionsList in enumerate(xIntersectionsLists):
+		indexes += [xIntersectionsListIndex] * len(xIntersectionsList)
+		xIntersections += xIntersectionsList
+	return indexes, xIntersections
+
+def getXIntersectionEventsFromIndexes(xIntersectionIndexList):
+	'Get the indexes and the x intersections of the x intersection index list.'
+	return [xIntersectionIndex.index for xIntersectionIndex in xIntersectionIndexList], [xIntersectionIndex.x for xIntersectionIndex in xIntersectionIndexList]
+
 def getXIntersectionsFromIntersections( xIntersectionIndexList ):
 	'Get x intersections from the x intersection index list, in other words subtract non negative intersections from negatives.'
-	xIntersections = []
-	fill = False
+	indexes, xIntersections = getXIntersectionEventsFromIndexes(xIntersectionIndexList)
+	return getXIntersectionsFromSubtraction(indexes, xIntersections)
+
+def getXIntersectionsFromSolidCount(indexes, minimumSolidCount, xIntersections):
+	'Get the x intersections where at least the minimum number of indexes are solid, sweeping the events in order of x.'
+	solidIndexSet = set()
 	solid = False
-	solidTable = {}
-	xIntersectionIndexList.sort()
-	for solidX in xIntersectionIndexList:
-		if solidX.index >= 0:
-			toggleHashtable( solidTable, solidX.index, '' )
+	solidXIntersections = []
+	for eventIndex in sorted(xrange(len(xIntersections)), key=xIntersections.__getitem__):
+		index = indexes[eventIndex]
+		if index in solidIndexSet:
+			solidIndexSet.remove(index)
 		else:
+			solidIndexSet.add(index)
+		if (len(solidIndexSet) >= minimumSolidCount) != solid:
+			solid = not solid
+			solidXIntersections.append(xIntersections[eventIndex])
+	return solidXIntersections
+
+def getXIntersectionsFromSubtraction(indexes, xIntersections):
+	'Get the x intersections where the negative indexes are filled and no non negative index is solid, sweeping the events in order of x.'
+	fill = False
+	solid = False
+	solidIndexSet = set()
+	solidXIntersections = []
+	for eventIndex in sorted(xrange(len(xIntersections)), key=xIntersections.__getitem__):
+		index = indexes[eventIndex]
+		if index < 0:
 			fill = not fill
-		oldSolid = solid
-		solid = ( len( solidTable ) == 0 and fill )
-		if oldSolid != solid:
-			xIntersections.append( solidX.x )
-	return xIntersections
+		elif index in solidIndexSet:
+			solidIndexSet.remove(index)
+		else:
+			solidIndexSet.add(index)
+		if (fill and len(solidIndexSet) == 0) != solid:
+			solid = not solid
+			solidXIntersections.append(xIntersections[eventIndex])
+	return solidXIntersections
 
 def getXYComplexFromVector3(vector3):
 	'Get an xy complex from a vector3 if it exists, otherwise return None.'
@@ -1918,12 +1991,12 @@ def joinXIntersectionsTables( fromTable, intoTable ):
 	for concatenatedTableKey in concatenatedTableKeys:
 		joinedKeyTable[ concatenatedTableKey ] = None
 	for joinedKey in joinedKeyTable.keys():
-		xIntersectionIndexList = []
+		xIntersectionsLists = []
 		if joinedKey in intoTable:
-			addXIntersectionIndexesFromXIntersections( 0, xIntersectionIndexList, intoTable[ joinedKey ] )
+			xIntersectionsLists.append( intoTable[ joinedKey ] )
 		if joinedKey in fromTable:
-			addXIntersectionIndexesFromXIntersections( 1, xIntersectionIndexList, fromTable[ joinedKey ] )
-		xIntersections = getJoinOfXIntersectionIndexes( xIntersectionIndexList )
+			xIntersectionsLists.append( fromTable[ joinedKey ] )
+		xIntersections = getJoinOfXIntersectionsLists( xIntersectionsLists )
 		if len( xIntersections ) > 0:
 			intoTable[ joinedKey ] = xIntersections
 		else:
@@ -1987,11 +2060,10 @@ def subtractXIntersectionsTable( subtractFromTable, subtractTable ):
 	subtractFromTableKeys = subtractFromTable.keys()
 	subtractFromTableKeys.sort()
 	for subtractFromTableKey in subtractFromTableKeys:
-		xIntersectionIndexList = []
-		addXIntersectionIndexesFromXIntersections( - 1, xIntersectionIndexList, subtractFromTable[ subtractFromTableKey ] )
+		subtractXIntersections = []
 		if subtractFromTableKey in subtractTable:
-			addXIntersectionIndexesFromXIntersections( 0, xIntersectionIndexList, subtractTable[ subtractFromTableKey ] )
-		xIntersections = getXIntersectionsFromIntersections( xIntersectionIndexList )
+			subtractXIntersections = subtractTable[ subtractFromTableKey ]
+		xIntersections = getSubtractionOfXIntersections( subtractFromTable[ subtractFromTableKey ], subtractXIntersections )
 		if len( xIntersections ) > 0:
 			subtractFromTable[ subtractFromTableKey ] = xIntersections
 		else:
@@ -2184,17 +2256,49 @@ class Endpoint:
 		return self
 
 
+class FixedPointFormatter:
+	'A class to get numbers rounded to decimal places as strings, with the scale and the format precomputed.'
+	def __init__(self, decimalPlaces):
+		'Initialize the scale and the format of the decimal places.'
+		self.decimalPlaces = decimalPlaces
+		decimalPlacesRounded = max(1, int(round(decimalPlaces)))
+		self.formatString = '%%.%sf' % decimalPlacesRounded
+		self.scale = float(10 ** decimalPlacesRounded)
+
+	def __repr__(self):
+		'Get the string representation of this FixedPointFormatter.'
+		return 'FixedPointFormatter %s' % self.decimalPlaces
+
+	def getString(self, number):
+		'Get the number rounded to the decimal places as a string, the same as getRoundedToPlacesString.'
+		scaled = number * self.scale
+		fraction = abs(scaled) % 1.0
+		if (fraction > 0.4999 and fraction < 0.5001) or not (scaled > -1.0e11 and scaled < 1.0e11):
+			return getRoundedToPlacesString(self.decimalPlaces, number)
+		numberString = (self.formatString % number).rstrip('0')
+		if numberString[-1] == '.':
+			return numberString + '0'
+		return numberString
+
+
 class LoopLayer:
 	'Loops with a z.'
 	def __init__(self, z):
 		'Initialize.'
 		self.loops = []
+		self.preparedLoops = None
 		self.z = z
 
 	def __repr__(self):
 		'Get the string representation of this loop layer.'
 		return '%s, %s' % (self.z, self.loops)
 
+	def getPreparedLoops(self):
+		'Get the prepared loops of the layer, which are prepared again if loops were added or removed.'
+		if self.preparedLoops == None or len(self.preparedLoops.loops) != len(self.loops):
+			self.preparedLoops = PreparedLoops(self.loops)
+		return self.preparedLoops
+
 
 class NestedRing:
 	'A nested ring.'
@@ -2360,6 +2464,68 @@ class PathZ:
 		return '%s, %s' % ( self.z, self.path )
 
 
+class PreparedLoops:
+	'A class to find the loops around a point, with the edges of each loop bucketed into horizontal slabs.'
+	def __init__(self, loops):
+		'Initialize the bounding y values and the slabs of each loop.'
+		self.areas = None
+		self.loops = loops[:]
+		self.slabTables = []
+		for loop in loops:
+			self.slabTables.append(getPreparedLoopSlabTable(loop))
+
+	def __repr__(self):
+		'Get the string representation of this PreparedLoops.'
+		return 'PreparedLoops %s loops' % len(self.loops)
+
+	def getEnclosureIndexes(self, point):
+		'Get the indexes of the loops which enclose the point.'
+		enclosureIndexes = []
+		for loopIndex in xrange(len(self.loops)):
+			if self.getIsPointInsideLoop(loopIndex, point):
+				enclosureIndexes.append(loopIndex)
+		return enclosureIndexes
+
+	def getIsInFilledRegion(self, point):
+		'Determine if the point is in the filled region of the loops, the same as getIsInFilledRegion.'
+		numberOfIntersectionsToLeft = 0
+		for loopIndex in xrange(len(self.loops)):
+			numberOfIntersectionsToLeft += self.getNumberOfIntersectionsToLeft(loopIndex, point)
+		return numberOfIntersectionsToLeft % 2 == 1
+
+	def getIsPointInsideLoop(self, loopIndex, point):
+		'Determine if the point is inside the loop of the loop index, the same as isPointInsideLoop.'
+		return self.getNumberOfIntersectionsToLeft(loopIndex, point) % 2 == 1
+
+	def getNumberOfIntersectionsToLeft(self, loopIndex, point):
+		'Get the number of intersections through the loop for the line going left, the same as getNumberOfIntersectionsToLeft.'
+		if point == None:
+			return 0
+		minimumY, maximumY, slabHeight, slabs = self.slabTables[loopIndex]
+		y = point.imag
+		if y <= minimumY or y > maximumY:
+			return 0
+		numberOfIntersectionsToLeft = 0
+		for beginReal, beginImag, endImag, endMinusBeginReal, endMinusBeginImag in slabs[min(int((y - minimumY) / slabHeight), len(slabs) - 1)]:
+			if (y > beginImag) != (y > endImag):
+				if (y - beginImag) / endMinusBeginImag * endMinusBeginReal + beginReal < point.real:
+					numberOfIntersectionsToLeft += 1
+		return numberOfIntersectionsToLeft
+
+	def getSmallestEnclosureIndex(self, point):
+		'Get the index of the smallest loop which encloses the point, or None if no loop encloses it.'
+		if self.areas == None:
+			self.areas = [getAreaLoopAbsolute(loop) for loop in self.loops]
+		smallestArea = None
+		smallestEnclosureIndex = None
+		for loopIndex, area in enumerate(self.areas):
+			if smallestArea == None or area < smallestArea:
+				if self.getIsPointInsideLoop(loopIndex, point):
+					smallestArea = area
+					smallestEnclosureIndex = loopIndex
+		return smallestEnclosureIndex
+
+
 class ProjectiveSpace:
 	'Class to define a projective space.'
 	def __init__( self, basisX = Vector3(1.0, 0.0, 0.0), basisY = Vector3( 0.0, 1.0, 0.0 ), basisZ = Vector3(0.0, 0.0, 1.0) ):
@@ -2470,6 +2636,125 @@ class ProjectiveSpace:
 		unbuckleBasis( self.basisY, maximumUnbuckling, normal )
 
 
+class SegmentGrid:
+	'A class to find the edges of loops near a line, with the edges bucketed into square cells.'
+	def __init__(self, loops):
+		'Initialize the cell width and put each edge in the cells its bounding box overlaps.'
+		self.cellTable = {}
+		self.loops = loops
+		numberOfEdges = 0
+		for loop in loops:
+			numberOfEdges += len(loop)
+		points = []
+		for loop in loops:
+			points += loop
+		if len(points) < 1:
+			self.cellWidth = 1.0
+			self.margin = 0.0
+			self.minimum = 0j
+			self.numberOfColumns = 1
+			self.numberOfRows = 1
+			return
+		self.minimum = getMinimumByComplexPath(points)
+		size = getMaximumByComplexPath(points) - self.minimum
+		self.margin = 0.000001 * (1.0 + max(size.real, size.imag))
+		self.cellWidth = max(math.sqrt(size.real * size.imag / float(numberOfEdges)), max(size.real, size.imag) / float(numberOfEdges), self.margin)
+		self.numberOfColumns = int(size.real / self.cellWidth) + 1
+		self.numberOfRows = int(size.imag / self.cellWidth) + 1
+		for loopIndex, loop in enumerate(loops):
+			for pointIndex, begin in enumerate(loop):
+				end = loop[(pointIndex + 1) % len(loop)]
+				edge = (loopIndex, pointIndex, begin, end)
+				beginColumn = self.getColumn(min(begin.real, end.real) - self.margin)
+				endColumn = self.getColumn(max(begin.real, end.real) + self.margin)
+				for row in xrange(self.getRow(min(begin.imag, end.imag) - self.margin), self.getRow(max(begin.imag, end.imag) + self.margin) + 1):
+					for column in xrange(beginColumn, endColumn + 1):
+						addElementToListDictionary(edge, column + row * self.numberOfColumns, self.cellTable)
+
+	def __repr__(self):
+		'Get the string representation of this SegmentGrid.'
+		return 'SegmentGrid %s loops, %s by %s cells of width %s' % (len(self.loops), self.numberOfColumns, self.numberOfRows, self.cellWidth)
+
+	def addXIntersectionIndexesNearLine(self, pointBegin, pointEnd, segmentYMirror, xIntersectionIndexList, y):
+		'Add the x intersection indexes of the rotated edges near the line, in the order of addXIntersectionIndexesFromLoopY over the loops.'
+		for loopIndex, pointIndex, begin, end in self.getEdgesNearLine(pointBegin, pointEnd):
+			xIntersection = getXIntersectionIfExists(segmentYMirror * begin, segmentYMirror * end, y)
+			if xIntersection != None:
+				xIntersectionIndexList.append(XIntersectionIndex(loopIndex, xIntersection))
+
+	def getCellKeysNearLine(self, pointBegin, pointEnd):
+		'Get the keys of the cells the line passes through, widened by the margin.'
+		cellKeys = []
+		segment = pointEnd - pointBegin
+		beginRow = self.getRow(min(pointBegin.imag, pointEnd.imag) - self.margin)
+		endRow = self.getRow(max(pointBegin.imag, pointEnd.imag) + self.margin)
+		for row in xrange(beginRow, endRow + 1):
+			minimumX = min(pointBegin.real, pointEnd.real)
+			maximumX = max(pointBegin.real, pointEnd.real)
+			if segment.imag != 0.0 and beginRow != endRow:
+				rowMinimumY = -globalInfinity
+				if row > 0:
+					rowMinimumY = self.minimum.imag + self.cellWidth * float(row) - self.margin
+				rowMaximumY = globalInfinity
+				if row < self.numberOfRows - 1:
+					rowMaximumY = self.minimum.imag + self.cellWidth * float(row + 1) + self.margin
+				alongFirst = (rowMinimumY - pointBegin.imag) / segment.imag
+				alongSecond = (rowMaximumY - pointBegin.imag) / segment.imag
+				alongMinimum = max(min(alongFirst, alongSecond), 0.0)
+				alongMaximum = min(max(alongFirst, alongSecond), 1.0)
+				if alongMinimum > alongMaximum:
+					continue
+				xFirst = pointBegin.real + alongMinimum * segment.real
+				xSecond = pointBegin.real + alongMaximum * segment.real
+				minimumX = min(xFirst, xSecond)
+				maximumX = max(xFirst, xSecond)
+			rowStart = row * self.numberOfColumns
+			cellKeys += xrange(self.getColumn(minimumX - self.margin) + rowStart, self.getColumn(maximumX + self.margin) + rowStart + 1)
+		return cellKeys
+
+	def getColumn(self, x):
+		'Get the column of the x, clamped to the grid.'
+		return min(max(int(math.floor((x - self.minimum.real) / self.cellWidth)), 0), self.numberOfColumns - 1)
+
+	def getEdgesNearLine(self, pointBegin, pointEnd):
+		'Get the edges in the cells the line passes through, sorted by loop and point index.'
+		edgeSet = set()
+		for cellKey in self.getCellKeysNearLine(pointBegin, pointEnd):
+			if cellKey in self.cellTable:
+				edgeSet.update(self.cellTable[cellKey])
+		return sorted(edgeSet)
+
+	def getRow(self, y):
+		'Get the row of the y, clamped to the grid.'
+		return min(max(int(math.floor((y - self.minimum.imag) / self.cellWidth)), 0), self.numberOfRows - 1)
+
+	def isLineIntersecting(self, pointBegin, pointEnd):
+		'Determine if the line is intersecting the loops, the same as isLineIntersectingLoops.'
+		normalizedSegment = pointEnd - pointBegin
+		normalizedSegmentLength = abs(normalizedSegment)
+		if normalizedSegmentLength <= 0.0:
+			return False
+		normalizedSegment /= normalizedSegmentLength
+		segmentYMirror = complex(normalizedSegment.real, -normalizedSegment.imag)
+		pointBeginRotated = segmentYMirror * pointBegin
+		pointEndRotated = segmentYMirror * pointEnd
+		minimumX = min(pointBeginRotated.real, pointEndRotated.real)
+		maximumX = max(pointBeginRotated.real, pointEndRotated.real)
+		y = pointBeginRotated.imag
+		cellTable = self.cellTable
+		for cellKey in self.getCellKeysNearLine(pointBegin, pointEnd):
+			if cellKey in cellTable:
+				for edge in cellTable[cellKey]:
+					pointFirst = segmentYMirror * edge[2]
+					pointSecond = segmentYMirror * edge[3]
+					if (y > pointFirst.imag) != (y > pointSecond.imag):
+						secondMinusFirst = pointSecond - pointFirst
+						xIntersection = (y - pointFirst.imag) / secondMinusFirst.imag * secondMinusFirst.real + pointFirst.real
+						if xIntersection >= minimumX and xIntersection <= maximumX:
+							return True
+		return False
+
+
 class XIntersectionIndex:
 	'A class to hold the x intersection position and the index of the loop which intersected.'
 	def __init__( self, index, x ):
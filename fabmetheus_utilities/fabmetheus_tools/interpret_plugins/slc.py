@@ -174,6 +174,10 @@ class SLCCarving:
 		"Set the is correct mesh flag."
 		pass
 
+	def setCarveIsRepairMesh(self, isRepairMesh):
+		"Set the is repair mesh flag."
+		pass
+
 	def setCarveLayerHeight( self, layerHeight ):
 		"Set the layer height."
 		pass
@@ -21,9 +21,9 @@ import __init__
 
 from fabmetheus_utilities.geometry.geometry_tools import face
 from fabmetheus_utilities.geometry.solids import triangle_mesh
-from fabmetheus_utilities.vector3 import Vector3
 from fabmetheus_utilities import archive
 from fabmetheus_utilities import gcodec
+from fabmetheus_utilities import point_buffer
 from struct import unpack
 
 __author__ = 'Enrique Perez (perez_enrique@yahoo.com)'
@@ -34,27 +34,26 @@ __license__ = 'GNU Affero General Public License http://www.gnu.org/licenses/agp
 
 def addFacesGivenBinary( stlData, triangleMesh, vertexIndexTable ):
 	"Add faces given stl binary."
-	numberOfVertexes = ( len( stlData ) - 84 ) / 50
-	vertexes = []
-	for vertexIndex in xrange( numberOfVertexes ):
-		byteIndex = 84 + vertexIndex * 50
-		vertexes.append( getVertexGivenBinary( byteIndex + 12, stlData ) )
-		vertexes.append( getVertexGivenBinary( byteIndex + 24, stlData ) )
-		vertexes.append( getVertexGivenBinary( byteIndex + 36, stlData ) )
+	numberOfFaces = ( len( stlData ) - 84 ) / 50
+	vertexes = point_buffer.PointBuffer()
+	for faceIndex in xrange( numberOfFaces ):
+		byteIndex = 84 + faceIndex * 50
+		vertexes.extend( unpack('9f', stlData[ byteIndex + 12 : byteIndex + 48 ] ) )
 	addFacesGivenVertexes( triangleMesh, vertexIndexTable, vertexes )
 
 def addFacesGivenText( stlText, triangleMesh, vertexIndexTable ):
 	"Add faces given stl text."
 	lines = archive.getTextLines( stlText )
-	vertexes = []
+	vertexes = point_buffer.PointBuffer()
 	for line in lines:
 		if line.find('vertex') != - 1:
-			vertexes.append( getVertexGivenLine(line) )
+			splitLine = line.split()
+			vertexes.append( getFloat(splitLine[1]), getFloat( splitLine[2] ), getFloat( splitLine[3] ) )
 	addFacesGivenVertexes( triangleMesh, vertexIndexTable, vertexes )
 
 def addFacesGivenVertexes( triangleMesh, vertexIndexTable, vertexes ):
-	"Add faces given stl text."
-	for vertexIndex in xrange( 0, len(vertexes), 3 ):
+	"Add faces given the point buffer of the face corners."
+	for vertexIndex in xrange( 0, len(vertexes) - 2, 3 ):
 		triangleMesh.faces.append( getFaceGivenLines( triangleMesh, vertexIndex, vertexIndexTable, vertexes ) )
 
 def getCarving(fileName=''):
@@ -76,17 +75,20 @@ def getCarving(fileName=''):
 	return triangleMesh
 
 def getFaceGivenLines( triangleMesh, vertexStartIndex, vertexIndexTable, vertexes ):
-	"Add face given line index and lines."
+	"Add face given the start index of its corners in the point buffer, only the unique vertexes are made into Vector3s."
 	faceGivenLines = face.Face()
 	faceGivenLines.index = len( triangleMesh.faces )
+	xs = vertexes.xs
+	ys = vertexes.ys
+	zs = vertexes.zs
 	for vertexIndex in xrange( vertexStartIndex, vertexStartIndex + 3 ):
-		vertex = vertexes[vertexIndex]
-		vertexUniqueIndex = len( vertexIndexTable )
-		if str(vertex) in vertexIndexTable:
-			vertexUniqueIndex = vertexIndexTable[ str(vertex) ]
+		vertexString = '(%s, %s, %s)' % ( xs[vertexIndex], ys[vertexIndex], zs[vertexIndex] )
+		if vertexString in vertexIndexTable:
+			vertexUniqueIndex = vertexIndexTable[vertexString]
 		else:
-			vertexIndexTable[ str(vertex) ] = vertexUniqueIndex
-			triangleMesh.vertexes.append(vertex)
+			vertexUniqueIndex = len( vertexIndexTable )
+			vertexIndexTable[vertexString] = vertexUniqueIndex
+			triangleMesh.vertexes.append( vertexes.getVector3(vertexIndex) )
 		faceGivenLines.vertexIndexes.append( vertexUniqueIndex )
 	return faceGivenLines
 
@@ -96,16 +98,3 @@ def getFloat(floatString):
 		return float(floatString)
 	except:
 		return float( floatString.replace(',', '.') )
-
-def getFloatGivenBinary( byteIndex, stlData ):
-	"Get vertex given stl vertex line."
-	return unpack('f', stlData[ byteIndex : byteIndex + 4 ] )[0]
-
-def getVertexGivenBinary( byteIndex, stlData ):
-	"Get vertex given stl vertex line."
-	return Vector3( getFloatGivenBinary( byteIndex, stlData ), getFloatGivenBinary( byteIndex + 4, stlData ), getFloatGivenBinary( byteIndex + 8, stlData ) )
-
-def getVertexGivenLine(line):
-	"Get vertex given stl vertex line."
-	splitLine = line.split()
-	return Vector3( getFloat(splitLine[1]), getFloat( splitLine[2] ), getFloat( splitLine[3] ) )
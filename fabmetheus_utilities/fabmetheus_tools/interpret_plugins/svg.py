@@ -104,6 +104,10 @@ class SVGCarving:
 		'Set the is correct mesh flag.'
 		pass
 
+	def setCarveIsRepairMesh(self, isRepairMesh):
+		'Set the is repair mesh flag.'
+		pass
+
 	def setCarveLayerHeight(self, layerHeight):
 		'Set the layer height.'
 		self.layerHeight = layerHeight
@@ -24,6 +24,7 @@ from fabmetheus_utilities.vector3 import Vector3
 from fabmetheus_utilities import archive
 from fabmetheus_utilities import euclidean
 import cStringIO
+import itertools
 import math
 import os
 import sys
@@ -66,6 +67,27 @@ def getArcDistance(relativeLocation, splitLine):
 			angle = math.pi * halfPlaneLineDistanceOverRadius
 	return abs(complex(angle * radius, relativeLocation.z))
 
+def getBoundaryLayers(lines):
+	'Get the loop layers of the boundary points, with a loop layer for each layer line.'
+	boundaryLayers = []
+	boundaryLoop = None
+	boundaryLayer = None
+	for line in lines:
+		splitLine = getSplitLineBeforeBracketSemicolon(line)
+		firstWord = getFirstWord(splitLine)
+		if firstWord == '(</boundaryPerimeter>)':
+			boundaryLoop = None
+		elif firstWord == '(<boundaryPoint>':
+			location = getLocationFromSplitLine(None, splitLine)
+			if boundaryLoop == None:
+				boundaryLoop = []
+				boundaryLayer.loops.append(boundaryLoop)
+			boundaryLoop.append(location.dropAxis())
+		elif firstWord == '(<layer>':
+			boundaryLayer = euclidean.LoopLayer(float(splitLine[1]))
+			boundaryLayers.append(boundaryLayer)
+	return boundaryLayers
+
 def getDoubleAfterFirstLetter(word):
 	'Get the double value of the word after the first letter.'
 	return float(word[1 :])
@@ -126,19 +148,9 @@ def getGcodeFileText(fileName, gcodeText):
 
 def getGcodeWithoutDuplication(duplicateWord, gcodeText):
 	'Get gcode text without duplicate first words.'
-	lines = archive.getTextLines(gcodeText)
-	oldWrittenLine = None
-	output = cStringIO.StringIO()
-	for line in lines:
-		firstWord = getFirstWordFromLine(line)
-		if firstWord == duplicateWord:
-			if line != oldWrittenLine:
-				output.write(line + '\n')
-				oldWrittenLine = line
-		else:
-			if len(line) > 0:
-				output.write(line + '\n')
-	return output.getvalue()
+	outputWithoutDuplication = OutputWithoutDuplication(duplicateWord)
+	outputWithoutDuplication.write(gcodeText)
+	return outputWithoutDuplication.getvalue()
 
 def getIndexOfStartingWithSecond(letter, splitLine):
 	'Get index of the first occurence of the given letter in the split line, starting with the second word.  Return - 1 if letter is not found'
@@ -149,6 +161,21 @@ def getIndexOfStartingWithSecond(letter, splitLine):
 			return wordIndex
 	return - 1
 
+def getLineBatchesAfterInitialization(lineBatches, skein):
+	'Parse the initialization of the line batches with the skein, and get the line batches from the skein line index on.'
+	initializationLines = []
+	lineBatchIterator = iter(lineBatches)
+	for lines in lineBatchIterator:
+		for lineIndex, line in enumerate(lines):
+			if getFirstWord(getSplitLineBeforeBracketSemicolon(line)) == '(</extruderInitialization>)':
+				skein.lines = initializationLines + lines[: lineIndex + 1]
+				skein.parseInitialization()
+				return itertools.chain([skein.lines[skein.lineIndex :] + lines[lineIndex + 1 :]], lineBatchIterator)
+		initializationLines += lines
+	skein.lines = initializationLines
+	skein.parseInitialization()
+	return [skein.lines[skein.lineIndex :]]
+
 def getLineWithValueString(character, line, splitLine, valueString):
 	'Get the line with a valueString.'
 	roundedValueString = character + valueString
@@ -263,6 +290,7 @@ class DistanceFeedRate:
 		'Initialize.'
 		self.isAlteration = False
 		self.decimalPlacesCarried = 3
+		self.fixedPointFormatter = euclidean.FixedPointFormatter(self.decimalPlacesCarried)
 		self.output = cStringIO.StringIO()
 
 	def addFlowRateLine(self, flowRate):
@@ -280,8 +308,7 @@ class DistanceFeedRate:
 			print(thread)
 			return
 		self.output.write('M101\n') # Turn extruder on.
-		for point in thread[1 :]:
-			self.addGcodeMovementZWithFeedRate(feedRateMinute, point, z)
+		self.addGcodeMovementsZWithFeedRate(feedRateMinute, thread[1 :], z)
 		self.output.write('M103\n') # Turn extruder off.
 
 	def addGcodeFromLoop(self, loop, z):
@@ -302,14 +329,23 @@ class DistanceFeedRate:
 			print(thread)
 			return
 		self.output.write('M101\n') # Turn extruder on.
-		for point in thread[1 :]:
-			self.addGcodeMovementZ(point, z)
+		self.addGcodeMovementsZWithFeedRate(None, thread[1 :], z)
 		self.output.write('M103\n') # Turn extruder off.
 
 	def addGcodeMovementZ(self, point, z):
 		'Add a movement to the output.'
 		self.output.write(self.getLinearGcodeMovement(point, z) + '\n')
 
+	def addGcodeMovementsZWithFeedRate(self, feedRateMinute, points, z):
+		'Add the movements of a thread to the output, with the z and the feed rate formatted once for the whole thread.'
+		fixedPointFormatter = self.getFixedPointFormatter()
+		getString = fixedPointFormatter.getString
+		zString = getString(z)
+		lineEnd = ' Z%s\n' % zString
+		if feedRateMinute != None:
+			lineEnd = ' Z%s F%s\n' % (zString, getString(feedRateMinute))
+		self.output.write(''.join(['G1 X%s Y%s%s' % (getString(point.real), getString(point.imag), lineEnd) for point in points]))
+
 	def addGcodeMovementZWithFeedRate(self, feedRateMinute, point, z):
 		'Add a movement to the output.'
 		self.output.write(self.getLinearGcodeMovementWithFeedRate(feedRateMinute, point, z) + '\n')
@@ -390,6 +426,12 @@ class DistanceFeedRate:
 		'Get boundary gcode line.'
 		return '(<boundaryPoint> X%s Y%s Z%s </boundaryPoint>)' % (self.getRounded(location.x), self.getRounded(location.y), self.getRounded(location.z))
 
+	def getFixedPointFormatter(self):
+		'Get the fixed point formatter for the number of carried decimal places.'
+		if self.fixedPointFormatter.decimalPlaces != self.decimalPlacesCarried:
+			self.fixedPointFormatter = euclidean.FixedPointFormatter(self.decimalPlacesCarried)
+		return self.fixedPointFormatter
+
 	def getFirstWordMovement(self, firstWord, location):
 		'Get the start of the arc line.'
 		return '%s X%s Y%s Z%s' % (firstWord, self.getRounded(location.x), self.getRounded(location.y), self.getRounded(location.z))
@@ -434,9 +476,79 @@ class DistanceFeedRate:
 
 	def getRounded(self, number):
 		'Get number rounded to the number of carried decimal places as a string.'
-		return euclidean.getRoundedToPlacesString(self.decimalPlacesCarried, number)
+		return self.getFixedPointFormatter().getString(number)
 
 	def parseSplitLine(self, firstWord, splitLine):
 		'Parse gcode split line and store the parameters.'
 		if firstWord == '(<decimalPlacesCarried>':
 			self.decimalPlacesCarried = int(splitLine[1])
+
+
+class OutputLines:
+	'A class to collect the text written to it, so that a fused stage can pass it on as lines without building the whole text.'
+	def __init__(self):
+		'Initialize.'
+		self.partialLine = ''
+		self.texts = []
+		#The written texts are gathered by the append of the list, which is much quicker than a write method, and split into lines once for each batch.
+		self.write = self.texts.append
+
+	def __repr__(self):
+		'Get the string representation of this OutputLines.'
+		return 'OutputLines %s %s' % (len(self.texts), self.partialLine)
+
+	def getLastLines(self):
+		'Get the complete lines and the unfinished line, which is empty if the last write ended with a newline, like the split of a text.'
+		lastLines = self.getLines() + [self.partialLine]
+		self.partialLine = ''
+		return lastLines
+
+	def getLines(self):
+		'Get the complete lines written since the last call, and keep the unfinished end for the next call.'
+		lines = (self.partialLine + ''.join(self.texts)).split('\n')
+		del self.texts[:]
+		self.partialLine = lines.pop()
+		return lines
+
+
+class OutputWithoutDuplication:
+	'A class to write gcode to a cStringIO output as it is added, without empty lines or repeats of the last line starting with the duplicate word.'
+	def __init__(self, duplicateWord):
+		'Initialize.'
+		self.duplicateWord = duplicateWord
+		self.oldWrittenLine = None
+		self.output = cStringIO.StringIO()
+		self.partialLine = ''
+
+	def __repr__(self):
+		'Get the string representation of this OutputWithoutDuplication.'
+		return 'OutputWithoutDuplication %s %s' % (self.duplicateWord, self.oldWrittenLine)
+
+	def getvalue(self):
+		'Write the unfinished line, if any, and get the text of the output.'
+		if self.partialLine != '':
+			self.writeLine(self.partialLine)
+			self.partialLine = ''
+		return self.output.getvalue()
+
+	def write(self, text):
+		'Write the complete lines of the text, and keep the unfinished end for the next write.'
+		if '\r' in text:
+			text = text.replace('\r', '\n')
+		if self.partialLine == '' and text.find('\n') == len(text) - 1:
+			self.writeLine(text[: -1])
+			return
+		lines = (self.partialLine + text).split('\n')
+		self.partialLine = lines.pop()
+		for line in lines:
+			self.writeLine(line)
+
+	def writeLine(self, line):
+		'Write the line unless it is empty or the same as the last written line starting with the duplicate word.'
+		if len(line) < 1:
+			return
+		if self.duplicateWord in line and getFirstWordFromLine(line) == self.duplicateWord:
+			if line == self.oldWrittenLine:
+				return
+			self.oldWrittenLine = line
+		self.output.write(line + '\n')
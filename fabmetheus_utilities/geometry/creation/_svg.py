@@ -10,6 +10,7 @@ import __init__
 
 from fabmetheus_utilities.geometry.creation import lineation
 from fabmetheus_utilities.geometry.geometry_tools import path
+from fabmetheus_utilities.geometry.geometry_utilities.evaluate_elements import setting
 from fabmetheus_utilities import euclidean
 from fabmetheus_utilities import svg_reader
 
@@ -57,4 +58,5 @@ class SVGDerivation:
 	def __init__(self, elementNode):
 		'Set defaults.'
 		self.svgReader = svg_reader.SVGReader()
+		self.svgReader.flatteningTolerance = setting.getPrecision(elementNode)
 		self.svgReader.parseSVGByElementNode(elementNode)
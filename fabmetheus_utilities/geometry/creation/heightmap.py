@@ -31,62 +31,61 @@ __license__ = 'GNU Affero General Public License http://www.gnu.org/licenses/agp
 
 def addHeightsByBitmap(heights, textLines):
 	'Add heights by bitmap.'
-	for line in textLines[3:]:
-		for integerWord in line.split():
-			heights.append(float(integerWord))
+	heights += map(float, ' '.join(textLines[3:]).split())
 
 def addHeightsByGraymap(heights, textLines):
 	'Add heights by graymap.'
 	divisor = float(textLines[3])
-	for line in textLines[4:]:
-		for integerWord in line.split():
-			heights.append(float(integerWord) / divisor)
+	heights += [float(integerWord) / divisor for integerWord in ' '.join(textLines[4:]).split()]
 
-def getAddIndexedHeightGrid(heightGrid, minimumXY, step, top, vertexes):
-	'Get and add an indexed heightGrid.'
+def getAddIndexedHeightGrid(columnIndexes, heightGrid, minimumXY, rowIndexes, step, top, vertexes):
+	'Get and add an indexed heightGrid of the columns and rows.'
 	indexedHeightGrid = []
-	for rowIndex, row in enumerate(heightGrid):
-		indexedRow = []
-		indexedHeightGrid.append(indexedRow)
+	columnIndexesOffsets = [(columnIndex, step.real * float(columnIndex) + minimumXY.real) for columnIndex in columnIndexes]
+	for rowIndex in rowIndexes:
+		row = heightGrid[rowIndex]
 		rowOffset = step.imag * float(rowIndex) + minimumXY.imag
-		for columnIndex, element in enumerate(row):
-			columnOffset = step.real * float(columnIndex) + minimumXY.real
-			vector3index = Vector3Index(len(vertexes), columnOffset, rowOffset, top * element)
-			indexedRow.append(vector3index)
-			vertexes.append(vector3index)
+		vertexIndex = len(vertexes)
+		indexedRow = [
+			Vector3Index(vertexIndex + columnIndexOffsetIndex, columnOffset, rowOffset, top * row[columnIndex])
+			for columnIndexOffsetIndex, (columnIndex, columnOffset) in enumerate(columnIndexesOffsets)]
+		indexedHeightGrid.append(indexedRow)
+		vertexes += indexedRow
 	return indexedHeightGrid
 
-def getAddIndexedSegmentedPerimeter(heightGrid, maximumXY, minimumXY, step, vertexes, z=0.0):
-	'Get and add an indexed segmented perimeter.'
+def getAddIndexedSegmentedPerimeter(columnIndexes, maximumXY, minimumXY, rowIndexes, step, vertexes, z=0.0):
+	'Get and add an indexed segmented perimeter around the columns and rows.'
 	indexedSegmentedPerimeter = []
-	firstRow = heightGrid[0]
-	columnOffset = minimumXY.real
-	numberOfRowsMinusTwo = len(heightGrid) - 2
-	for column in firstRow:
-		vector3index = Vector3Index(len(vertexes), columnOffset, minimumXY.imag, z)
-		vertexes.append(vector3index)
-		indexedSegmentedPerimeter.append(vector3index)
-		columnOffset += step.real
-	rowOffset = minimumXY.imag
-	for rowIndex in xrange(numberOfRowsMinusTwo):
-		rowOffset += step.imag
-		vector3index = Vector3Index(len(vertexes), maximumXY.real, rowOffset, z)
-		vertexes.append(vector3index)
-		indexedSegmentedPerimeter.append(vector3index)
-	columnOffset = maximumXY.real
-	for column in firstRow:
-		vector3index = Vector3Index(len(vertexes), columnOffset, maximumXY.imag, z)
-		vertexes.append(vector3index)
-		indexedSegmentedPerimeter.append(vector3index)
-		columnOffset -= step.real
-	rowOffset = maximumXY.imag
-	for rowIndex in xrange(numberOfRowsMinusTwo):
-		rowOffset -= step.imag
-		vector3index = Vector3Index(len(vertexes), minimumXY.real, rowOffset, z)
-		vertexes.append(vector3index)
-		indexedSegmentedPerimeter.append(vector3index)
+	numberOfColumns = columnIndexes[-1] + 1
+	numberOfRows = rowIndexes[-1] + 1
+	columnOffsets = getSteppedOffsets(numberOfColumns, minimumXY.real, step.real)
+	for columnIndex in columnIndexes:
+		indexedSegmentedPerimeter.append(Vector3Index(len(vertexes) + len(indexedSegmentedPerimeter), columnOffsets[columnIndex], minimumXY.imag, z))
+	rowOffsets = getSteppedOffsets(numberOfRows, minimumXY.imag, step.imag)
+	for rowIndex in rowIndexes[1 : -1]:
+		indexedSegmentedPerimeter.append(Vector3Index(len(vertexes) + len(indexedSegmentedPerimeter), maximumXY.real, rowOffsets[rowIndex], z))
+	columnOffsets = getSteppedOffsets(numberOfColumns, maximumXY.real, -step.real)
+	for columnIndex in columnIndexes[: : -1]:
+		indexedSegmentedPerimeter.append(Vector3Index(len(vertexes) + len(indexedSegmentedPerimeter), columnOffsets[numberOfColumns - 1 - columnIndex], maximumXY.imag, z))
+	rowOffsets = getSteppedOffsets(numberOfRows, maximumXY.imag, -step.imag)
+	for rowIndex in rowIndexes[-2 : 0 : -1]:
+		indexedSegmentedPerimeter.append(Vector3Index(len(vertexes) + len(indexedSegmentedPerimeter), minimumXY.real, rowOffsets[numberOfRows - 1 - rowIndex], z))
+	vertexes += indexedSegmentedPerimeter
 	return indexedSegmentedPerimeter
 
+def getDecimatedColumnIndexes(heightGrid):
+	'Get the column indexes, without the columns whose heights equal the heights of both neighboring columns in every row.'
+	numberOfColumns = len(heightGrid[0])
+	columnIndexes = [0]
+	for columnIndex in xrange(1, numberOfColumns - 1):
+		for row in heightGrid:
+			height = row[columnIndex]
+			if row[columnIndex - 1] != height or row[columnIndex + 1] != height:
+				columnIndexes.append(columnIndex)
+				break
+	columnIndexes.append(numberOfColumns - 1)
+	return columnIndexes
+
 def getGeometryOutput(elementNode):
 	'Get vector3 vertexes from attribute dictionary.'
 	derivation = HeightmapDerivation(elementNode)
@@ -127,10 +126,15 @@ def getGeometryOutputByHeightGrid(derivation, elementNode, heightGrid):
 	faces = []
 	heightGrid = getRaisedHeightGrid(heightGrid, derivation.start)
 	top = derivation.inradius.z + derivation.inradius.z
+	columnIndexes = range(numberOfRows)
+	rowIndexes = range(numberOfColumns)
+	if derivation.decimate:
+		columnIndexes = getDecimatedColumnIndexes(heightGrid)
+		rowIndexes = getDecimatedColumnIndexes(zip(*heightGrid))
 	vertexes = []
-	indexedBottomLoop = getAddIndexedSegmentedPerimeter(heightGrid, inradiusComplex, minimumXY, step, vertexes)
+	indexedBottomLoop = getAddIndexedSegmentedPerimeter(columnIndexes, inradiusComplex, minimumXY, rowIndexes, step, vertexes)
 	indexedLoops = [indexedBottomLoop]
-	indexedGridTop = getAddIndexedHeightGrid(heightGrid, minimumXY, step, top, vertexes)
+	indexedGridTop = getAddIndexedHeightGrid(columnIndexes, heightGrid, minimumXY, rowIndexes, step, top, vertexes)
 	indexedLoops.append(triangle_mesh.getIndexedLoopFromIndexedGrid(indexedGridTop))
 	vertexes = triangle_mesh.getUniqueVertexes(indexedLoops + indexedGridTop)
 	triangle_mesh.addPillarFromConvexLoopsGridTop(faces, indexedGridTop, indexedLoops)
@@ -162,15 +166,7 @@ def getHeightGrid(fileName):
 		print('The Netpbm formats are described at:')
 		print('http://en.wikipedia.org/wiki/Netpbm_format')
 		return []
-	heightGrid = []
-	heightIndex = 0
-	for rowIndex in xrange(numberOfRows):
-		row = []
-		heightGrid.append(row)
-		for columnIndex in xrange(numberOfColumns):
-			row.append(heights[heightIndex])
-			heightIndex += 1
-	return heightGrid
+	return [heights[rowIndex * numberOfColumns : (rowIndex + 1) * numberOfColumns] for rowIndex in xrange(numberOfRows)]
 
 def getNewDerivation(elementNode):
 	'Get new derivation.'
@@ -178,15 +174,16 @@ def getNewDerivation(elementNode):
 
 def getRaisedHeightGrid(heightGrid, start):
 	'Get heightGrid raised above start.'
-	raisedHeightGrid = []
 	remainingHeight = 1.0 - start
-	for row in heightGrid:
-		raisedRow = []
-		raisedHeightGrid.append(raisedRow)
-		for element in row:
-			raisedElement = remainingHeight * element + start
-			raisedRow.append(raisedElement)
-	return raisedHeightGrid
+	return [[remainingHeight * element + start for element in row] for row in heightGrid]
+
+def getSteppedOffsets(numberOfOffsets, offset, step):
+	'Get the offsets, stepped by repeated addition.'
+	steppedOffsets = []
+	for offsetIndex in xrange(numberOfOffsets):
+		steppedOffsets.append(offset)
+		offset += step
+	return steppedOffsets
 
 def processElementNode(elementNode):
 	'Process the xml element.'
@@ -197,6 +194,7 @@ class HeightmapDerivation:
 	'Class to hold heightmap variables.'
 	def __init__(self, elementNode):
 		'Set defaults.'
+		self.decimate = evaluate.getEvaluatedBoolean(False, elementNode, 'decimate')
 		self.fileName = evaluate.getEvaluatedString('', elementNode, 'file')
 		self.heightGrid = evaluate.getEvaluatedValue([], elementNode, 'heightGrid')
 		self.inradius = evaluate.getVector3ByPrefixes(elementNode, ['demisize', 'inradius'], Vector3(10.0, 10.0, 5.0))
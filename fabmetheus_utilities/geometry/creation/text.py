@@ -9,6 +9,7 @@ import __init__
 
 from fabmetheus_utilities.geometry.creation import lineation
 from fabmetheus_utilities.geometry.geometry_tools import path
+from fabmetheus_utilities.geometry.geometry_utilities.evaluate_elements import setting
 from fabmetheus_utilities.geometry.geometry_utilities import evaluate
 from fabmetheus_utilities import euclidean
 from fabmetheus_utilities import svg_reader
@@ -29,7 +30,7 @@ def getGeometryOutput(derivation, elementNode):
 		print(elementNode)
 		return []
 	geometryOutput = []
-	for textComplexLoop in svg_reader.getTextComplexLoops(derivation.fontFamily, derivation.fontSize, derivation.textString):
+	for textComplexLoop in svg_reader.getTextComplexLoops(derivation.fontFamily, derivation.fontSize, derivation.textString, True, setting.getPrecision(elementNode)):
 		textComplexLoop.reverse()
 		vector3Path = euclidean.getVector3Path(textComplexLoop)
 		sideLoop = lineation.SideLoop(vector3Path)
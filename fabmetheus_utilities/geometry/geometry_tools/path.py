@@ -199,6 +199,10 @@ class SVGFabricationCarving:
 		'Set the is correct mesh flag.'
 		pass
 
+	def setCarveIsRepairMesh(self, isRepairMesh):
+		'Set the is repair mesh flag.'
+		pass
+
 	def setCarveLayerHeight( self, layerHeight ):
 		'Set the layer height.'
 		self.layerHeight = layerHeight
@@ -18,6 +18,7 @@ import __init__
 from fabmetheus_utilities.geometry.geometry_utilities.evaluate_elements import setting
 from fabmetheus_utilities.geometry.geometry_utilities import boolean_solid
 from fabmetheus_utilities.geometry.geometry_utilities import evaluate
+from fabmetheus_utilities.geometry.geometry_utilities import polygon_boolean
 from fabmetheus_utilities.geometry.solids import triangle_mesh
 from fabmetheus_utilities.vector3 import Vector3
 from fabmetheus_utilities import euclidean
@@ -39,7 +40,7 @@ def getEmptyZLoops(archivableObjects, importRadius, shouldPrintWarning, z, zoneA
 	visibleObjectLoopsList = boolean_solid.getVisibleObjectLoopsList(importRadius, visibleObjects, emptyZ)
 	loops = euclidean.getConcatenatedList(visibleObjectLoopsList)
 	if euclidean.isLoopListIntersecting(loops):
-		loops = boolean_solid.getLoopsUnion(importRadius, visibleObjectLoopsList)
+		loops = polygon_boolean.getUnion(visibleObjectLoopsList, True)
 		if shouldPrintWarning:
 			print('Warning, the triangle mesh slice intersects itself in getExtruderPaths in boolean_geometry.')
 			print('Something will still be printed, but there is no guarantee that it will be the correct shape.')
@@ -191,6 +192,10 @@ class BooleanGeometry:
 		'Set the is correct mesh flag.'
 		self.isCorrectMesh = isCorrectMesh
 
+	def setCarveIsRepairMesh(self, isRepairMesh):
+		'Set the is repair mesh flag.'
+		pass
+
 	def setCarveLayerHeight( self, layerHeight ):
 		'Set the layer height.'
 		self.layerHeight = layerHeight
@@ -17,6 +17,7 @@ import __init__
 
 from fabmetheus_utilities.geometry.geometry_utilities.evaluate_elements import setting
 from fabmetheus_utilities.geometry.geometry_utilities import evaluate
+from fabmetheus_utilities.geometry.geometry_utilities import polygon_boolean
 from fabmetheus_utilities.geometry.solids import group
 from fabmetheus_utilities.geometry.solids import triangle_mesh
 from fabmetheus_utilities.vector3 import Vector3
@@ -201,11 +202,11 @@ class BooleanSolid( group.Group ):
 	'A boolean solid object.'
 	def getDifference(self, importRadius, visibleObjectLoopsList):
 		'Get subtracted loops sliced through shape.'
-		return getLoopsDifference(importRadius, visibleObjectLoopsList)
+		return polygon_boolean.getDifference(visibleObjectLoopsList)
 
 	def getIntersection(self, importRadius, visibleObjectLoopsList):
 		'Get intersected loops sliced through shape.'
-		return getLoopsIntersection(importRadius, visibleObjectLoopsList)
+		return polygon_boolean.getIntersection(visibleObjectLoopsList)
 
 	def getLoops(self, importRadius, z):
 		'Get loops sliced through shape.'
@@ -228,7 +229,7 @@ class BooleanSolid( group.Group ):
 
 	def getUnion(self, importRadius, visibleObjectLoopsList):
 		'Get joined loops sliced through shape.'
-		return getLoopsUnion(importRadius, visibleObjectLoopsList)
+		return polygon_boolean.getUnion(visibleObjectLoopsList)
 
 	def getXMLLocalName(self):
 		'Get xml class name.'
@@ -25,7 +25,10 @@ __date__ = '$Date: 2008/02/05 $'
 __license__ = 'GNU Affero General Public License http://www.gnu.org/licenses/agpl.html'
 
 
+globalExpressionTable = {}
+globalMaximumNumberOfExpressions = 10000
 globalModuleFunctionsDictionary = {}
+globalNumberOfExpressionCacheHits = 0
 
 
 def addPrefixDictionary(dictionary, keys, value):
@@ -295,24 +298,15 @@ def getEvaluatedDictionaryByEvaluationKeys(elementNode, evaluationKeys):
 def getEvaluatedExpressionValue(elementNode, value):
 	'Evaluate the expression value.'
 	try:
-		return getEvaluatedExpressionValueBySplitLine(elementNode, getEvaluatorSplitWords(value))
+		return getExpression(value, None).getEvaluatedValue(elementNode)
 	except:
 		print('Warning, in getEvaluatedExpressionValue in evaluate could not get a value for:')
 		print(value)
 		traceback.print_exc(file=sys.stdout)
 		return None
 
-def getEvaluatedExpressionValueBySplitLine(elementNode, words):
-	'Evaluate the expression value.'
-	evaluators = []
-	for wordIndex, word in enumerate(words):
-		nextWord = ''
-		nextWordIndex = wordIndex + 1
-		if nextWordIndex < len(words):
-			nextWord = words[nextWordIndex]
-		evaluator = getEvaluator(elementNode, evaluators, nextWord, word)
-		if evaluator != None:
-			evaluators.append(evaluator)
+def getEvaluatedExpressionValueByEvaluators(evaluators):
+	'Evaluate the expression value from the evaluators.'
 	while getBracketsExist(evaluators):
 		pass
 	evaluatedExpressionValueEvaluators = getEvaluatedExpressionValueEvaluators(evaluators)
@@ -320,6 +314,10 @@ def getEvaluatedExpressionValueBySplitLine(elementNode, words):
 		return evaluatedExpressionValueEvaluators[0].value
 	return None
 
+def getEvaluatedExpressionValueBySplitLine(elementNode, words):
+	'Evaluate the expression value.'
+	return getExpression(tuple(words), words).getEvaluatedValue(elementNode)
+
 def getEvaluatedExpressionValueEvaluators(evaluators):
 	'Evaluate the expression value from the numeric and operation evaluators.'
 	for evaluatorIndex, evaluator in enumerate(evaluators):
@@ -433,6 +431,32 @@ def getEvaluator(elementNode, evaluators, nextWord, word):
 		return EvaluatorValue(word)
 	return EvaluatorNumeric(elementNode, word)
 
+def getEvaluatorClassWord(word):
+	'Get the evaluator class and the evaluator word if they do not depend on the element node, otherwise get None and the word.'
+	if word in globalSplitDictionary:
+		return globalSplitDictionary[word], word
+	firstCharacter = word[: 1]
+	if firstCharacter == "'" or firstCharacter == '"':
+		if len(word) > 1:
+			if firstCharacter == word[-1]:
+				return EvaluatorValue, word[1 : -1]
+	if firstCharacter == '$':
+		return EvaluatorValue, word[1 :]
+	if firstCharacter.isdigit():
+		return EvaluatorNumeric, word
+	dotIndex = word.find('.')
+	if dotIndex > -1 and len(word) > 1:
+		if dotIndex == 0 and word[1].isalpha():
+			return EvaluatorAttribute, word
+		if dotIndex > 0:
+			untilDot = word[: dotIndex]
+			if untilDot in globalModuleEvaluatorDictionary:
+				return globalModuleEvaluatorDictionary[untilDot], word
+		return None, word
+	if firstCharacter.isalpha() or firstCharacter == '_':
+		return None, word
+	return EvaluatorNumeric, word
+
 def getEvaluatorSplitWords(value):
 	'Get split words for evaluators.'
 	if value.startswith('='):
@@ -477,6 +501,20 @@ def getEvaluatorSplitWords(value):
 		addQuoteWord(evaluatorTransitionWords, evaluatorSplitWord)
 	return evaluatorTransitionWords
 
+def getExpression(key, words):
+	'Get the parsed expression by the expression text or the tuple of its split words, parsing it only the first time.'
+	global globalNumberOfExpressionCacheHits
+	if key in globalExpressionTable:
+		globalNumberOfExpressionCacheHits += 1
+		return globalExpressionTable[key]
+	if words == None:
+		words = getEvaluatorSplitWords(key)
+	expression = Expression(words)
+	if len(globalExpressionTable) >= globalMaximumNumberOfExpressions:
+		globalExpressionTable.clear()
+	globalExpressionTable[key] = expression
+	return expression
+
 def getFloatListFromBracketedString( bracketedString ):
 	'Get list from a bracketed string.'
 	if not getIsBracketed( bracketedString ):
@@ -1774,6 +1812,33 @@ class EvaluatorValue(Evaluator):
 		self.word = str(word)
 
 
+class Expression:
+	'A class to hold the split words of an expression, parsed into evaluator classes once.'
+	def __init__(self, words):
+		'Set the evaluator class and evaluator word of each word.'
+		self.evaluatorClassWords = []
+		for word in words:
+			self.evaluatorClassWords.append(getEvaluatorClassWord(word))
+
+	def __repr__(self):
+		'Get the string representation of this Expression.'
+		return str(self.evaluatorClassWords)
+
+	def getEvaluatedValue(self, elementNode):
+		'Evaluate the expression, only looking up the words which depend on the element node.'
+		evaluators = []
+		for evaluatorClass, word in self.evaluatorClassWords:
+			if evaluatorClass == None:
+				evaluator = getEvaluator(elementNode, evaluators, '', word)
+				if evaluator != None:
+					evaluators.append(evaluator)
+			elif evaluatorClass == EvaluatorValue:
+				evaluators.append(EvaluatorValue(word))
+			else:
+				evaluators.append(evaluatorClass(elementNode, word))
+		return getEvaluatedExpressionValueByEvaluators(evaluators)
+
+
 class Function(BaseFunction):
 	'Class to get equation results.'
 	def __init__(self, elementNode):
@@ -365,10 +365,13 @@ def getTransformedVector3s(tetragrid, vector3s):
 	'Get the vector3s multiplied by a matrix.'
 	if getIsIdentityTetragridOrNone(tetragrid):
 		return euclidean.getPathCopy(vector3s)
-	transformedVector3s = []
-	for vector3 in vector3s:
-		transformedVector3s.append(getTransformedVector3Blindly(tetragrid, vector3))
-	return transformedVector3s
+	xA, xB, xC, xD = tetragrid[0]
+	yA, yB, yC, yD = tetragrid[1]
+	zA, zB, zC, zD = tetragrid[2]
+	return [Vector3(
+		xA * vector3.x + xB * vector3.y + xC * vector3.z + xD,
+		yA * vector3.x + yB * vector3.y + yC * vector3.z + yD,
+		zA * vector3.x + zB * vector3.y + zC * vector3.z + zD) for vector3 in vector3s]
 
 def getTransformTetragrid(elementNode, prefix):
 	'Get the tetragrid from the elementNode.'
@@ -426,8 +429,16 @@ def transformVector3sByMatrix(tetragrid, vector3s):
 	'Transform the vector3s by a matrix.'
 	if getIsIdentityTetragridOrNone(tetragrid):
 		return
+	xA, xB, xC, xD = tetragrid[0]
+	yA, yB, yC, yD = tetragrid[1]
+	zA, zB, zC, zD = tetragrid[2]
 	for vector3 in vector3s:
-		transformVector3Blindly(tetragrid, vector3)
+		x = vector3.x
+		y = vector3.y
+		z = vector3.z
+		vector3.x = xA * x + xB * y + xC * z + xD
+		vector3.y = yA * x + yB * y + yC * z + yD
+		vector3.z = zA * x + zB * y + zC * z + zD
 
 
 class Matrix:
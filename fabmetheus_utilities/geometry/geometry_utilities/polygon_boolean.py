@@ -0,0 +1,362 @@
+"""
+Polygon boolean gets the exact union, intersection and difference of loop lists.
+
+The segments of all the loops are split where they cross or touch, so that the split segments only meet at their ends.  The fill on each side of a split segment is found by casting a ray from its middle and adding the windings of the split segments which the ray passes, then the segments which have the result filled on one side and empty on the other are kept and joined into the result loops.  The fill of each loop list is by the even odd rule, like euclidean.getIsInFilledRegion, or by the nonzero winding rule.
+
+"""
+
+from __future__ import absolute_import
+#Init has to be imported first because it has code to workaround the python bug where relative imports don't work if the module is imported as a main module.
+import __init__
+
+from fabmetheus_utilities import euclidean
+import math
+
+
+__author__ = 'Enrique Perez (perez_enrique@yahoo.com)'
+__credits__ = 'Art of Illusion <http://www.artofillusion.org/>'
+__date__ = '$Date: 2008/02/05 $'
+__license__ = 'GNU Affero General Public License http://www.gnu.org/licenses/agpl.html'
+
+
+def addPointIfOnSegment(epsilon, segment, point):
+	'Add the point to the split points of the segment if it is between the ends of the segment.'
+	segmentVector = segment.end - segment.begin
+	pointVector = point - segment.begin
+	along = (pointVector.real * segmentVector.real + pointVector.imag * segmentVector.imag) / (segmentVector.real * segmentVector.real + segmentVector.imag * segmentVector.imag)
+	alongEpsilon = epsilon / abs(segmentVector)
+	if alongEpsilon < along < 1.0 - alongEpsilon:
+		segment.splitPoints.append(point)
+
+def addSegmentIntersections(epsilon, firstSegment, pointTable, secondSegment):
+	'Add the points where the segments cross or touch to the split points of the segments.'
+	firstBegin = firstSegment.begin
+	firstVector = firstSegment.end - firstBegin
+	secondBegin = secondSegment.begin
+	secondVector = secondSegment.end - secondBegin
+	beginVector = secondBegin - firstBegin
+	denominator = firstVector.real * secondVector.imag - firstVector.imag * secondVector.real
+	firstLength = abs(firstVector)
+	secondLength = abs(secondVector)
+	if abs(denominator) <= epsilon * max(firstLength, secondLength):
+		if abs(beginVector.real * firstVector.imag - beginVector.imag * firstVector.real) > epsilon * firstLength:
+			return
+		addPointIfOnSegment(epsilon, firstSegment, secondBegin)
+		addPointIfOnSegment(epsilon, firstSegment, secondSegment.end)
+		addPointIfOnSegment(epsilon, secondSegment, firstBegin)
+		addPointIfOnSegment(epsilon, secondSegment, firstSegment.end)
+		return
+	firstAlong = (beginVector.real * secondVector.imag - beginVector.imag * secondVector.real) / denominator
+	secondAlong = (beginVector.real * firstVector.imag - beginVector.imag * firstVector.real) / denominator
+	firstEpsilon = epsilon / firstLength
+	secondEpsilon = epsilon / secondLength
+	if firstAlong < -firstEpsilon or firstAlong > 1.0 + firstEpsilon:
+		return
+	if secondAlong < -secondEpsilon or secondAlong > 1.0 + secondEpsilon:
+		return
+	isFirstInterior = firstEpsilon < firstAlong < 1.0 - firstEpsilon
+	isSecondInterior = secondEpsilon < secondAlong < 1.0 - secondEpsilon
+	if isFirstInterior and isSecondInterior:
+		intersection = getMergedPoint(epsilon, firstBegin + firstAlong * firstVector, pointTable)
+		firstSegment.splitPoints.append(intersection)
+		secondSegment.splitPoints.append(intersection)
+	elif isFirstInterior:
+		if secondAlong < 0.5:
+			firstSegment.splitPoints.append(secondBegin)
+		else:
+			firstSegment.splitPoints.append(secondSegment.end)
+	elif isSecondInterior:
+		if firstAlong < 0.5:
+			secondSegment.splitPoints.append(firstBegin)
+		else:
+			secondSegment.splitPoints.append(firstSegment.end)
+
+def addSplitSegments(segments, splitSegmentTable):
+	'Add the segments split at their split points to the split segment table, which is keyed by the lower end then the upper end.'
+	for segment in segments:
+		begin = segment.begin
+		segmentVector = segment.end - begin
+		splitPoints = [(0.0, begin), (1.0, segment.end)]
+		lengthSquared = segmentVector.real * segmentVector.real + segmentVector.imag * segmentVector.imag
+		for splitPoint in segment.splitPoints:
+			splitVector = splitPoint - begin
+			splitPoints.append(((splitVector.real * segmentVector.real + splitVector.imag * segmentVector.imag) / lengthSquared, splitPoint))
+		splitPoints.sort()
+		for splitPointIndex in xrange(len(splitPoints) - 1):
+			splitBegin = splitPoints[splitPointIndex][1]
+			splitEnd = splitPoints[splitPointIndex + 1][1]
+			if splitBegin == splitEnd:
+				continue
+			direction = 1
+			key = (splitBegin.real, splitBegin.imag, splitEnd.real, splitEnd.imag)
+			if (splitEnd.real, splitEnd.imag) < (splitBegin.real, splitBegin.imag):
+				direction = -1
+				key = (splitEnd.real, splitEnd.imag, splitBegin.real, splitBegin.imag)
+			if key not in splitSegmentTable:
+				splitSegmentTable[key] = SplitSegment(complex(key[0], key[1]), complex(key[2], key[3]))
+			splitSegmentTable[key].windings.append((segment.loopListIndex, direction))
+
+def addToEndsTable(begin, end, endsTable):
+	'Add the directed segment to the ends table, which is keyed by the begin point.'
+	if begin in endsTable:
+		endsTable[begin].append(end)
+	else:
+		endsTable[begin] = [end]
+
+def getBandIndex(bandLength, minimum, numberOfBands, value):
+	'Get the band index of the value, clamped to the bands.'
+	return max(0, min(numberOfBands - 1, int(math.floor((value - minimum) / bandLength))))
+
+def getBands(bandLength, minimum, numberOfBands, segments, isY):
+	'Get the bands of the segments, each band has the segments which overlap it in y or in x.'
+	bands = [[] for bandIndex in xrange(numberOfBands)]
+	for segment in segments:
+		if isY:
+			begin = segment.begin.imag
+			end = segment.end.imag
+		else:
+			begin = segment.begin.real
+			end = segment.end.real
+		lowerBandIndex = getBandIndex(bandLength, minimum, numberOfBands, min(begin, end))
+		upperBandIndex = getBandIndex(bandLength, minimum, numberOfBands, max(begin, end))
+		for bandIndex in xrange(lowerBandIndex, upperBandIndex + 1):
+			bands[bandIndex].append(segment)
+	return bands
+
+def getDifference(loopLists, isNonzero=False):
+	'Get the loops of the first loop list minus the other loop lists.'
+	return getLoopsByOperation(isInDifference, loopLists, isNonzero)
+
+def getInsides(isNonzero, windings):
+	'Get the insides of the loop lists from their windings.'
+	if isNonzero:
+		return [winding != 0 for winding in windings]
+	return [winding % 2 == 1 for winding in windings]
+
+def getIntersection(loopLists, isNonzero=False):
+	'Get the loops of the intersection of the loop lists.'
+	if len(loopLists) < 1:
+		return []
+	return getLoopsByOperation(isInIntersection, loopLists, isNonzero)
+
+def getLoopsByOperation(isInOperation, loopLists, isNonzero):
+	'Get the exact loops of the boolean operation of the loop lists, in order of descending area, with the outer loops widdershins and the holes clockwise.'
+	cornerMaximum = complex(-987654321.0, -987654321.0)
+	cornerMinimum = complex(987654321.0, 987654321.0)
+	for loops in loopLists:
+		for loop in loops:
+			for point in loop:
+				cornerMaximum = euclidean.getMaximum(cornerMaximum, point)
+				cornerMinimum = euclidean.getMinimum(cornerMinimum, point)
+	size = cornerMaximum - cornerMinimum
+	epsilon = 1.0e-10 * max(size.real, size.imag, 1.0)
+	pointTable = {}
+	segments = []
+	for loopListIndex, loops in enumerate(loopLists):
+		for loop in loops:
+			mergedLoop = [getMergedPoint(epsilon, point, pointTable) for point in loop]
+			for pointIndex, point in enumerate(mergedLoop):
+				nextPoint = mergedLoop[(pointIndex + 1) % len(mergedLoop)]
+				if point != nextPoint:
+					segments.append(Segment(point, nextPoint, loopListIndex))
+	if len(segments) < 1:
+		return []
+	numberOfBands = int(math.sqrt(len(segments))) + 1
+	bandHeight = max(size.imag / float(numberOfBands), epsilon)
+	for bandIndex, band in enumerate(getBands(bandHeight, cornerMinimum.imag, numberOfBands, segments, True)):
+		for firstIndex, firstSegment in enumerate(band):
+			firstLowerY = min(firstSegment.begin.imag, firstSegment.end.imag)
+			for secondSegment in band[firstIndex + 1 :]:
+				if firstSegment.maximumX < secondSegment.minimumX - epsilon or secondSegment.maximumX < firstSegment.minimumX - epsilon:
+					continue
+				lowerY = max(firstLowerY, min(secondSegment.begin.imag, secondSegment.end.imag))
+				if getBandIndex(bandHeight, cornerMinimum.imag, numberOfBands, lowerY) == bandIndex:
+					addSegmentIntersections(epsilon, firstSegment, pointTable, secondSegment)
+	splitSegmentTable = {}
+	addSplitSegments(segments, splitSegmentTable)
+	splitSegments = splitSegmentTable.values()
+	bandWidth = max(size.real / float(numberOfBands), epsilon)
+	xBands = getBands(bandWidth, cornerMinimum.real, numberOfBands, splitSegments, False)
+	yBands = getBands(bandHeight, cornerMinimum.imag, numberOfBands, splitSegments, True)
+	endsTable = {}
+	for splitSegment in splitSegments:
+		middle = 0.5 * (splitSegment.begin + splitSegment.end)
+		segmentVector = splitSegment.end - splitSegment.begin
+		if abs(segmentVector.imag) >= abs(segmentVector.real):
+			band = yBands[getBandIndex(bandHeight, cornerMinimum.imag, numberOfBands, middle.imag)]
+			rayWindings = getWindingsToLeft(len(loopLists), middle, band, splitSegment)
+			isRayOnLeft = segmentVector.imag > 0.0
+		else:
+			band = xBands[getBandIndex(bandWidth, cornerMinimum.real, numberOfBands, middle.real)]
+			rayWindings = getWindingsBelow(len(loopLists), middle, band, splitSegment)
+			isRayOnLeft = segmentVector.real < 0.0
+		otherWindings = rayWindings[:]
+		for loopListIndex, direction in splitSegment.windings:
+			if isRayOnLeft:
+				otherWindings[loopListIndex] -= direction
+			else:
+				otherWindings[loopListIndex] += direction
+		isRayInside = isInOperation(getInsides(isNonzero, rayWindings))
+		isOtherInside = isInOperation(getInsides(isNonzero, otherWindings))
+		if isRayInside == isOtherInside:
+			continue
+		if isRayInside == isRayOnLeft:
+			addToEndsTable(splitSegment.begin, splitSegment.end, endsTable)
+		else:
+			addToEndsTable(splitSegment.end, splitSegment.begin, endsTable)
+	loops = getLoopsFromEndsTable(endsTable)
+	loops.sort(key=euclidean.getAreaLoopAbsolute, reverse=True)
+	return loops
+
+def getLoopsFromEndsTable(endsTable):
+	'Get the loops by following the directed segments, turning as far clockwise as possible where more than one segment leaves a point.'
+	loops = []
+	for begin in endsTable.keys():
+		while begin in endsTable:
+			loop = [begin]
+			point = getPopEnd(begin, None, endsTable)
+			previousPoint = begin
+			while point != begin and point in endsTable:
+				loop.append(point)
+				nextPoint = getPopEnd(point, previousPoint, endsTable)
+				previousPoint = point
+				point = nextPoint
+			loop = getLoopWithoutCollinearPoints(loop)
+			if len(loop) > 2:
+				loops.append(loop)
+	return loops
+
+def getLoopWithoutCollinearPoints(loop):
+	'Get the loop without the points which are on the line between their neighbors.'
+	loopWithoutCollinearPoints = []
+	for pointIndex, point in enumerate(loop):
+		beginVector = loop[pointIndex - 1] - point
+		endVector = loop[(pointIndex + 1) % len(loop)] - point
+		cross = beginVector.real * endVector.imag - beginVector.imag * endVector.real
+		dot = beginVector.real * endVector.real + beginVector.imag * endVector.imag
+		if dot >= 0.0 or abs(cross) > 1.0e-12 * abs(beginVector) * abs(endVector):
+			loopWithoutCollinearPoints.append(point)
+	return loopWithoutCollinearPoints
+
+def getMergedPoint(epsilon, point, pointTable):
+	'Get the point in the point table which is within epsilon of the point, or add the point to the table and get it.'
+	xCell = int(math.floor(point.real / epsilon))
+	yCell = int(math.floor(point.imag / epsilon))
+	for xKey in xrange(xCell - 1, xCell + 2):
+		for yKey in xrange(yCell - 1, yCell + 2):
+			if (xKey, yKey) in pointTable:
+				for tablePoint in pointTable[(xKey, yKey)]:
+					if abs(tablePoint - point) <= epsilon:
+						return tablePoint
+	cellKey = (xCell, yCell)
+	if cellKey in pointTable:
+		pointTable[cellKey].append(point)
+	else:
+		pointTable[cellKey] = [point]
+	return point
+
+def getPopEnd(begin, previousPoint, endsTable):
+	'Get and remove the end of a segment leaving the begin point, the first clockwise from the direction back to the previous point.'
+	ends = endsTable[begin]
+	endIndex = 0
+	if len(ends) > 1 and previousPoint != None:
+		backAngle = math.atan2(previousPoint.imag - begin.imag, previousPoint.real - begin.real)
+		smallestClockwiseAngle = 987654321.0
+		for candidateIndex, end in enumerate(ends):
+			clockwiseAngle = (backAngle - math.atan2(end.imag - begin.imag, end.real - begin.real)) % (math.pi + math.pi)
+			if clockwiseAngle == 0.0:
+				clockwiseAngle = math.pi + math.pi
+			if clockwiseAngle < smallestClockwiseAngle:
+				endIndex = candidateIndex
+				smallestClockwiseAngle = clockwiseAngle
+	end = ends.pop(endIndex)
+	if len(ends) < 1:
+		del endsTable[begin]
+	return end
+
+def getUnion(loopLists, isNonzero=False):
+	'Get the loops of the union of the loop lists.'
+	return getLoopsByOperation(isInUnion, loopLists, isNonzero)
+
+def getWindingsBelow(numberOfLoopLists, point, segments, raySegment):
+	'Get the windings of the loop lists at the point, from the segments which cross the ray going down from the point.'
+	windings = [0] * numberOfLoopLists
+	x = point.real
+	for segment in segments:
+		if segment == raySegment:
+			continue
+		begin = segment.begin
+		end = segment.end
+		if (begin.real <= x) == (end.real <= x):
+			continue
+		yIntersection = begin.imag + (x - begin.real) * (end.imag - begin.imag) / (end.real - begin.real)
+		if yIntersection < point.imag:
+			for loopListIndex, direction in segment.windings:
+				if begin.real < end.real:
+					windings[loopListIndex] += direction
+				else:
+					windings[loopListIndex] -= direction
+	return windings
+
+def getWindingsToLeft(numberOfLoopLists, point, segments, raySegment):
+	'Get the windings of the loop lists at the point, from the segments which cross the ray going left from the point.'
+	windings = [0] * numberOfLoopLists
+	y = point.imag
+	for segment in segments:
+		if segment == raySegment:
+			continue
+		begin = segment.begin
+		end = segment.end
+		if (begin.imag <= y) == (end.imag <= y):
+			continue
+		xIntersection = begin.real + (y - begin.imag) * (end.real - begin.real) / (end.imag - begin.imag)
+		if xIntersection < point.real:
+			for loopListIndex, direction in segment.windings:
+				if begin.imag > end.imag:
+					windings[loopListIndex] += direction
+				else:
+					windings[loopListIndex] -= direction
+	return windings
+
+def isInDifference(insides):
+	'Determine if the point is inside the first loop list and outside the others.'
+	if not insides[0]:
+		return False
+	return True not in insides[1 :]
+
+def isInIntersection(insides):
+	'Determine if the point is inside all the loop lists.'
+	return False not in insides
+
+def isInUnion(insides):
+	'Determine if the point is inside any of the loop lists.'
+	return True in insides
+
+
+class Segment:
+	'A class to hold a loop segment and the points where it is split.'
+	def __init__(self, begin, end, loopListIndex):
+		'Initialize.'
+		self.begin = begin
+		self.end = end
+		self.loopListIndex = loopListIndex
+		self.maximumX = max(begin.real, end.real)
+		self.minimumX = min(begin.real, end.real)
+		self.splitPoints = []
+
+	def __repr__(self):
+		'Get the string representation of this Segment.'
+		return '%s %s %s %s' % (self.begin, self.end, self.loopListIndex, self.splitPoints)
+
+
+class SplitSegment:
+	'A class to hold a split segment, with the loop list index and direction of each loop segment on it.'
+	def __init__(self, begin, end):
+		'Initialize.'
+		self.begin = begin
+		self.end = end
+		self.windings = []
+
+	def __repr__(self):
+		'Get the string representation of this SplitSegment.'
+		return '%s %s %s' % (self.begin, self.end, self.windings)
@@ -28,6 +28,10 @@ __date__ = '$Date: 2008/02/05 $'
 __license__ = 'GNU Affero General Public License http://www.gnu.org/licenses/agpl.html'
 
 
+globalInstanceLayerTable = {}
+globalMaximumHoleSides = 64
+globalWeldRadiusOverImportRadius = 0.01
+
 def addEdgePair( edgePairTable, edges, faceEdgeIndex, remainingEdgeIndex, remainingEdgeTable ):
 	'Add edge pair to the edge pair table.'
 	if faceEdgeIndex == remainingEdgeIndex:
@@ -37,6 +41,28 @@ def addEdgePair( edgePairTable, edges, faceEdgeIndex, remainingEdgeIndex, remain
 	edgePair = EdgePair().getFromIndexesEdges( [ remainingEdgeIndex, faceEdgeIndex ], edges )
 	edgePairTable[ str( edgePair ) ] = edgePair
 
+def addEdgeFaceIndexes(edgeFaceIndexesTable, faceIndex, vertexIndexes):
+	'Add the face index to the edges of the face in the edge face indexes table.'
+	beginIndex = vertexIndexes[-1]
+	for endIndex in vertexIndexes:
+		if beginIndex < endIndex:
+			edgeKey = (beginIndex, endIndex)
+		else:
+			edgeKey = (endIndex, beginIndex)
+		if edgeKey in edgeFaceIndexesTable:
+			edgeFaceIndexesTable[edgeKey].append(faceIndex)
+		else:
+			edgeFaceIndexesTable[edgeKey] = [faceIndex]
+		beginIndex = endIndex
+
+def addFaceByVertexIndexes(edgeFaceIndexesTable, faces, vertexIndexes):
+	'Add a face with the vertex indexes and add its edges to the edge face indexes table.'
+	faceByVertexIndexes = face.Face()
+	faceByVertexIndexes.index = len(faces)
+	faceByVertexIndexes.vertexIndexes = vertexIndexes
+	addEdgeFaceIndexes(edgeFaceIndexesTable, faceByVertexIndexes.index, vertexIndexes)
+	faces.append(faceByVertexIndexes)
+
 def addFacesByConcaveLoop(faces, indexedLoop):
 	'Add faces from a polygon which is concave.'
 	if len(indexedLoop) < 3:
@@ -96,10 +122,25 @@ def addFacesByConvexReversed(faces, indexedLoop):
 	addFacesByConvex(faces, indexedLoop[: : -1])
 
 def addFacesByGrid(faces, grid):
-	'Add faces from grid.'
-	cellTopLoops = getIndexedCellLoopsFromIndexedGrid(grid)
-	for cellTopLoop in cellTopLoops:
-		addFacesByConvex(faces, cellTopLoop)
+	'Add faces from grid, two per cell, in the same order as adding the faces of the indexed cell loops by convex.'
+	for rowIndex in xrange(len(grid) - 1):
+		indexesBottom = [point.index for point in grid[rowIndex]]
+		indexesTop = [point.index for point in grid[rowIndex + 1]]
+		for columnIndex in xrange(len(indexesBottom) - 1):
+			indexBegin = indexesBottom[columnIndex]
+			indexBottomEnd = indexesBottom[columnIndex + 1]
+			indexTopBegin = indexesTop[columnIndex]
+			indexTopEnd = indexesTop[columnIndex + 1]
+			if indexBegin != indexBottomEnd and indexBottomEnd != indexTopEnd and indexTopEnd != indexBegin:
+				faceFromGrid = face.Face()
+				faceFromGrid.index = len(faces)
+				faceFromGrid.vertexIndexes = [indexBegin, indexBottomEnd, indexTopEnd]
+				faces.append(faceFromGrid)
+			if indexBegin != indexTopEnd and indexTopEnd != indexTopBegin and indexTopBegin != indexBegin:
+				faceFromGrid = face.Face()
+				faceFromGrid.index = len(faces)
+				faceFromGrid.vertexIndexes = [indexBegin, indexTopEnd, indexTopBegin]
+				faces.append(faceFromGrid)
 
 def addFacesByLoop(faces, indexedLoop):
 	'Add faces from a polygon which may be concave.'
@@ -140,6 +181,59 @@ def addFacesByMeldedConvexLoops(faces, indexedLoops):
 		indexedLoopTop = indexedLoops[0]
 	FaceGenerator(faces, indexedLoopBottom, indexedLoopTop)
 
+def addFacesToHoles(edgeFaceIndexesTable, faces, vertexes):
+	'Add faces to the closed holes with at most globalMaximumHoleSides sides, return the number of holes filled.'
+	nextIndexesTable = {}
+	for edgeKey, edgeFaceIndexes in edgeFaceIndexesTable.items():
+		if len(edgeFaceIndexes) == 1:
+			beginIndex, endIndex = edgeKey
+			if getIsEdgeForward(faces[edgeFaceIndexes[0]].vertexIndexes, beginIndex, endIndex):
+				beginIndex, endIndex = endIndex, beginIndex
+			if beginIndex in nextIndexesTable:
+				nextIndexesTable[beginIndex].append(endIndex)
+			else:
+				nextIndexesTable[beginIndex] = [endIndex]
+	holeLoops = []
+	for beginIndex in sorted(nextIndexesTable.keys()):
+		addHoleLoops(beginIndex, holeLoops, nextIndexesTable)
+	numberOfHolesFilled = 0
+	for holeLoop in holeLoops:
+		if len(holeLoop) > globalMaximumHoleSides:
+			continue
+		numberOfHolesFilled += 1
+		if len(holeLoop) == 3:
+			addFaceByVertexIndexes(edgeFaceIndexesTable, faces, holeLoop)
+			continue
+		center = Vector3()
+		for vertexIndex in holeLoop:
+			center += vertexes[vertexIndex]
+		center /= float(len(holeLoop))
+		centerIndex = len(vertexes)
+		vertexes.append(Vector3Index(centerIndex, center.x, center.y, center.z))
+		for holeLoopIndex, vertexIndex in enumerate(holeLoop):
+			addFaceByVertexIndexes(edgeFaceIndexesTable, faces, [vertexIndex, holeLoop[(holeLoopIndex + 1) % len(holeLoop)], centerIndex])
+	return numberOfHolesFilled
+
+def addHoleLoops(beginIndex, holeLoops, nextIndexesTable):
+	'Follow the open edges from the begin index and add the closed hole loops, a path which crosses itself is split into separate loops.'
+	path = [beginIndex]
+	pathIndexTable = {beginIndex : 0}
+	while len(nextIndexesTable[path[-1]]) > 0:
+		nextIndex = nextIndexesTable[path[-1]].pop()
+		if nextIndex in pathIndexTable:
+			pathIndex = pathIndexTable[nextIndex]
+			holeLoop = path[pathIndex :]
+			if len(holeLoop) > 2:
+				holeLoops.append(holeLoop)
+			for vertexIndex in holeLoop[1 :]:
+				del pathIndexTable[vertexIndex]
+			path = path[: pathIndex + 1]
+		elif nextIndex in nextIndexesTable:
+			pathIndexTable[nextIndex] = len(path)
+			path.append(nextIndex)
+		else:
+			return
+
 def addLoopToPointTable(loop, pointTable):
 	'Add the points in the loop to the point table.'
 	for point in loop:
@@ -322,6 +416,13 @@ def getDescendingAreaOrientedLoops(allPoints, corners, importRadius):
 	'Get descending area oriented loops which include most of the points.'
 	return getOrientedLoops(getDescendingAreaLoops(allPoints, corners, importRadius))
 
+def getEdgeFaceIndexesTable(faces):
+	'Get the table of the face indexes of each edge, keyed by the sorted vertex indexes of the edge.'
+	edgeFaceIndexesTable = {}
+	for faceIndex, meshFace in enumerate(faces):
+		addEdgeFaceIndexes(edgeFaceIndexesTable, faceIndex, meshFace.vertexIndexes)
+	return edgeFaceIndexesTable
+
 def getGeometryOutputByFacesVertexes(faces, vertexes):
 	'Get geometry output dictionary by faces and vertexes.'
 	return {'trianglemesh' : {'vertex' : vertexes, 'face' : faces}}
@@ -402,6 +503,48 @@ def getInsetPoint( loop, tinyRadius ):
 	midpointNormalized = midpoint / abs( midpoint )
 	return point + midpointNormalized * tinyRadius
 
+def getInstanceLoops(triangleMesh, z):
+	'Get the loops of the triangle mesh, stamped from the loops of an instance of the same mesh when one was sliced at the same height.'
+	instanceKey = triangleMesh.getInstanceKey()
+	if instanceKey == None:
+		return triangleMesh.getLoopsFromMesh(z)
+	if z not in globalInstanceLayerTable:
+		globalInstanceLayerTable.clear()
+		globalInstanceLayerTable[z] = {}
+	prototypeTable = globalInstanceLayerTable[z]
+	prototypeKey = (triangleMesh.importRadius, triangleMesh.isCorrectMesh, instanceKey, round(z - triangleMesh.instanceTranslation.z, 9))
+	if prototypeKey in prototypeTable:
+		return prototypeTable[prototypeKey].getStampedLoops(triangleMesh)
+	loops = triangleMesh.getLoopsFromMesh(z)
+	prototypeTable[prototypeKey] = InstancePrototype(loops, triangleMesh)
+	loopsCopy = []
+	for loop in loops:
+		loopsCopy.append(loop[:])
+	return loopsCopy
+
+def getInstanceTransform(tetragrid):
+	'Get the z rotation, the translation and the remaining tetragrid key of the tetragrid, or None if it is not affine.'
+	if tetragrid == None:
+		return 1.0, Vector3(), None
+	if tetragrid[3] != [0.0, 0.0, 0.0, 1.0]:
+		return None
+	rotation = complex(tetragrid[0][0], tetragrid[1][0])
+	if abs(rotation) < 0.000000001:
+		rotation = complex(tetragrid[0][1], tetragrid[1][1])
+	if abs(rotation) < 0.000000001:
+		rotation = 1.0
+	rotation /= abs(rotation)
+	translation = Vector3(tetragrid[0][3], tetragrid[1][3], tetragrid[2][3])
+	remainderKey = []
+	for column in xrange(3):
+		rotatedColumn = complex(tetragrid[0][column], tetragrid[1][column]) * rotation.conjugate()
+		remainderKey += [round(rotatedColumn.real, 9), round(rotatedColumn.imag, 9), round(tetragrid[2][column], 9)]
+	return rotation, translation, tuple(remainderKey)
+
+def getIsEdgeForward(vertexIndexes, beginIndex, endIndex):
+	'Determine if the face vertex indexes go from the begin index to the end index.'
+	return vertexIndexes[(vertexIndexes.index(beginIndex) + 1) % len(vertexIndexes)] == endIndex
+
 def getIsPathEntirelyOutsideTriangle(begin, center, end, vector3Path):
 	'Determine if a path is entirely outside another loop.'
 	loop = [begin.dropAxis(), center.dropAxis(), end.dropAxis()]
@@ -641,6 +784,64 @@ def getUniqueVertexes(loops):
 				uniqueVertexes.append(loop[vertexIndex])
 	return uniqueVertexes
 
+def getWeldedFaces(faces, weldedIndexes):
+	'Get the faces with the welded vertex indexes, without the degenerate and duplicate faces.'
+	faceKeySet = set()
+	weldedFaces = []
+	for meshFace in faces:
+		vertexIndexes = [weldedIndexes[vertexIndex] for vertexIndex in meshFace.vertexIndexes]
+		faceKey = tuple(sorted(vertexIndexes))
+		if len(set(vertexIndexes)) < 3 or faceKey in faceKeySet:
+			continue
+		faceKeySet.add(faceKey)
+		meshFace.edgeIndexes = []
+		meshFace.index = len(weldedFaces)
+		meshFace.vertexIndexes = vertexIndexes
+		weldedFaces.append(meshFace)
+	return weldedFaces
+
+def getWeldedIndexesVertexes(vertexes, weldRadius):
+	'Get the welded index of each vertex and the welded vertexes, a vertex within the weld radius of an earlier welded vertex is welded to it.'
+	cellSize = weldRadius + weldRadius
+	cellTable = {}
+	weldedIndexes = []
+	weldedVertexes = []
+	for vertex in vertexes:
+		cellCoordinates = []
+		neighborOffsets = []
+		for coordinate in (vertex.x, vertex.y, vertex.z):
+			cellFloat = coordinate / cellSize
+			cellCoordinate = int(math.floor(cellFloat))
+			cellCoordinates.append(cellCoordinate)
+			if cellFloat - cellCoordinate < 0.5:
+				neighborOffsets.append(-1)
+			else:
+				neighborOffsets.append(1)
+		cellX, cellY, cellZ = cellCoordinates
+		offsetX, offsetY, offsetZ = neighborOffsets
+		weldedIndex = None
+		for cellKey in (
+			(cellX, cellY, cellZ), (cellX + offsetX, cellY, cellZ), (cellX, cellY + offsetY, cellZ), (cellX, cellY, cellZ + offsetZ),
+			(cellX + offsetX, cellY + offsetY, cellZ), (cellX + offsetX, cellY, cellZ + offsetZ), (cellX, cellY + offsetY, cellZ + offsetZ),
+			(cellX + offsetX, cellY + offsetY, cellZ + offsetZ)):
+			if cellKey in cellTable:
+				for cellIndex in cellTable[cellKey]:
+					if abs(weldedVertexes[cellIndex] - vertex) <= weldRadius:
+						weldedIndex = cellIndex
+						break
+				if weldedIndex != None:
+					break
+		if weldedIndex == None:
+			weldedIndex = len(weldedVertexes)
+			weldedVertexes.append(Vector3Index(weldedIndex, vertex.x, vertex.y, vertex.z))
+			cellKey = (cellX, cellY, cellZ)
+			if cellKey in cellTable:
+				cellTable[cellKey].append(weldedIndex)
+			else:
+				cellTable[cellKey] = [weldedIndex]
+		weldedIndexes.append(weldedIndex)
+	return weldedIndexes, weldedVertexes
+
 def getWideAnglePointIndex(loop):
 	'Get a point index which has a wide enough angle, most point indexes have a wide enough angle, this is just to make sure.'
 	dotProductMinimum = 9999999.9
@@ -691,10 +892,94 @@ def isPathAdded( edges, faces, loops, remainingEdgeTable, vertexes, z ):
 	loops.append( getPath( edges, pathIndexes, vertexes, z ) )
 	return True
 
+def orientFaces(edgeFaceIndexesTable, faces, vertexes):
+	'Orient the faces of each connected shell consistently, outward for an outer shell and inward for a shell inside another one.'
+	isVisitedList = [False] * len(faces)
+	shells = []
+	for seedIndex in xrange(len(faces)):
+		if isVisitedList[seedIndex]:
+			continue
+		isVisitedList[seedIndex] = True
+		shell = [seedIndex]
+		stack = [seedIndex]
+		while len(stack) > 0:
+			vertexIndexes = faces[stack.pop()].vertexIndexes
+			beginIndex = vertexIndexes[-1]
+			for endIndex in vertexIndexes:
+				if beginIndex < endIndex:
+					edgeFaceIndexes = edgeFaceIndexesTable[(beginIndex, endIndex)]
+				else:
+					edgeFaceIndexes = edgeFaceIndexesTable[(endIndex, beginIndex)]
+				if len(edgeFaceIndexes) == 2:
+					for otherFaceIndex in edgeFaceIndexes:
+						if not isVisitedList[otherFaceIndex]:
+							isVisitedList[otherFaceIndex] = True
+							otherVertexIndexes = faces[otherFaceIndex].vertexIndexes
+							if getIsEdgeForward(otherVertexIndexes, beginIndex, endIndex):
+								otherVertexIndexes.reverse()
+							shell.append(otherFaceIndex)
+							stack.append(otherFaceIndex)
+				beginIndex = endIndex
+		shells.append(shell)
+	shellCorners = []
+	shellVolumes = []
+	for shell in shells:
+		shellVertexIndexSet = set()
+		volume = 0.0
+		for faceIndex in shell:
+			vertexIndexes = faces[faceIndex].vertexIndexes
+			shellVertexIndexSet.update(vertexIndexes)
+			first = vertexes[vertexIndexes[0]]
+			for vertexIndexIndex in xrange(1, len(vertexIndexes) - 1):
+				second = vertexes[vertexIndexes[vertexIndexIndex]]
+				third = vertexes[vertexIndexes[vertexIndexIndex + 1]]
+				volume += first.x * (second.y * third.z - second.z * third.y)
+				volume += first.y * (second.z * third.x - second.x * third.z)
+				volume += first.z * (second.x * third.y - second.y * third.x)
+		shellVertexes = [vertexes[vertexIndex] for vertexIndex in shellVertexIndexSet]
+		shellCorners.append(euclidean.getMaximumMinimumByVector3Path(shellVertexes))
+		shellVolumes.append(volume)
+	for shellIndex, shell in enumerate(shells):
+		maximum, minimum = shellCorners[shellIndex]
+		numberOfSurroundingShells = 0
+		for otherShellIndex, otherCorners in enumerate(shellCorners):
+			otherMaximum, otherMinimum = otherCorners
+			if otherShellIndex != shellIndex and abs(shellVolumes[otherShellIndex]) > abs(shellVolumes[shellIndex]):
+				if otherMaximum.x >= maximum.x and otherMaximum.y >= maximum.y and otherMaximum.z >= maximum.z:
+					if otherMinimum.x <= minimum.x and otherMinimum.y <= minimum.y and otherMinimum.z <= minimum.z:
+						numberOfSurroundingShells += 1
+		isOutward = numberOfSurroundingShells % 2 == 0
+		if shellVolumes[shellIndex] != 0.0 and (shellVolumes[shellIndex] > 0.0) != isOutward:
+			for faceIndex in shell:
+				faces[faceIndex].vertexIndexes.reverse()
+
 def processElementNode(elementNode):
 	'Process the xml element.'
 	evaluate.processArchivable(TriangleMesh, elementNode)
 
+def repairMesh(faces, importRadius, vertexes):
+	'Weld the near duplicate vertexes, orient the faces, fill the small holes, report the non manifold edges and return the repaired faces and vertexes.'
+	weldedIndexes, weldedVertexes = getWeldedIndexesVertexes(vertexes, globalWeldRadiusOverImportRadius * importRadius)
+	weldedFaces = getWeldedFaces(faces, weldedIndexes)
+	numberOfRemovedFaces = len(faces) - len(weldedFaces)
+	numberOfWeldedVertexes = len(vertexes) - len(weldedVertexes)
+	edgeFaceIndexesTable = getEdgeFaceIndexesTable(weldedFaces)
+	orientFaces(edgeFaceIndexesTable, weldedFaces, weldedVertexes)
+	numberOfHolesFilled = addFacesToHoles(edgeFaceIndexesTable, weldedFaces, weldedVertexes)
+	numberOfOpenEdges = 0
+	numberOfNonManifoldEdges = 0
+	for edgeFaceIndexes in edgeFaceIndexesTable.itervalues():
+		if len(edgeFaceIndexes) < 2:
+			numberOfOpenEdges += 1
+		elif len(edgeFaceIndexes) > 2:
+			numberOfNonManifoldEdges += 1
+	if numberOfWeldedVertexes > 0 or numberOfRemovedFaces > 0 or numberOfHolesFilled > 0:
+		print('Mesh repair welded %s vertexes, removed %s faces and filled %s holes.' % (numberOfWeldedVertexes, numberOfRemovedFaces, numberOfHolesFilled))
+	if numberOfOpenEdges > 0 or numberOfNonManifoldEdges > 0:
+		print('Warning, after repairMesh in triangle_mesh there are still %s open edges and %s non manifold edges.' % (numberOfOpenEdges, numberOfNonManifoldEdges))
+		print('Layers which cut through those edges will fall back to the algorithm that spans gaps.')
+	return weldedFaces, weldedVertexes
+
 def setEdgeMaximumMinimum(edge, vertexes):
 	'Set the edge maximum and minimum.'
 	beginIndex = edge.vertexIndexes[0]
@@ -784,6 +1069,31 @@ class FaceGenerator:
 		return betweenIndex
 
 
+class InstancePrototype:
+	'A slice through an instance of a mesh, which is stamped onto the other instances.'
+	def __init__(self, loops, triangleMesh):
+		'Initialize.'
+		self.loops = loops
+		self.rotation = triangleMesh.instanceRotation
+		self.translation = triangleMesh.instanceTranslation.dropAxis()
+
+	def __repr__(self):
+		'Get the string representation of this InstancePrototype.'
+		return '%s, %s, %s' % (self.rotation, self.translation, self.loops)
+
+	def getStampedLoops(self, triangleMesh):
+		'Get the loops rotated and translated from this prototype to the triangle mesh.'
+		rotation = triangleMesh.instanceRotation * self.rotation.conjugate()
+		translation = triangleMesh.instanceTranslation.dropAxis() - rotation * self.translation
+		stampedLoops = []
+		for loop in self.loops:
+			stampedLoop = []
+			for point in loop:
+				stampedLoop.append(rotation * point + translation)
+			stampedLoops.append(stampedLoop)
+		return stampedLoops
+
+
 class TriangleMesh( group.Group ):
 	'A triangle mesh.'
 	def __init__(self):
@@ -793,7 +1103,9 @@ class TriangleMesh( group.Group ):
 		self.edges = []
 		self.faces = []
 		self.importCoarseness = 1.0
+		self.instanceKey = None
 		self.isCorrectMesh = True
+		self.isRepairMesh = False
 		self.loopLayers = []
 		self.oldChainTetragrid = None
 		self.transformedVertexes = None
@@ -805,7 +1117,10 @@ class TriangleMesh( group.Group ):
 		xml_simple_writer.addXMLFromObjects( depth, self.faces, output )
 
 	def getCarveBoundaryLayers(self):
-		'Get the boundary layers.'
+		'Get the boundary layers, the mesh is repaired once before slicing if the is repair mesh flag is set.'
+		if self.isRepairMesh:
+			self.edges = []
+			self.faces, self.vertexes = repairMesh(self.faces, self.importRadius, self.getVertexes())
 		if self.getMinimumZ() == None:
 			return []
 		halfHeight = 0.5 * self.layerHeight
@@ -837,14 +1152,34 @@ class TriangleMesh( group.Group ):
 		'Get geometry output dictionary.'
 		return getGeometryOutputByFacesVertexes(self.faces, self.vertexes)
 
+	def getInstanceKey(self):
+		'Get the key of the untransformed mesh and its transform without the z rotation and translation, or None if it can not be instanced.'
+		if self.elementNode == None:
+			return None
+		self.getTransformedVertexes()
+		if self.instanceKey != None:
+			return self.instanceKey
+		instanceTransform = getInstanceTransform(self.oldChainTetragrid)
+		if instanceTransform == None:
+			return None
+		self.instanceRotation, self.instanceTranslation, remainderKey = instanceTransform
+		vertexesKey = []
+		for vertex in self.vertexes:
+			vertexesKey.append((vertex.x, vertex.y, vertex.z))
+		facesKey = []
+		for face in self.faces:
+			facesKey.append(tuple(face.vertexIndexes))
+		self.instanceKey = (tuple(vertexesKey), tuple(facesKey), remainderKey)
+		return self.instanceKey
+
 	def getInterpretationSuffix(self):
 		'Return the suffix for a triangle mesh.'
 		return 'xml'
 
 	def getLoops(self, importRadius, z):
-		'Get loops sliced through shape.'
+		'Get loops sliced through shape, instances which differ only by a z rotation and translation are sliced once.'
 		self.importRadius = importRadius
-		return self.getLoopsFromMesh(z)
+		return getInstanceLoops(self, z)
 
 	def getLoopsFromMesh( self, z ):
 		'Get loops from a carve of a mesh.'
@@ -860,14 +1195,12 @@ class TriangleMesh( group.Group ):
 
 	def getMinimumZ(self):
 		'Get the minimum z.'
-		self.cornerMaximum = Vector3(-987654321.0, -987654321.0, -987654321.0)
-		self.cornerMinimum = Vector3(987654321.0, 987654321.0, 987654321.0)
 		transformedVertexes = self.getTransformedVertexes()
 		if len(transformedVertexes) < 1:
+			self.cornerMaximum = Vector3(-987654321.0, -987654321.0, -987654321.0)
+			self.cornerMinimum = Vector3(987654321.0, 987654321.0, 987654321.0)
 			return None
-		for point in transformedVertexes:
-			self.cornerMaximum.maximize(point)
-			self.cornerMinimum.minimize(point)
+		self.cornerMaximum, self.cornerMinimum = euclidean.getMaximumMinimumByVector3Path(transformedVertexes)
 		return self.cornerMinimum.z
 
 	def getTransformedVertexes(self):
@@ -876,6 +1209,7 @@ class TriangleMesh( group.Group ):
 			return self.vertexes
 		chainTetragrid = self.getMatrixChainTetragrid()
 		if self.oldChainTetragrid != chainTetragrid:
+			self.instanceKey = None
 			self.oldChainTetragrid = matrix.getTetragridCopy(chainTetragrid)
 			self.transformedVertexes = None
 		if self.transformedVertexes == None:
@@ -890,6 +1224,7 @@ class TriangleMesh( group.Group ):
 
 	def getVertexes(self):
 		'Get all vertexes.'
+		self.instanceKey = None
 		self.transformedVertexes = None
 		return self.vertexes
 
@@ -901,6 +1236,10 @@ class TriangleMesh( group.Group ):
 		'Set the is correct mesh flag.'
 		self.isCorrectMesh = isCorrectMesh
 
+	def setCarveIsRepairMesh(self, isRepairMesh):
+		'Set the is repair mesh flag.'
+		self.isRepairMesh = isRepairMesh
+
 	def setCarveLayerHeight( self, layerHeight ):
 		'Set the layer height.'
 		self.layerHeight = layerHeight
@@ -30,8 +30,11 @@ except:
 	print('You do not have pySerial installed, which is needed to control the serial port.')
 	print('Information on pySerial is at:\nhttp://pyserial.wiki.sourceforge.net/pySerial')
 
+import collections
 import os
+import re
 import sys
+import threading
 import time
 
 
@@ -90,11 +93,7 @@ class RepRapArduinoSerialSender:
 		if self._verbose:
 			print "> " + block
 
-		# The arduino GCode interperter firmware doesn't like whitespace
-		# and if there's anything other than space and tab, we have other problems.
-		block=block.strip()
-		block=block.replace(' ','')
-		block=block.replace("\t",'')
+		block=self.getCompactBlock(block)
 		#Skip blank blocks.
 		if len(block) == 0:
 			return
@@ -102,6 +101,17 @@ class RepRapArduinoSerialSender:
 		self.ser.write(block + "\n")
 		self.read("OK")
 
+	def getCompactBlock(self, block):
+		"""
+			Returns the block without any whitespace.
+		"""
+		# The arduino GCode interperter firmware doesn't like whitespace
+		# and if there's anything other than space and tab, we have other problems.
+		block=block.strip()
+		block=block.replace(' ','')
+		block=block.replace("\t",'')
+		return block
+
 	def read(self, expect=None):
 		"""
 			This routine should never be called directly. It's used by write() and reset()
@@ -127,7 +137,7 @@ class RepRapArduinoSerialSender:
 				print "< " + response
 
 
-	def close():
+	def close(self):
 		"""
 			Closes the serial port, terminating communications with the arduino.
 		"""
@@ -137,3 +147,268 @@ class RepRapArduinoSerialSender:
 
 		if self._verbose:
 			print >> sys.stdout, "Serial Open?: " + str(self.ser.isOpen())
+
+
+class SenderTimeout(Exception):
+	"""
+		Raised by the pipelined sender when the arduino stays silent for too long.
+	"""
+	pass
+
+
+def getChecksum(line):
+	"""
+		Returns the RepRap checksum of the line, which is the exclusive or of all its characters.
+	"""
+	checksum = 0
+	for character in line:
+		checksum ^= ord(character)
+	return checksum
+
+
+class RepRapArduinoPipelinedSender(RepRapArduinoSerialSender):
+	"""
+		A sender which keeps the receive buffer of the firmware full, instead of waiting for an "ok"
+		after every block.  It counts the characters of the blocks which were sent but not acknowledged
+		yet, and only sends a block when it fits in what is left of the receive buffer.  The responses
+		are read by a separate reader thread, every "ok" acknowledges the oldest outstanding block.
+		With line numbers, every block is sent with a line number and a checksum, and when the firmware
+		asks for a resend the blocks are sent again from the requested line.
+		Nothing is sent before the firmware has started, because an arduino which resets when the port
+		is opened drops the blocks it receives while booting.
+	"""
+
+	def __init__(self, port, baud, verbose=False, bufferSize=127, lineNumbers=False, responseTimeout=200.0, startTimeout=5.0):
+		"""
+			Opens the serial port and starts the reader thread.
+			bufferSize is the size of the firmware receive buffer, which is 127 usable bytes for Marlin.
+			responseTimeout is how many seconds the arduino may stay silent while blocks are outstanding,
+			and startTimeout is how many seconds to wait for "start" before the first block when there
+			was no reset.
+		"""
+		RepRapArduinoSerialSender.__init__(self, port, baud, verbose)
+		#A short timeout so that the reader thread notices when the port is closed.
+		self.ser.timeout = 1.0
+		self.bufferSize = bufferSize
+		self.condition = threading.Condition()
+		self.history = {}
+		self.lineNumber = 0
+		self.lineNumbers = lineNumbers
+		self.isLineNumberReset = False
+		self.lastResponseTime = time.time()
+		self.outstanding = collections.deque()
+		self.outstandingLength = 0
+		self.resendGeneration = 0
+		self.resendLineNumber = None
+		self.responseTimeout = responseTimeout
+		self.started = threading.Event()
+		self.startTimeout = startTimeout
+		self.isReading = True
+		self.readerThread = threading.Thread(target=self.readResponses)
+		self.readerThread.setDaemon(True)
+		self.readerThread.start()
+
+	def reset(self):
+		"""
+			Resets the arduino by droping DTR for 1 second, waits for the reader thread
+			to receive "start" and then forgets the blocks which were outstanding.
+		"""
+		if self._verbose:
+			print "Resetting arduino..."
+
+		self.started.clear()
+		self.ser.setDTR(0)
+		# There is presumably some latency required.
+		time.sleep(1)
+		self.ser.setDTR(1)
+		self.started.wait(self.responseTimeout)
+		if not self.started.isSet():
+			raise SenderTimeout('The arduino did not send "start" within %s seconds of the reset.' % self.responseTimeout)
+		self.resetLineNumber()
+
+	def resetLineNumber(self):
+		"""
+			Forgets the outstanding blocks and, with line numbers, tells the firmware that the
+			line number starts again at zero.
+		"""
+		self.condition.acquire()
+		try:
+			self.isLineNumberReset = True
+			self.history = {}
+			self.lineNumber = 0
+			self.outstanding.clear()
+			self.outstandingLength = 0
+			self.resendLineNumber = None
+			if self.lineNumbers:
+				self.history[0] = 'M110'
+				self.sendLine(self.getNumberedLine(0), 0)
+		finally:
+			self.condition.release()
+
+	def write(self, block):
+		"""
+			Writes one block of g-code out to the arduino as soon as there is room for it in the receive buffer.
+			This returns without waiting for the "ok", call waitForAcknowledgements() to wait for all of them.
+		"""
+		if self._verbose:
+			print "> " + block
+
+		block=self.getCompactBlock(block)
+		#Skip blank blocks.
+		if len(block) == 0:
+			return
+
+		if not self.isLineNumberReset:
+			self.waitForStart()
+		self.condition.acquire()
+		try:
+			self.sendResendLines()
+			if not self.lineNumbers:
+				self.sendLine(block, None)
+				return
+			self.lineNumber += 1
+			self.history[self.lineNumber] = block
+			#There can not be more lines outstanding than bytes in the buffer, so older lines will never be asked for again.
+			self.history.pop(self.lineNumber - 2 * self.bufferSize, None)
+			self.sendLine(self.getNumberedLine(self.lineNumber), self.lineNumber)
+		finally:
+			self.condition.release()
+
+	def waitForAcknowledgements(self):
+		"""
+			Waits until every block has been acknowledged, sending the requested resends in the meantime.
+		"""
+		self.condition.acquire()
+		try:
+			while len(self.outstanding) > 0 or self.resendLineNumber != None:
+				self.sendResendLines()
+				if len(self.outstanding) > 0:
+					self.waitForResponse()
+		finally:
+			self.condition.release()
+
+	def waitForResponse(self):
+		"""
+			Waits for the reader thread to receive something, and raises SenderTimeout if the arduino
+			has been silent for longer than the response timeout.  The condition must be held.
+		"""
+		self.condition.wait(1.0)
+		silentTime = time.time() - self.lastResponseTime
+		if silentTime > self.responseTimeout:
+			raise SenderTimeout('The arduino did not respond for %.0f seconds, %s blocks are not acknowledged.' % (silentTime, len(self.outstanding)))
+
+	def waitForStart(self):
+		"""
+			Waits a little for the "start" of an arduino which reset when the port was opened, then
+			resets the line number.  If no "start" comes, the firmware is taken to be running already.
+		"""
+		self.started.wait(self.startTimeout)
+		if self._verbose and not self.started.isSet():
+			print "No start from the arduino, sending anyway."
+		self.resetLineNumber()
+
+	def close(self):
+		"""
+			Waits for the outstanding blocks, stops the reader thread and closes the serial port.
+		"""
+		try:
+			self.waitForAcknowledgements()
+		finally:
+			self.isReading = False
+			self.readerThread.join()
+			RepRapArduinoSerialSender.close(self)
+
+	def getNumberedLine(self, lineNumber):
+		"""
+			Returns the block of the line number with the line number before it and the checksum after it.
+		"""
+		line = 'N%s%s' % (lineNumber, self.history[lineNumber])
+		return '%s*%s' % (line, getChecksum(line))
+
+	def sendLine(self, line, lineNumber):
+		"""
+			Waits until the line fits in the receive buffer, then sends it.  The condition must be held.
+		"""
+		length = len(line) + 1
+		while len(self.outstanding) > 0 and self.outstandingLength + length > self.bufferSize:
+			self.waitForResponse()
+		if len(self.outstanding) == 0:
+			#Time the silence of the arduino from when it has something to answer.
+			self.lastResponseTime = time.time()
+		self.ser.write(line + "\n")
+		self.outstanding.append((lineNumber, length, self.resendGeneration))
+		self.outstandingLength += length
+
+	def sendResendLines(self):
+		"""
+			Sends the lines again from the line the firmware asked for.  The condition must be held.
+		"""
+		while self.resendLineNumber != None:
+			resendLineNumber = self.resendLineNumber
+			self.resendLineNumber = None
+			self.resendGeneration += 1
+			if self._verbose:
+				print "Resending from line %s" % resendLineNumber
+			for lineNumber in xrange(resendLineNumber, self.lineNumber + 1):
+				self.sendLine(self.getNumberedLine(lineNumber), lineNumber)
+				#If another resend was asked for while waiting for room, start again from that line.
+				if self.resendLineNumber != None:
+					break
+
+	def acknowledge(self):
+		"""
+			Removes the oldest outstanding block, which the firmware has taken out of the receive buffer.
+		"""
+		self.condition.acquire()
+		try:
+			if len(self.outstanding) > 0:
+				self.outstandingLength -= self.outstanding.popleft()[1]
+			self.condition.notifyAll()
+		finally:
+			self.condition.release()
+
+	def requestResend(self, lineNumber):
+		"""
+			Remembers that the lines from the line number have to be sent again.
+			The request is about the oldest outstanding block.  After a bad line the firmware rejects
+			every line which was already on the way and asks again for each of them, so requests about
+			blocks which were sent before the last resend started are ignored.
+		"""
+		self.condition.acquire()
+		try:
+			if len(self.outstanding) > 0 and self.outstanding[0][2] < self.resendGeneration:
+				return
+			if lineNumber not in self.history:
+				print "Can not resend line %s because it is not in the history." % lineNumber
+				return
+			if self.resendLineNumber == None or lineNumber < self.resendLineNumber:
+				self.resendLineNumber = lineNumber
+			self.condition.notifyAll()
+		finally:
+			self.condition.release()
+
+	def readResponses(self):
+		"""
+			The reader thread, which reads the responses until the port is closed.
+			"ok" acknowledges a block, "Resend: N" or "rs N" asks for the lines from N, and
+			all other responses are printed because they are useful data or error messages.
+		"""
+		while self.isReading:
+			response = self.ser.readline().strip()
+			if len(response) == 0:
+				continue
+			self.lastResponseTime = time.time()
+			lowerResponse = response.lower()
+			if lowerResponse.startswith('ok'):
+				if self._verbose or len(response) > 2:
+					print "< " + response
+				self.acknowledge()
+			elif lowerResponse.startswith('resend') or lowerResponse.startswith('rs'):
+				print "< " + response
+				lineNumberMatch = re.search('[0-9]+', response)
+				if lineNumberMatch != None:
+					self.requestResend(int(lineNumberMatch.group()))
+			else:
+				if 'start' in lowerResponse:
+					self.started.set()
+				print "< " + response
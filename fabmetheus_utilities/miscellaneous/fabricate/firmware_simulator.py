@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+Firmware simulator is a stand-in for the firmware of a printer on a pseudo terminal, so that the senders can be tried
+without a printer.  It only works on posix systems, which have pseudo terminals.
+
+It has a receive buffer of a limited size, and each block takes a fixed time to process, like the firmware
+taking the block out of its receive buffer.  When a block is processed, the simulator answers "ok" after the
+round trip delay of the serial link, which is what the pipelined sender saves on every block.  If a block
+has a line number and a checksum, they are checked like Marlin does, and if they are wrong the simulator answers
+with an error and "Resend:" the line number it expected.  If more characters arrive than fit in the receive buffer,
+they are lost like on a real printer and the overflow is counted.
+
+Usage:	python firmware_simulator.py [options]
+	--buffer  : The size of the receive buffer.
+	       -b : defaults to 127
+
+	--latency : The time in seconds to process each block.
+	       -l : defaults to 0.002
+
+	--delay   : The round trip delay in seconds before a response arrives.
+	       -d : defaults to 0.01
+
+	--errors  : The probability that a received line is corrupted, to try the resends.
+	       -e : defaults to 0.0
+
+The simulator prints the name of its pseudo terminal, which can then be given to send.py, for example:
+python send.py --noreset --pipelined --checksum --port=/dev/pts/5 Screw_Holder_export.gcode
+
+When the simulator is stopped with Ctrl-C, it prints the number of blocks, resends and overflows.
+
+sender_check.py runs the pipelined sender against the simulator with forced resends, and checks that every block
+is accepted once and in order.
+
+"""
+
+from __future__ import absolute_import
+import getopt
+import os
+import pty
+import operator
+import random
+import select
+import sys
+import time
+import tty
+
+
+__author__ = 'Enrique Perez (perez_enrique@yahoo.com)'
+__date__ = '$Date: 2008/21/04 $'
+__license__ = 'GNU Affero General Public License http://www.gnu.org/licenses/agpl.html'
+
+
+def getChecksum(line):
+	'Get the RepRap checksum of the line, which is the exclusive or of all its characters, computed apart from the senders so that it can check them.'
+	return reduce(operator.xor, [ord(character) for character in line], 0)
+
+
+class FirmwareSimulator(object):
+	'A class to simulate the receive buffer, latency and line number checking of a firmware.'
+	def __init__(self, bufferSize, latency, errorProbability, responseDelay=0.0):
+		'Initialize.'
+		self.acceptedBlocks = []
+		self.bufferSize = bufferSize
+		self.corruptLineNumbers = set()
+		self.errorProbability = errorProbability
+		self.isRunning = True
+		self.lastLineNumber = 0
+		self.latency = latency
+		self.maximumBufferLength = 0
+		self.numberOfBlocks = 0
+		self.numberOfOverflows = 0
+		self.numberOfResends = 0
+		self.receiveBuffer = ''
+		self.responseDelay = responseDelay
+		self.responses = []
+		self.masterFile, self.slaveFile = pty.openpty()
+		tty.setraw(self.slaveFile)
+
+	def __repr__(self):
+		'Get the string representation of this simulator.'
+		return '%s blocks, %s resends, %s overflows, maximum buffer length %s of %s' % (
+			self.numberOfBlocks, self.numberOfResends, self.numberOfOverflows, self.maximumBufferLength, self.bufferSize)
+
+	def getPortName(self):
+		'Get the name of the pseudo terminal, which the sender opens.'
+		return os.ttyname(self.slaveFile)
+
+	def getResponse(self, line):
+		'Get the response to a received line.'
+		self.numberOfBlocks += 1
+		if self.errorProbability > 0.0 and random.random() < self.errorProbability:
+			line = line[: -1] + chr(ord(line[-1]) ^ 1)
+		if not line.startswith('N'):
+			self.acceptedBlocks.append(line)
+			return 'ok\n'
+		asteriskIndex = line.find('*')
+		if asteriskIndex == -1:
+			return self.getResendResponse('No Checksum with line number')
+		lineWithoutChecksum = line[: asteriskIndex]
+		lineNumberEnd = 1
+		while lineNumberEnd < len(lineWithoutChecksum) and lineWithoutChecksum[lineNumberEnd].isdigit():
+			lineNumberEnd += 1
+		lineNumber = int(lineWithoutChecksum[1 : lineNumberEnd])
+		if lineNumber in self.corruptLineNumbers:
+			self.corruptLineNumbers.remove(lineNumber)
+			line = line[: -1] + chr(ord(line[-1]) ^ 1)
+		block = lineWithoutChecksum[lineNumberEnd :]
+		if block.startswith('M110'):
+			self.lastLineNumber = lineNumber
+			return 'ok\n'
+		if lineNumber != self.lastLineNumber + 1:
+			return self.getResendResponse('Line Number is not Last Line Number+1')
+		if line[asteriskIndex + 1 :] != str(getChecksum(lineWithoutChecksum)):
+			return self.getResendResponse('checksum mismatch')
+		self.acceptedBlocks.append(block)
+		self.lastLineNumber = lineNumber
+		return 'ok\n'
+
+	def getResendResponse(self, errorMessage):
+		'Get the error, resend and ok response like Marlin.'
+		self.numberOfResends += 1
+		resendLineNumber = self.lastLineNumber + 1
+		return 'Error:%s, Last Line: %s\nResend: %s\nok\n' % (errorMessage, self.lastLineNumber, resendLineNumber)
+
+	def readIntoBuffer(self, timeout):
+		'Read the available characters into the receive buffer, those which do not fit are lost.'
+		readableFiles = select.select([self.masterFile], [], [], timeout)[0]
+		if len(readableFiles) < 1:
+			return
+		try:
+			characters = os.read(self.masterFile, 4096)
+		except OSError:
+			return
+		roomLeft = self.bufferSize - len(self.receiveBuffer)
+		if len(characters) > roomLeft:
+			self.numberOfOverflows += 1
+			print('Error: receive buffer overflow, %s characters were lost.' % (len(characters) - roomLeft))
+			characters = characters[: max(roomLeft, 0)]
+		self.receiveBuffer += characters
+		self.maximumBufferLength = max(self.maximumBufferLength, len(self.receiveBuffer))
+
+	def run(self):
+		'Process the blocks from the receive buffer, one every latency seconds, until interrupted or stopped.'
+		os.write(self.masterFile, 'start\n')
+		nextProcessTime = time.time()
+		while self.isRunning:
+			now = time.time()
+			while len(self.responses) > 0 and self.responses[0][0] <= now:
+				os.write(self.masterFile, self.responses.pop(0)[1])
+			waitTime = 0.1
+			if len(self.responses) > 0:
+				waitTime = self.responses[0][0] - now
+			newlineIndex = self.receiveBuffer.find('\n')
+			if newlineIndex == -1 or now < nextProcessTime:
+				if newlineIndex != -1:
+					waitTime = min(waitTime, nextProcessTime - now)
+				self.readIntoBuffer(waitTime)
+				continue
+			line = self.receiveBuffer[: newlineIndex].strip()
+			self.receiveBuffer = self.receiveBuffer[newlineIndex + 1 :]
+			nextProcessTime = now + self.latency
+			if len(line) > 0:
+				self.responses.append((now + self.responseDelay, self.getResponse(line)))
+
+
+def main():
+	'Run the firmware simulator.'
+	bufferSize = 127
+	errorProbability = 0.0
+	latency = 0.002
+	responseDelay = 0.01
+	opts, args = getopt.getopt(sys.argv[1 :], 'b:d:e:l:', ['buffer=', 'delay=', 'errors=', 'latency='])
+	for option, value in opts:
+		if option in ('-b', '--buffer'):
+			bufferSize = int(value)
+		elif option in ('-d', '--delay'):
+			responseDelay = float(value)
+		elif option in ('-e', '--errors'):
+			errorProbability = float(value)
+		elif option in ('-l', '--latency'):
+			latency = float(value)
+	firmwareSimulator = FirmwareSimulator(bufferSize, latency, errorProbability, responseDelay)
+	print('The firmware simulator is listening on ' + firmwareSimulator.getPortName())
+	sys.stdout.flush()
+	try:
+		firmwareSimulator.run()
+	except KeyboardInterrupt:
+		print('')
+		print(firmwareSimulator)
+
+if __name__ == '__main__':
+	main()
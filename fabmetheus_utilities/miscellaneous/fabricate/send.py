@@ -42,6 +42,15 @@ Usage:	send [options] <filename or gcode> [<filename or gcode>...]
 	--baud    : Set the baud rate to use
 	       -b : defaults to 19200
 
+	--pipelined : Keep the receive buffer of the arduino full instead of
+	         -i : waiting for an "ok" after every line.
+
+	--buffer  : Set the size of the receive buffer for pipelined sending
+	       -u : defaults to 127, which is the usable buffer of Marlin.
+
+	--checksum : Send line numbers and checksums when pipelined sending,
+	        -c : and send lines again when the arduino asks for a resend.
+
 You may call this with either a single statement of g-code
 to be sent to the arduino, or with the name of a g-code file.
 ------------------------------------------------------------------
@@ -75,6 +84,9 @@ def main(argv=None):
 	verbose = 1
 	baud = 19200
 	reset = True
+	pipelined = False
+	bufferSize = 127
+	lineNumbers = False
 	if os.name == "posix":
 		port = "/dev/ttyUSB0"
 	elif os.name == "nt":
@@ -87,7 +99,7 @@ def main(argv=None):
 
 	try:
 		try:
-			opts, argv = getopt.getopt(argv[1:], "vqnhb:p:", ["verbose","quiet","noreset","help","baud=","port="])
+			opts, argv = getopt.getopt(argv[1:], "vqnhicb:p:u:", ["verbose","quiet","noreset","help","pipelined","checksum","baud=","port=","buffer="])
 		except getopt.error, msg:
 			raise Usage(msg)
 
@@ -110,6 +122,12 @@ def main(argv=None):
 				raise Usage(help_message)
 			elif option in ("-b", "--baud" ):
 					baud = int(value)
+			elif option in ("-i", "--pipelined" ):
+				pipelined = True
+			elif option in ("-u", "--buffer" ):
+				bufferSize = int(value)
+			elif option in ("-c", "--checksum" ):
+				lineNumbers = True
 
 		if verbose:
 			print "Arduino port set to " + port
@@ -121,12 +139,23 @@ def main(argv=None):
 		return 2
 
 
-	sender = RepRapArduinoSerialSender.RepRapArduinoSerialSender(port, baud, verbose>1)
-	if reset:
-		sender.reset()
-
-	for filename in argv:
-		processfile(filename,sender,verbose)
+	if pipelined:
+		sender = RepRapArduinoSerialSender.RepRapArduinoPipelinedSender(port, baud, verbose>1, bufferSize, lineNumbers)
+	else:
+		sender = RepRapArduinoSerialSender.RepRapArduinoSerialSender(port, baud, verbose>1)
+	try:
+		if reset:
+			sender.reset()
+
+		for filename in argv:
+			processfile(filename,sender,verbose)
+
+		if pipelined:
+			#Wait for the last lines to be acknowledged.
+			sender.close()
+	except RepRapArduinoSerialSender.SenderTimeout, err:
+		print >> sys.stderr, str(err)
+		return 1
 
 def processfile(filename,sender,verbose):
 	try:
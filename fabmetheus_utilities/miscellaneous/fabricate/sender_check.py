@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+Sender check runs the pipelined sender against the firmware simulator, to check it without a printer.  It needs
+pySerial and a posix system, which has pseudo terminals.
+
+The first check sends a gcode file with line numbers and checksums, and corrupts some of the lines once so that
+the simulator asks for resends.  It passes if the simulator accepted every block of the file exactly once and in
+order, without a receive buffer overflow.  The second check sends to a simulator which never answers, and passes if
+the sender raises SenderTimeout instead of waiting forever.
+
+Usage:	python sender_check.py [<filename>]
+	If there is no file name, a short generated gcode file is sent.
+
+The script prints the result of each check, and returns 1 if a check failed.
+
+"""
+
+from __future__ import absolute_import
+import firmware_simulator
+import RepRapArduinoSerialSender
+import sys
+import threading
+import time
+
+
+__author__ = 'Enrique Perez (perez_enrique@yahoo.com)'
+__date__ = '$Date: 2008/21/04 $'
+__license__ = 'GNU Affero General Public License http://www.gnu.org/licenses/agpl.html'
+
+
+def getBlocks(lines):
+	'Get the blocks which the sender sends for the lines, without the comments and the empty lines.'
+	blocks = []
+	for line in lines:
+		if line.lstrip().startswith(('(', '"', '\\')):
+			continue
+		block = line.strip().replace(' ', '').replace('\t', '')
+		if len(block) > 0:
+			blocks.append(block)
+	return blocks
+
+def getGeneratedLines():
+	'Get the lines of a short gcode file, some of them longer than others.'
+	lines = ['G21', 'G90', 'M101']
+	for lineIndex in xrange(200):
+		lines.append('G1 X%s.%s Y%s.125 Z0.4 F1200.0' % (lineIndex, lineIndex % 7, 200 - lineIndex))
+	lines.append('M103')
+	return lines
+
+def getResendCheckMessage(lines):
+	'Send the lines with line numbers through the simulator with forced resends, and get the error message, which is empty if the check passed.'
+	blocks = getBlocks(lines)
+	firmwareSimulator = firmware_simulator.FirmwareSimulator(127, 0.0005, 0.0, 0.002)
+	firmwareSimulator.corruptLineNumbers = set([1, 2, len(blocks) / 2, len(blocks)])
+	sender = RepRapArduinoSerialSender.RepRapArduinoPipelinedSender(firmwareSimulator.getPortName(), 115200, lineNumbers=True, responseTimeout=10.0)
+	simulatorThread = startSimulatorThread(firmwareSimulator)
+	#A sender which never gets a line through would be asked for resends forever, so the simulator is stopped after a while.
+	stopTimer = threading.Timer(0.1 * len(blocks) + 10.0, stopSimulator, [firmwareSimulator])
+	stopTimer.start()
+	try:
+		for line in lines:
+			if not line.lstrip().startswith(('(', '"', '\\')):
+				sender.write(line)
+		sender.close()
+	except RepRapArduinoSerialSender.SenderTimeout, err:
+		return str(err)
+	finally:
+		stopTimer.cancel()
+		stopSimulator(firmwareSimulator)
+		simulatorThread.join()
+	print(firmwareSimulator)
+	if firmwareSimulator.numberOfOverflows > 0:
+		return 'The receive buffer overflowed.'
+	if len(firmwareSimulator.corruptLineNumbers) > 0:
+		return 'The lines %s were never received.' % sorted(firmwareSimulator.corruptLineNumbers)
+	if firmwareSimulator.numberOfResends < 1:
+		return 'The simulator did not ask for a resend.'
+	if firmwareSimulator.acceptedBlocks != blocks:
+		for blockIndex, block in enumerate(blocks):
+			if blockIndex >= len(firmwareSimulator.acceptedBlocks) or firmwareSimulator.acceptedBlocks[blockIndex] != block:
+				return 'Block %s was sent as %s instead of %s.' % (blockIndex + 1, firmwareSimulator.acceptedBlocks[blockIndex : blockIndex + 1], block)
+		return 'There are %s more blocks than were sent.' % (len(firmwareSimulator.acceptedBlocks) - len(blocks))
+	return ''
+
+def getTimeoutCheckMessage():
+	'Send to a simulator which never answers, and get the error message, which is empty if the check passed.'
+	firmwareSimulator = firmware_simulator.FirmwareSimulator(127, 0.0, 0.0)
+	sender = RepRapArduinoSerialSender.RepRapArduinoPipelinedSender(firmwareSimulator.getPortName(), 115200, lineNumbers=True, responseTimeout=2.0, startTimeout=0.1)
+	beginTime = time.time()
+	try:
+		sender.write('G1 X1.0')
+		sender.close()
+	except RepRapArduinoSerialSender.SenderTimeout:
+		return ''
+	return 'The sender returned after %.1f seconds without a timeout, although nothing was acknowledged.' % (time.time() - beginTime)
+
+def startSimulatorThread(firmwareSimulator):
+	'Run the simulator in a thread, and return the thread.'
+	simulatorThread = threading.Thread(target=firmwareSimulator.run)
+	simulatorThread.setDaemon(True)
+	simulatorThread.start()
+	return simulatorThread
+
+def stopSimulator(firmwareSimulator):
+	'Stop the simulator thread.'
+	firmwareSimulator.isRunning = False
+
+
+def main():
+	'Run the sender checks.'
+	lines = getGeneratedLines()
+	if len(sys.argv) > 1:
+		lines = open(sys.argv[1]).read().splitlines()
+	isPassed = True
+	for checkName, getCheckMessage in [('resend', lambda: getResendCheckMessage(lines)), ('timeout', getTimeoutCheckMessage)]:
+		checkMessage = getCheckMessage()
+		if checkMessage == '':
+			print('The %s check passed.' % checkName)
+		else:
+			print('The %s check failed: %s' % (checkName, checkMessage))
+			isPassed = False
+	if not isPassed:
+		return 1
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
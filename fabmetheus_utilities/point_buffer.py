@@ -0,0 +1,152 @@
+"""
+Point buffer is a columnar buffer of three dimensional points, with the x, y and z in arrays of doubles and an optional array of indexes.
+
+A loader can append millions of points to a point buffer without making a Vector3 for each one, and then only make Vector3s for the points it keeps.  Legacy code which indexes the buffer gets a point view, which behaves like a Vector3 and reads and writes through to the buffer.
+
+Below are examples of PointBuffer use.
+
+>>> from point_buffer import PointBuffer
+>>> pointBuffer = PointBuffer()
+>>> pointBuffer.append(3.0, 4.0, 0.0)
+>>> pointBuffer.extend([1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+>>> len(pointBuffer)
+3
+>>> pointBuffer[0].magnitude()
+5.0
+>>> pointBuffer.getVector3(2)
+(4.0, 5.0, 6.0)
+"""
+
+from __future__ import absolute_import
+#Init has to be imported first because it has code to workaround the python bug where relative imports don't work if the module is imported as a main module.
+import __init__
+
+from fabmetheus_utilities.vector3 import Vector3
+from fabmetheus_utilities.vector3index import Vector3Index
+import array
+
+
+__author__ = 'Enrique Perez (perez_enrique@yahoo.com)'
+__date__ = '$Date: 2008/21/04 $'
+__license__ = 'GNU Affero General Public License http://www.gnu.org/licenses/agpl.html'
+
+
+class PointBuffer(object):
+	'A columnar buffer of points, with the x, y and z in arrays of doubles and an optional array of indexes.'
+	def __init__(self, hasIndexes=False):
+		'Initialize the empty arrays.'
+		self.indexes = None
+		if hasIndexes:
+			self.indexes = array.array('l')
+		self.xs = array.array('d')
+		self.ys = array.array('d')
+		self.zs = array.array('d')
+
+	def __getitem__(self, bufferIndex):
+		'Get a view of the point, which behaves like a Vector3.'
+		if bufferIndex < 0:
+			bufferIndex += len(self.xs)
+		if bufferIndex < 0 or bufferIndex >= len(self.xs):
+			raise IndexError('PointBuffer index out of range')
+		return PointView(self, bufferIndex)
+
+	def __iter__(self):
+		'Get an iterator over the views of the points.'
+		for bufferIndex in xrange(len(self.xs)):
+			yield PointView(self, bufferIndex)
+
+	def __len__(self):
+		'Get the number of points.'
+		return len(self.xs)
+
+	def __repr__(self):
+		'Get the string representation of this PointBuffer.'
+		return 'PointBuffer of %s points, hasIndexes %s' % (len(self.xs), self.indexes != None)
+
+	def append(self, x, y, z, index=0):
+		'Append a point, the index is only stored if the buffer has indexes.'
+		self.xs.append(x)
+		self.ys.append(y)
+		self.zs.append(z)
+		if self.indexes != None:
+			self.indexes.append(index)
+
+	def extend(self, xyzs):
+		'Append the points of a flat sequence of x, y and z values, the indexes are set to zero if the buffer has indexes.'
+		self.xs.extend(xyzs[0 : : 3])
+		self.ys.extend(xyzs[1 : : 3])
+		self.zs.extend(xyzs[2 : : 3])
+		if self.indexes != None:
+			self.indexes.extend([0] * (len(xyzs) / 3))
+
+	def getVector3(self, bufferIndex):
+		'Get a new Vector3 of the point, or a Vector3Index if the buffer has indexes.'
+		if self.indexes != None:
+			return Vector3Index(self.indexes[bufferIndex], self.xs[bufferIndex], self.ys[bufferIndex], self.zs[bufferIndex])
+		return Vector3(self.xs[bufferIndex], self.ys[bufferIndex], self.zs[bufferIndex])
+
+	def getVector3s(self):
+		'Get a list of new Vector3s of all the points.'
+		return [self.getVector3(bufferIndex) for bufferIndex in xrange(len(self.xs))]
+
+
+class PointView(Vector3):
+	'A view of a point in a point buffer, which behaves like a Vector3 and reads and writes through to the buffer.'
+	__slots__ = ['buffer', 'bufferIndex']
+
+	def __init__(self, buffer, bufferIndex):
+		'Set the buffer and the index of the point in it.'
+		self.buffer = buffer
+		self.bufferIndex = bufferIndex
+
+	def __eq__(self, other):
+		'Determine whether the point is identical to the other Vector3 or point view.'
+		if other == None:
+			return False
+		if not isinstance(other, Vector3):
+			return False
+		return self.x == other.x and self.y == other.y and self.z == other.z
+
+	def __hash__(self):
+		'Get the hash of the string representation, like a Vector3.'
+		return self.__repr__().__hash__()
+
+	def _getIndex(self):
+		'Get the index of the point, or None if the buffer does not have indexes.'
+		if self.buffer.indexes == None:
+			return None
+		return self.buffer.indexes[self.bufferIndex]
+
+	def _getX(self):
+		'Get the x of the point.'
+		return self.buffer.xs[self.bufferIndex]
+
+	def _getY(self):
+		'Get the y of the point.'
+		return self.buffer.ys[self.bufferIndex]
+
+	def _getZ(self):
+		'Get the z of the point.'
+		return self.buffer.zs[self.bufferIndex]
+
+	def _setIndex(self, index):
+		'Set the index of the point, if the buffer has indexes.'
+		if self.buffer.indexes != None:
+			self.buffer.indexes[self.bufferIndex] = index
+
+	def _setX(self, x):
+		'Set the x of the point.'
+		self.buffer.xs[self.bufferIndex] = x
+
+	def _setY(self, y):
+		'Set the y of the point.'
+		self.buffer.ys[self.bufferIndex] = y
+
+	def _setZ(self, z):
+		'Set the z of the point.'
+		self.buffer.zs[self.bufferIndex] = z
+
+	index = property(_getIndex, _setIndex)
+	x = property(_getX, _setX)
+	y = property(_getY, _setY)
+	z = property(_getZ, _setZ)
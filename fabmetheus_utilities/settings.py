@@ -164,6 +164,17 @@ def getAlterationFile(fileName):
 	alterationsDirectory = archive.getSkeinforgePath('alterations')
 	return getFileInGivenDirectory(alterationsDirectory, fileName)
 
+def getAlterationFilePath(fileName):
+	"Get the path of the file from the fileName or the lowercase fileName in the alterations directories, in the same order as getAlterationFile."
+	settingsAlterationsDirectory = archive.getSettingsPath('alterations')
+	archive.makeDirectory(settingsAlterationsDirectory)
+	filePathInSettingsAlterationsDirectory = getFilePathInGivenDirectory(settingsAlterationsDirectory, fileName)
+	if filePathInSettingsAlterationsDirectory != '':
+		if os.path.getsize(filePathInSettingsAlterationsDirectory) > 0:
+			return filePathInSettingsAlterationsDirectory
+	alterationsDirectory = archive.getSkeinforgePath('alterations')
+	return getFilePathInGivenDirectory(alterationsDirectory, fileName)
+
 def getAlterationFileLine(fileName):
 	"Get the alteration file line from the fileName."
 	lines = getAlterationLines(fileName)
@@ -230,6 +241,14 @@ def getFileInGivenDirectory( directory, fileName ):
 			return getFileTextGivenDirectoryFileName( directory, directoryFile )
 	return ''
 
+def getFilePathInGivenDirectory(directory, fileName):
+	"Get the path of the fileName or the lowercase fileName in the given directory, return an empty string if it is not there."
+	lowerFileName = fileName.lower()
+	for directoryFile in os.listdir(directory):
+		if directoryFile.lower() == lowerFileName:
+			return os.path.join(directory, directoryFile)
+	return ''
+
 def getFileTextGivenDirectoryFileName( directory, fileName ):
 	"Get the entire text of a file with the given file name in the given directory."
 	absoluteFilePath = os.path.join( directory, fileName )
@@ -16,8 +16,10 @@ from fabmetheus_utilities import gcodec
 from fabmetheus_utilities import intercircle
 from fabmetheus_utilities import settings
 from fabmetheus_utilities import svg_writer
+import collections
 import math
 import os
+import re
 import sys
 import traceback
 
@@ -38,7 +40,7 @@ def addFunctionsToDictionary( dictionary, functions, prefix ):
 	for function in functions:
 		dictionary[ function.__name__[ len( prefix ) : ] ] = function
 
-def getArcComplexes(begin, end, largeArcFlag, radius, sweepFlag, xAxisRotation):
+def getArcComplexes(begin, end, largeArcFlag, radius, sweepFlag, xAxisRotation, flatteningTolerance=None):
 	'Get the arc complexes, procedure at http://www.w3.org/TR/SVG/implnote.html#ArcImplementationNotes'
 	if begin == end:
 		print('Warning, begin equals end in getArcComplexes in svgReader')
@@ -105,8 +107,11 @@ def getArcComplexes(begin, end, largeArcFlag, radius, sweepFlag, xAxisRotation):
 	else:
 		if angleDifference > 0.0:
 			angleDifference -= 2.0 * math.pi
-	global globalSideAngle
-	sides = int(math.ceil(abs(angleDifference) / globalSideAngle))
+	if flatteningTolerance == None:
+		sides = int(math.ceil(abs(angleDifference) / globalSideAngle))
+	else:
+		maximumRadius = max(radius.real, radius.imag) * beginMinusCenterTransformedLength
+		sides = getNumberOfSidesByChordError(flatteningTolerance, maximumRadius * angleDifference * angleDifference)
 	sideAngle = angleDifference / float(sides)
 	arcComplexes = []
 	center = complex(centerTransformed.real * radius.real, centerTransformed.imag * radius.imag) * xAxisRotationComplex
@@ -146,6 +151,15 @@ def getCubicPoints( begin, controlPoints, end, numberOfBezierPoints=globalNumber
 		cubicPoints.append(getCubicPoint(bezierPortion * bezierIndex, begin, controlPoints, end))
 	return cubicPoints
 
+def getFlatteningToleranceByMatrixSVG(flatteningTolerance, matrixSVG):
+	"Get the flattening tolerance in the units before the matrixSVG, so that the chord error after the transform is within the tolerance."
+	if flatteningTolerance == None:
+		return None
+	maximumScale = matrixSVG.getMaximumScale()
+	if maximumScale <= 0.0:
+		return flatteningTolerance
+	return flatteningTolerance / maximumScale
+
 def getFontReader(fontFamily):
 	'Get the font reader for the fontFamily.'
 	fontLower = fontFamily.lower().replace(' ', '_')
@@ -196,6 +210,26 @@ def getMatrixSVG(elementNode):
 			matrixSVG = matrixSVG.getSelfTimesOther(globalGetTricomplexDictionary[ transformWord ](transformString.split()))
 	return matrixSVG
 
+def getNumberOfCubicPoints(begin, controlPoints, end, flatteningTolerance):
+	'Get the number of cubic points, so that the chord error is within the flattening tolerance if there is one.'
+	if flatteningTolerance == None:
+		return globalNumberOfBezierPoints
+	beginSecondDifference = begin - controlPoints[0] - controlPoints[0] + controlPoints[1]
+	endSecondDifference = controlPoints[0] - controlPoints[1] - controlPoints[1] + end
+	return getNumberOfSidesByChordError(flatteningTolerance, 6.0 * max(abs(beginSecondDifference), abs(endSecondDifference)))
+
+def getNumberOfQuadraticPoints(begin, controlPoint, end, flatteningTolerance):
+	'Get the number of quadratic points, so that the chord error is within the flattening tolerance if there is one.'
+	if flatteningTolerance == None:
+		return globalNumberOfBezierPoints
+	return getNumberOfSidesByChordError(flatteningTolerance, 2.0 * abs(begin - controlPoint - controlPoint + end))
+
+def getNumberOfSidesByChordError(flatteningTolerance, maximumSecondDerivative):
+	'Get the number of sides of a curve parameterized from zero to one, the chord error of a side of parameter length h is at most maximumSecondDerivative * h * h / 8.'
+	if flatteningTolerance <= 0.0:
+		return globalNumberOfBezierPoints
+	return max(1, int(math.ceil(math.sqrt(maximumSecondDerivative / (8.0 * flatteningTolerance)))))
+
 def getQuadraticPoint( along, begin, controlPoint, end ):
 	'Get the quadratic point.'
 	oneMinusAlong = 1.0 - along
@@ -228,6 +262,21 @@ def getRightStripMinusSplit(lineString):
 		lineString = lineString.replace('- ', '-')
 	return lineString.split()
 
+def getSizedAdvancedGlyphLoops(character, fontReader, fontSize, horizontalAdvanceX, yAxisPointingUpward, flatteningTolerance=None):
+	'Get copies of the sized loops of the glyph advanced horizontally, the least recently used loops are evicted when the table is full.'
+	sizedGlyphKey = (fontReader.fontFamily, character, fontSize, yAxisPointingUpward, flatteningTolerance)
+	if sizedGlyphKey in globalSizedGlyphLoopsTable:
+		sizedLoops = globalSizedGlyphLoopsTable.pop(sizedGlyphKey)
+	else:
+		sizedLoops = fontReader.getGlyph(character, yAxisPointingUpward, flatteningTolerance).getSizedAdvancedLoops(fontSize, 0.0, yAxisPointingUpward)
+		if len(globalSizedGlyphLoopsTable) >= globalMaximumNumberOfSizedGlyphs:
+			globalSizedGlyphLoopsTable.popitem(False)
+	globalSizedGlyphLoopsTable[sizedGlyphKey] = sizedLoops
+	if horizontalAdvanceX == 0.0:
+		return [sizedLoop[:] for sizedLoop in sizedLoops]
+	sizedAdvance = complex(fontSize / fontReader.unitsPerEM * horizontalAdvanceX, 0.0)
+	return [[point + sizedAdvance for point in sizedLoop] for sizedLoop in sizedLoops]
+
 def getStrokeRadius(elementNode):
 	"Get the stroke radius."
 	return 0.5 * getRightStripAlphabetPercent(getStyleValue('1.0', elementNode, 'stroke-width'))
@@ -247,15 +296,17 @@ def getStyleValue(defaultValue, elementNode, key):
 		return defaultValue
 	return getStyleValue(defaultValue, elementNode.parentNode, key)
 
-def getTextComplexLoops(fontFamily, fontSize, text, yAxisPointingUpward=True):
-	"Get text as complex loops."
+def getTextComplexLoops(fontFamily, fontSize, text, yAxisPointingUpward=True, flatteningTolerance=None):
+	"Get text as complex loops, the flattening tolerance is in the units of the font size."
 	textComplexLoops = []
 	fontReader = getFontReader(fontFamily)
+	glyphFlatteningTolerance = None
+	if flatteningTolerance != None and fontSize != 0.0:
+		glyphFlatteningTolerance = flatteningTolerance * fontReader.unitsPerEM / abs(fontSize)
 	horizontalAdvanceX = 0.0
 	for character in text:
-		glyph = fontReader.getGlyph(character, yAxisPointingUpward)
-		textComplexLoops += glyph.getSizedAdvancedLoops(fontSize, horizontalAdvanceX, yAxisPointingUpward)
-		horizontalAdvanceX += glyph.horizontalAdvanceX
+		textComplexLoops += getSizedAdvancedGlyphLoops(character, fontReader, fontSize, horizontalAdvanceX, yAxisPointingUpward, glyphFlatteningTolerance)
+		horizontalAdvanceX += fontReader.getGlyph(character, yAxisPointingUpward, glyphFlatteningTolerance).horizontalAdvanceX
 	return textComplexLoops
 
 def getTransformedFillOutline(elementNode, loop, yAxisPointingUpward):
@@ -393,7 +444,7 @@ def processSVGElementpath( elementNode, svgReader ):
 		print(elementNode.attributes)
 		return
 	loopLayer = svgReader.getLoopLayer()
-	PathReader(elementNode, loopLayer.loops, svgReader.yAxisPointingUpward)
+	PathReader(elementNode, loopLayer.loops, svgReader.yAxisPointingUpward, svgReader.flatteningTolerance)
 
 def processSVGElementpolygon( elementNode, svgReader ):
 	"Process elementNode by svgReader."
@@ -479,9 +530,10 @@ def processSVGElementtext(elementNode, svgReader):
 	fontFamily = getStyleValue('Gentium Basic Regular', elementNode, 'font-family')
 	fontSize = getRightStripAlphabetPercent(getStyleValue('12.0', elementNode, 'font-size'))
 	matrixSVG = getChainMatrixSVGIfNecessary(elementNode, svgReader.yAxisPointingUpward)
+	flatteningTolerance = getFlatteningToleranceByMatrixSVG(svgReader.flatteningTolerance, matrixSVG)
 	loopLayer = svgReader.getLoopLayer()
 	translate = euclidean.getComplexDefaultByDictionaryKeys(complex(), elementNode.attributes, 'x', 'y')
-	for textComplexLoop in getTextComplexLoops(fontFamily, fontSize, elementNode.getTextContent(), svgReader.yAxisPointingUpward):
+	for textComplexLoop in getTextComplexLoops(fontFamily, fontSize, elementNode.getTextContent(), svgReader.yAxisPointingUpward, flatteningTolerance):
 		translatedLoop = []
 		for textComplexPoint in textComplexLoop:
 			translatedLoop.append(textComplexPoint + translate )
@@ -489,15 +541,16 @@ def processSVGElementtext(elementNode, svgReader):
 
 
 class FontReader:
-	"Class to read a font in the fonts folder."
+	"Class to read a font in the fonts folder, the self closing glyph elements are only parsed when their glyph is used."
 	def __init__(self, fontFamily):
 		"Initialize."
 		self.fontFamily = fontFamily
 		self.glyphDictionary = {}
 		self.glyphElementNodeDictionary = {}
-		self.missingGlyph = None
-		fileName = os.path.join(getFontsDirectoryPath(), fontFamily + '.svg')
-		documentElement = DocumentNode(fileName, archive.getFileText(fileName)).getDocumentElement()
+		self.glyphTextDictionary = {}
+		self.fileName = os.path.join(getFontsDirectoryPath(), fontFamily + '.svg')
+		fontText = self.getTextRemoveGlyphTexts(archive.getFileText(self.fileName))
+		documentElement = DocumentNode(self.fileName, fontText).getDocumentElement()
 		self.fontElementNode = documentElement.getFirstChildByLocalName('defs').getFirstChildByLocalName('font')
 		self.fontFaceElementNode = self.fontElementNode.getFirstChildByLocalName('font-face')
 		self.unitsPerEM = float(self.fontFaceElementNode.attributes['units-per-em'])
@@ -505,21 +558,46 @@ class FontReader:
 		for glyphElementNode in glyphElementNodes:
 			self.glyphElementNodeDictionary[glyphElementNode.attributes['unicode']] = glyphElementNode
 
-	def getGlyph(self, character, yAxisPointingUpward):
-		"Get the glyph for the character."
-		if character not in self.glyphElementNodeDictionary:
-			if self.missingGlyph == None:
-				missingGlyphElementNode = self.fontElementNode.getFirstChildByLocalName('missing-glyph')
-				self.missingGlyph = Glyph(missingGlyphElementNode, self.unitsPerEM, yAxisPointingUpward)
-			return self.missingGlyph
-		if character not in self.glyphDictionary:
-			self.glyphDictionary[character] = Glyph(self.glyphElementNodeDictionary[character], self.unitsPerEM, yAxisPointingUpward)
-		return self.glyphDictionary[character]
+	def getGlyph(self, character, yAxisPointingUpward, flatteningTolerance=None):
+		"Get the glyph for the character, the glyph loops depend on the y axis direction and the flattening tolerance so they are part of the key."
+		glyphKey = (character, yAxisPointingUpward, flatteningTolerance)
+		if glyphKey in self.glyphDictionary:
+			return self.glyphDictionary[glyphKey]
+		if character in self.glyphTextDictionary:
+			glyphElementNode = DocumentNode(self.fileName, self.glyphTextDictionary.pop(character)).getDocumentElement()
+			glyphElementNode.parentNode = self.fontElementNode
+			self.glyphElementNodeDictionary[character] = glyphElementNode
+		if character in self.glyphElementNodeDictionary:
+			glyphElementNode = self.glyphElementNodeDictionary[character]
+		else:
+			glyphElementNode = self.fontElementNode.getFirstChildByLocalName('missing-glyph')
+		glyph = Glyph(glyphElementNode, self.unitsPerEM, yAxisPointingUpward, flatteningTolerance)
+		self.glyphDictionary[glyphKey] = glyph
+		return glyph
+
+	def getTextRemoveGlyphTexts(self, fontText):
+		"Get the font text without the self closing glyph elements, and add their texts to the glyph text dictionary."
+		fontTextPieces = []
+		pieceBeginIndex = 0
+		glyphBeginIndex = fontText.find('<glyph')
+		while glyphBeginIndex > -1:
+			glyphEndIndex = fontText.find('>', glyphBeginIndex) + 1
+			if glyphEndIndex < 1:
+				break
+			glyphText = fontText[glyphBeginIndex : glyphEndIndex]
+			unicodeMatch = globalGlyphUnicodeExpression.search(glyphText)
+			if glyphText.endswith('/>') and glyphText[len('<glyph')].isspace() and unicodeMatch != None:
+				fontTextPieces.append(fontText[pieceBeginIndex : glyphBeginIndex])
+				self.glyphTextDictionary[unicodeMatch.group(2)] = glyphText
+				pieceBeginIndex = glyphEndIndex
+			glyphBeginIndex = fontText.find('<glyph', glyphEndIndex)
+		fontTextPieces.append(fontText[pieceBeginIndex :])
+		return ''.join(fontTextPieces)
 
 
 class Glyph:
 	"Class to handle a glyph."
-	def __init__(self, elementNode, unitsPerEM, yAxisPointingUpward):
+	def __init__(self, elementNode, unitsPerEM, yAxisPointingUpward, flatteningTolerance=None):
 		"Initialize."
 		self.horizontalAdvanceX = float(elementNode.attributes['horiz-adv-x'])
 		self.loops = []
@@ -527,7 +605,7 @@ class Glyph:
 		elementNode.attributes['fill'] = ''
 		if 'd' not in elementNode.attributes:
 			return
-		PathReader(elementNode, self.loops, yAxisPointingUpward)
+		PathReader(elementNode, self.loops, yAxisPointingUpward, flatteningTolerance)
 
 	def getSizedAdvancedLoops(self, fontSize, horizontalAdvanceX, yAxisPointingUpward=True):
 		"Get loops for font size, advanced horizontally."
@@ -554,6 +632,16 @@ class MatrixSVG:
 		"Get the string representation of this two by three svg matrix."
 		return str(self.tricomplex)
 
+	def getMaximumScale(self):
+		"Get the largest factor by which the matrix scales a length."
+		if self.tricomplex == None:
+			return 1.0
+		complexX = self.tricomplex[0]
+		complexY = self.tricomplex[1]
+		squaresSum = abs(complexX) * abs(complexX) + abs(complexY) * abs(complexY)
+		determinant = complexX.real * complexY.imag - complexX.imag * complexY.real
+		return math.sqrt(0.5 * (squaresSum + math.sqrt(max(0.0, squaresSum * squaresSum - 4.0 * determinant * determinant))))
+
 	def getOtherTimesSelf(self, otherTricomplex):
 		"Get the other matrix multiplied by this matrix."
 		if otherTricomplex == None:
@@ -596,10 +684,11 @@ class MatrixSVG:
 
 class PathReader:
 	"Class to read svg path."
-	def __init__(self, elementNode, loops, yAxisPointingUpward):
-		"Add to path string to loops."
+	def __init__(self, elementNode, loops, yAxisPointingUpward, flatteningTolerance=None):
+		"Add to path string to loops, the curves are sampled adaptively if there is a flattening tolerance."
 		self.controlPoints = None
 		self.elementNode = elementNode
+		self.flatteningTolerance = getFlatteningToleranceByMatrixSVG(flatteningTolerance, getChainMatrixSVGIfNecessary(elementNode, yAxisPointingUpward))
 		self.loops = loops
 		self.oldPoint = None
 		self.outlinePaths = []
@@ -627,14 +716,14 @@ class PathReader:
 		xAxisRotation = math.radians(float(self.words[self.wordIndex + 3]))
 		largeArcFlag = euclidean.getBooleanFromValue(self.words[ self.wordIndex + 4 ])
 		sweepFlag = euclidean.getBooleanFromValue(self.words[ self.wordIndex + 5 ])
-		self.path += getArcComplexes(begin, end, largeArcFlag, radius, sweepFlag, xAxisRotation)
+		self.path += getArcComplexes(begin, end, largeArcFlag, radius, sweepFlag, xAxisRotation, self.flatteningTolerance)
 		self.wordIndex += 8
 
 	def addPathCubic( self, controlPoints, end ):
 		"Add a cubic curve to the path."
 		begin = self.getOldPoint()
 		self.controlPoints = controlPoints
-		self.path += getCubicPoints( begin, controlPoints, end )
+		self.path += getCubicPoints(begin, controlPoints, end, getNumberOfCubicPoints(begin, controlPoints, end, self.flatteningTolerance))
 		self.wordIndex += 7
 
 	def addPathCubicReflected( self, controlPoint, end ):
@@ -645,7 +734,7 @@ class PathReader:
 			if len(self.controlPoints) == 2:
 				controlPointBegin = begin + begin - self.controlPoints[-1]
 		self.controlPoints = [controlPointBegin, controlPoint]
-		self.path += getCubicPoints(begin, self.controlPoints, end)
+		self.path += getCubicPoints(begin, self.controlPoints, end, getNumberOfCubicPoints(begin, self.controlPoints, end, self.flatteningTolerance))
 		self.wordIndex += 5
 
 	def addPathLine(self, lineFunction, point):
@@ -683,7 +772,7 @@ class PathReader:
 		"Add a quadratic curve to the path."
 		begin = self.getOldPoint()
 		self.controlPoints = [controlPoint]
-		self.path += getQuadraticPoints(begin, controlPoint, end)
+		self.path += getQuadraticPoints(begin, controlPoint, end, getNumberOfQuadraticPoints(begin, controlPoint, end, self.flatteningTolerance))
 		self.wordIndex += 5
 
 	def addPathQuadraticReflected( self, end ):
@@ -694,7 +783,7 @@ class PathReader:
 			if len( self.controlPoints ) == 1:
 				controlPoint = begin + begin - self.controlPoints[-1]
 		self.controlPoints = [ controlPoint ]
-		self.path += getQuadraticPoints(begin, controlPoint, end)
+		self.path += getQuadraticPoints(begin, controlPoint, end, getNumberOfQuadraticPoints(begin, controlPoint, end, self.flatteningTolerance))
 		self.wordIndex += 3
 
 	def getComplexByExtraIndex( self, extraIndex=0 ):
@@ -844,6 +933,7 @@ class SVGReader:
 	"An svg carving."
 	def __init__(self):
 		"Add empty lists."
+		self.flatteningTolerance = None
 		self.loopLayers = []
 		self.sliceDictionary = None
 		self.stopProcessing = False
@@ -907,6 +997,7 @@ class SVGReader:
 globalFontFileNames = None
 globalFontReaderDictionary = {}
 globalGetTricomplexDictionary = {}
+globalGlyphUnicodeExpression = re.compile(r'\sunicode\s*=\s*(["\'])(.*?)\1', re.DOTALL)
 globalGetTricomplexFunctions = [
 	getTricomplexmatrix,
 	getTricomplexrotate,
@@ -947,7 +1038,9 @@ globalProcessSVGElementFunctions = [
 	processSVGElementpolyline,
 	processSVGElementrect,
 	processSVGElementtext ]
+globalMaximumNumberOfSizedGlyphs = 10000
 globalSideAngle = 0.5 * math.pi / float( globalNumberOfCornerPoints )
+globalSizedGlyphLoopsTable = collections.OrderedDict()
 
 
 addFunctionsToDictionary( globalGetTricomplexDictionary, globalGetTricomplexFunctions, 'getTricomplex')
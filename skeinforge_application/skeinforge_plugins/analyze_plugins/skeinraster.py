@@ -0,0 +1,378 @@
+"""
+This page is in the table of contents.
+Skeinraster is an analyze plugin to write a png image for each layer of a gcode file, and a thumbnail of the whole file, without a display.
+
+Skeinraster draws the same extrusion lines as skeinlayer, in the resistor colors red, orange, yellow, green, blue, purple & brown, with the extruder off travel lines in grey.  Unlike skeinlayer, it does not need Tkinter or a screen, so it can be used to make previews on a server.  The lines are rasterized with a scanline fill of each thick line and the images are written as png files with zlib.
+
+==Operation==
+The default 'Activate Skeinraster' checkbox is off.  When it is on, the functions described below will work when called from the skeinforge toolchain, when it is off, the functions will not be called from the toolchain.  The functions will still be called, whether or not the 'Activate Skeinraster' checkbox is on, when skeinraster is run directly.
+
+==Settings==
+===Go Around Extruder Off Travel===
+Default is off.
+
+When selected, the image bounds will include the travel when the extruder is off, which means it will include the nozzle wipe path if any.
+
+===Layers===
+====Layers From====
+Default is zero.
+
+The "Layers From" is the index of the bottom layer that will be written.  If the the layer from index is negative, then the images will start from the layer from index below the top layer.
+
+====Layers To====
+Default is a huge number, which will be limited to the highest index layer.
+
+The "Layers To" is the index of the top layer that will be written.  If the layer to index is negative, then the images will go to the layer to index below the top layer.  The layer from until layer to index is a python slice.
+
+===Number of Worker Processes===
+Default is zero.
+
+The number of processes which rasterize the layers at the same time.  If the number is zero, the number of processors will be used.  If the number is one, the layers will be rasterized one after another in the skeinforge process.
+
+===Scale===
+Default is ten.
+
+The scale of the layer images in pixels per millimeter.
+
+===Thumbnail Size===
+Default is one hundred and twenty eight.
+
+The size in pixels of the larger side of the thumbnail, which shows all the layers seen from above.  If the size is zero, no thumbnail will be written.
+
+===Width===
+If the width is set to zero, the thread will not be drawn.
+
+====Width of Extrusion Thread====
+Default is three.
+
+The "Width of Extrusion Thread" sets the width in pixels of the extrusion threads.
+
+====Width of Travel Thread====
+Default is one.
+
+The "Width of Travel Thread" sets the width in pixels of the grey extruder off travel threads.
+
+==Examples==
+Below are examples of skeinraster being used.  These examples are run in a terminal in the folder which contains Screw Holder_penultimate.gcode and skeinraster.py.
+
+> python skeinraster.py
+This brings up the skeinraster dialog.
+
+> python skeinraster.py Screw Holder_penultimate.gcode
+The skeinraster images are saved in the folder Screw_Holder_penultimate_skeinraster
+
+"""
+
+from __future__ import absolute_import
+#Init has to be imported first because it has code to workaround the python bug where relative imports don't work if the module is imported as a main module.
+import __init__
+
+from fabmetheus_utilities.vector3 import Vector3
+from fabmetheus_utilities import archive
+from fabmetheus_utilities import euclidean
+from fabmetheus_utilities import gcodec
+from fabmetheus_utilities import settings
+from skeinforge_application.skeinforge_plugins.analyze_plugins.analyze_utilities import tableau
+from skeinforge_application.skeinforge_utilities import skeinforge_polyfile
+from skeinforge_application.skeinforge_utilities import skeinforge_profile
+import math
+import multiprocessing
+import os
+import struct
+import sys
+import time
+import zlib
+
+__author__ = 'Enrique Perez (perez_enrique@yahoo.com)'
+__date__ = '$Date: 2008/21/04 $'
+__license__ = 'GNU Affero General Public License http://www.gnu.org/licenses/agpl.html'
+
+
+# The rgb values of the Tk color names used by skeinlayer.
+globalColorDictionary = {
+	'blue' : (0, 0, 255),
+	'brown' : (165, 42, 42),
+	'gray' : (190, 190, 190),
+	'green' : (0, 255, 0),
+	'orange' : (255, 165, 0),
+	'purple' : (160, 32, 240),
+	'red' : (255, 0, 0),
+	'white' : (255, 255, 255),
+	'yellow' : (255, 255, 0)}
+
+
+def getColorString(colorName):
+	'Get the three byte rgb string of the color name.'
+	return struct.pack('BBB', *globalColorDictionary[colorName])
+
+def getNewRepository():
+	'Get new repository.'
+	return SkeinrasterRepository()
+
+def getNumberOfWorkerProcesses(numberOfWorkerProcesses):
+	'Get the number of worker processes, if the setting is zero it is the number of processors.'
+	if numberOfWorkerProcesses > 0:
+		return numberOfWorkerProcesses
+	try:
+		return multiprocessing.cpu_count()
+	except NotImplementedError:
+		return 1
+
+def getPNGChunk(chunkType, data):
+	'Get a png chunk, which is the length, type, data and crc.'
+	return struct.pack('>I', len(data)) + chunkType + data + struct.pack('>I', zlib.crc32(chunkType + data) & 0xffffffff)
+
+def getWindowAnalyzeFile(fileName):
+	'Write the png images for a gcode file.'
+	gcodeText = archive.getFileText(fileName)
+	return getWindowAnalyzeFileGivenText(fileName, gcodeText)
+
+def getWindowAnalyzeFileGivenText(fileName, gcodeText, repository=None):
+	'Write the png images for a gcode file given the settings.'
+	if gcodeText == '':
+		return None
+	if repository == None:
+		repository = settings.getReadRepository(SkeinrasterRepository())
+	startTime = time.time()
+	skein = SkeinrasterSkein()
+	skein.parseGcode(gcodeText, repository)
+	if len(skein.layerLines) < 1 or skein.cornerMaximum.x < skein.cornerMinimum.x:
+		print('Warning, there are no extrusion lines so skeinraster will do nothing for:')
+		print(fileName)
+		return None
+	suffixFileName = fileName[: fileName.rfind('.')] + '_skeinraster'
+	suffixDirectoryName = os.path.join(os.path.dirname(suffixFileName), os.path.basename(suffixFileName).replace(' ', '_'))
+	archive.makeDirectory(suffixDirectoryName)
+	rasterJobs = skein.getRasterJobs(suffixDirectoryName)
+	numberOfWorkerProcesses = min(getNumberOfWorkerProcesses(repository.numberOfWorkerProcesses.value), len(rasterJobs))
+	if numberOfWorkerProcesses > 1:
+		pool = multiprocessing.Pool(numberOfWorkerProcesses)
+		pool.map(writeRasterJob, rasterJobs)
+		pool.close()
+		pool.join()
+	else:
+		for rasterJob in rasterJobs:
+			writeRasterJob(rasterJob)
+	print('The skeinraster images are saved in the folder ' + archive.getSummarizedFileName(suffixDirectoryName))
+	print('It took %s to skeinraster the file.' % euclidean.getDurationString(time.time() - startTime))
+	return None
+
+def writeOutput(fileName, fileNamePenultimate, fileNameSuffix, filePenultimateWritten, gcodeText=''):
+	'Write the png images for a skeinforge gcode file, if activate skeinraster is selected.'
+	repository = settings.getReadRepository(SkeinrasterRepository())
+	if not repository.activateSkeinraster.value:
+		return None
+	gcodeText = archive.getTextIfEmpty(fileNameSuffix, gcodeText)
+	return getWindowAnalyzeFileGivenText(fileNameSuffix, gcodeText, repository)
+
+def writeRasterJob(rasterJob):
+	'Rasterize the thick lines of a raster job and write the png file.  This is module level so that it can be called by the worker processes.'
+	fileName, width, height, thickLines = rasterJob
+	rasterImage = RasterImage(width, height)
+	for thickLine in thickLines:
+		rasterImage.addThickLine(*thickLine)
+	archive.writeFileText(fileName, rasterImage.getPNGText(), 'wb')
+	return fileName
+
+
+class RasterImage(object):
+	'An rgb image buffer.'
+	def __init__(self, width, height, backgroundColorName='white'):
+		'Initialize.'
+		self.height = height
+		self.rowLength = 3 * width
+		self.width = width
+		self.buffer = bytearray(getColorString(backgroundColorName) * (width * height))
+
+	def addSpan(self, colorString, row, xBegin, xEnd):
+		'Fill the pixels in the row from xBegin to and including xEnd.'
+		xBegin = max(xBegin, 0)
+		xEnd = min(xEnd, self.width - 1)
+		if xEnd < xBegin:
+			return
+		rowStart = row * self.rowLength
+		self.buffer[rowStart + 3 * xBegin : rowStart + 3 * xEnd + 3] = colorString * (xEnd - xBegin + 1)
+
+	def addThickLine(self, begin, end, colorString, lineWidth):
+		'Fill the rectangle around the line from begin to end with a scanline fill.'
+		segment = end - begin
+		segmentLength = abs(segment)
+		if segmentLength == 0.0:
+			return
+		halfWidthNormal = complex(-segment.imag, segment.real) * (0.5 * max(lineWidth, 1.0) / segmentLength)
+		corners = [begin + halfWidthNormal, end + halfWidthNormal, end - halfWidthNormal, begin - halfWidthNormal]
+		rowBegin = max(int(math.ceil(min(corner.imag for corner in corners) - 0.5)), 0)
+		rowEnd = min(int(math.floor(max(corner.imag for corner in corners) - 0.5)), self.height - 1)
+		edges = []
+		for cornerIndex, corner in enumerate(corners):
+			nextCorner = corners[(cornerIndex + 1) % 4]
+			if corner.imag != nextCorner.imag:
+				edges.append((corner, nextCorner))
+		for row in xrange(rowBegin, rowEnd + 1):
+			y = float(row) + 0.5
+			xIntersections = []
+			for edgeBegin, edgeEnd in edges:
+				if (edgeBegin.imag <= y) != (edgeEnd.imag <= y):
+					xIntersections.append(edgeBegin.real + (y - edgeBegin.imag) * (edgeEnd.real - edgeBegin.real) / (edgeEnd.imag - edgeBegin.imag))
+			if len(xIntersections) > 1:
+				xBegin = int(math.ceil(min(xIntersections) - 0.5))
+				self.addSpan(colorString, row, xBegin, max(int(math.floor(max(xIntersections) - 0.5)), xBegin))
+
+	def getPNGText(self):
+		'Get the png file text of the image.'
+		rows = bytearray()
+		for rowStart in xrange(0, len(self.buffer), self.rowLength):
+			rows.append(0) # Each row begins with the none filter type.
+			rows += self.buffer[rowStart : rowStart + self.rowLength]
+		header = struct.pack('>IIBBBBB', self.width, self.height, 8, 2, 0, 0, 0) # Eight bit rgb, no interlace.
+		pngChunks = [getPNGChunk('IHDR', header), getPNGChunk('IDAT', zlib.compress(str(rows), 6)), getPNGChunk('IEND', '')]
+		return '\x89PNG\r\n\x1a\n' + ''.join(pngChunks)
+
+
+class SkeinrasterRepository(object):
+	'A class to handle the skeinraster settings.'
+	def __init__(self):
+		'Set the default settings, execute title & settings fileName.'
+		skeinforge_profile.addListsToCraftTypeRepository('skeinforge_application.skeinforge_plugins.analyze_plugins.skeinraster.html', self)
+		self.activateSkeinraster = settings.BooleanSetting().getFromValue('Activate Skeinraster', self, False)
+		self.fileNameInput = settings.FileNameInput().getFromFileName([('Gcode text files', '*.gcode')], 'Open File to Write Raster Images for', self, '')
+		self.goAroundExtruderOffTravel = settings.BooleanSetting().getFromValue('Go Around Extruder Off Travel', self, False)
+		settings.LabelSeparator().getFromRepository(self)
+		settings.LabelDisplay().getFromName('- Layers -', self)
+		self.layersFrom = settings.IntSpin().getFromValue(0, 'Layers From (index):', self, 20, 0)
+		self.layersTo = settings.IntSpin().getSingleIncrementFromValue(0, 'Layers To (index):', self, 912345678, 912345678)
+		settings.LabelSeparator().getFromRepository(self)
+		self.numberOfWorkerProcesses = settings.IntSpin().getFromValue(0, 'Number of Worker Processes (integer):', self, 16, 0)
+		self.scale = settings.FloatSpin().getFromValue(2.0, 'Scale (pixels per millimeter):', self, 50.0, 10.0)
+		self.thumbnailSize = settings.IntSpin().getFromValue(0, 'Thumbnail Size (pixels):', self, 512, 128)
+		settings.LabelSeparator().getFromRepository(self)
+		settings.LabelDisplay().getFromName('- Width -', self)
+		self.widthOfExtrusionThread = settings.IntSpin().getSingleIncrementFromValue(0, 'Width of Extrusion Thread (pixels):', self, 5, 3)
+		self.widthOfTravelThread = settings.IntSpin().getSingleIncrementFromValue(0, 'Width of Travel Thread (pixels):', self, 5, 1)
+		self.executeTitle = 'Skeinraster'
+
+	def execute(self):
+		'Write button has been clicked.'
+		fileNames = skeinforge_polyfile.getFileOrGcodeDirectory(self.fileNameInput.value, self.fileNameInput.wasCancelled)
+		for fileName in fileNames:
+			getWindowAnalyzeFile(fileName)
+
+
+class SkeinrasterSkein(object):
+	'A class to get the colored lines of each layer of a gcode skein, in model coordinates.'
+	def __init__(self):
+		'Initialize.'
+		self.colorNames = ['brown', 'red', 'orange', 'yellow', 'green', 'blue', 'purple']
+		self.extrusionNumber = 0
+		self.isThereALayerStartWord = False
+		self.layerCount = settings.LayerCount()
+		self.layerLines = []
+		self.oldZ = - 999987654321.0
+
+	def addToPath(self, location):
+		'Add a line from the old location to the location.'
+		if self.oldLocation == None or self.coloredLines == None:
+			return
+		if self.extruderActive or self.repository.goAroundExtruderOffTravel.value:
+			self.cornerMaximum.maximize(location)
+			self.cornerMinimum.minimize(location)
+		if self.extruderActive:
+			colorName = self.colorNames[self.extrusionNumber % len(self.colorNames)]
+			self.coloredLines.append((self.oldLocation.dropAxis(), location.dropAxis(), colorName, True))
+		else:
+			self.coloredLines.append((self.oldLocation.dropAxis(), location.dropAxis(), 'gray', False))
+
+	def getRasterJob(self, fileName, layerLines, scale, marginCornerLow, extrusionWidth, travelWidth):
+		'Get the file name, size and screen thick lines of the layer lines.'
+		cornerImaginaryTotal = self.cornerMaximum.y + self.cornerMinimum.y
+		screenSize = scale * (self.cornerMaximum.dropAxis() - self.cornerMinimum.dropAxis()) + 2.0 * self.margin
+		thickLines = []
+		colorStringDictionary = {}
+		for coloredLines in layerLines:
+			for begin, end, colorName, isExtrusionThread in coloredLines:
+				lineWidth = travelWidth
+				if isExtrusionThread:
+					lineWidth = extrusionWidth
+				if lineWidth > 0.0:
+					if colorName not in colorStringDictionary:
+						colorStringDictionary[colorName] = getColorString(colorName)
+					beginScreen = scale * complex(begin.real, cornerImaginaryTotal - begin.imag) - marginCornerLow
+					endScreen = scale * complex(end.real, cornerImaginaryTotal - end.imag) - marginCornerLow
+					thickLines.append((beginScreen, endScreen, colorStringDictionary[colorName], lineWidth))
+		return (fileName, int(math.ceil(screenSize.real)), int(math.ceil(screenSize.imag)), thickLines)
+
+	def getRasterJobs(self, directoryName):
+		'Get the raster jobs for the selected layers and the thumbnail.'
+		rasterJobs = []
+		scale = self.repository.scale.value
+		scaleCornerLow = scale * complex(self.cornerMinimum.x, self.cornerMinimum.y)
+		marginCornerLow = scaleCornerLow - self.margin
+		extrusionWidth = float(self.repository.widthOfExtrusionThread.value)
+		travelWidth = float(self.repository.widthOfTravelThread.value)
+		layerIndexes = range(len(self.layerLines))[self.repository.layersFrom.value : self.repository.layersTo.value]
+		for layerIndex in layerIndexes:
+			fileName = os.path.join(directoryName, 'layer_%04d.png' % layerIndex)
+			rasterJobs.append(self.getRasterJob(fileName, [self.layerLines[layerIndex]], scale, marginCornerLow, extrusionWidth, travelWidth))
+		thumbnailSize = self.repository.thumbnailSize.value
+		if thumbnailSize < 1:
+			return rasterJobs
+		modelSize = self.cornerMaximum.dropAxis() - self.cornerMinimum.dropAxis()
+		thumbnailScale = (float(thumbnailSize) - 2.0 * self.margin.real) / max(modelSize.real, modelSize.imag, 1.0)
+		thumbnailMarginCornerLow = thumbnailScale * complex(self.cornerMinimum.x, self.cornerMinimum.y) - self.margin
+		widthMultiplier = min(1.0, thumbnailScale / scale)
+		thumbnailFileName = os.path.join(directoryName, 'thumbnail.png')
+		rasterJobs.append(self.getRasterJob(
+			thumbnailFileName, self.layerLines, thumbnailScale, thumbnailMarginCornerLow, widthMultiplier * extrusionWidth, widthMultiplier * travelWidth))
+		return rasterJobs
+
+	def parseGcode(self, gcodeText, repository):
+		'Parse gcode text and store the colored lines of each layer.'
+		self.repository = repository
+		self.coloredLines = None
+		self.cornerMaximum = Vector3(-987654321.0, -987654321.0, -987654321.0)
+		self.cornerMinimum = Vector3(987654321.0, 987654321.0, 987654321.0)
+		self.extruderActive = False
+		self.margin = complex(10.0, 10.0)
+		self.oldLocation = None
+		lines = archive.getTextLines(gcodeText)
+		self.isThereALayerStartWord = (gcodec.getFirstWordIndexReverse('(<layer>', lines, 1) > -1)
+		for line in lines:
+			self.parseLine(line)
+
+	def parseLine(self, line):
+		'Parse a gcode line and add it to the colored lines.'
+		splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
+		if len(splitLine) < 1:
+			return
+		firstWord = splitLine[0]
+		if tableau.getIsLayerStart(firstWord, self, splitLine):
+			self.extrusionNumber = 0
+			self.layerCount.printProgressIncrement('skeinraster')
+			self.coloredLines = []
+			self.layerLines.append(self.coloredLines)
+		if firstWord == 'G1':
+			location = gcodec.getLocationFromSplitLine(self.oldLocation, splitLine)
+			self.addToPath(location)
+			self.oldLocation = location
+		elif firstWord == 'M101':
+			self.extruderActive = True
+			self.extrusionNumber += 1
+		elif firstWord == 'M103':
+			self.extruderActive = False
+		if firstWord == 'G2' or firstWord == 'G3':
+			relativeLocation = gcodec.getLocationFromSplitLine(self.oldLocation, splitLine)
+			relativeLocation.z = 0.0
+			location = self.oldLocation + relativeLocation
+			self.addToPath(location)
+			self.oldLocation = location
+
+
+def main():
+	'Display the skeinraster dialog.'
+	if len(sys.argv) > 1:
+		getWindowAnalyzeFile(' '.join(sys.argv[1 :]))
+	else:
+		settings.startMainLoopFromConstructor(getNewRepository())
+
+if __name__ == '__main__':
+	main()
@@ -74,6 +74,7 @@ def getCraftedTextFromText(fileName, svgText, repository=None):
 		repository = settings.getReadRepository(BottomRepository())
 	if not repository.activateBottom.value:
 		return svgText
+	skeinforge_craft.clearBoundaryLayers()
 	return BottomSkein().getCraftedGcode(fileName, repository, svgText)
 
 def getNewRepository():
@@ -70,6 +70,11 @@ When selected, the mesh will be accurately carved, and if a hole is found, carve
 ====Unproven Mesh====
 When selected, carve will use the gap spanning algorithm from the start.  The problem with the gap spanning algothm is that it will span gaps, even if there is not actually a gap in the model.
 
+===Repair Mesh===
+Default is off.
+
+When selected, the triangle mesh is repaired once before it is carved.  Vertexes which are closer than a hundredth of the import radius are welded together, the faces are oriented consistently and holes with up to 64 sides are filled.  The edges which are still open or which are shared by more than two faces are reported.  A repaired mesh of a scan will usually stay on the fast 'Correct Mesh' algorithm for every layer, instead of switching over to the algorithm that spans gaps.
+
 ===SVG Viewer===
 Default is webbrowser.
 
@@ -95,6 +100,7 @@ from __future__ import absolute_import
 import __init__
 
 from fabmetheus_utilities.fabmetheus_tools import fabmetheus_interpret
+from fabmetheus_utilities.geometry.geometry_utilities import matrix
 from fabmetheus_utilities import archive
 from fabmetheus_utilities import euclidean
 from fabmetheus_utilities import gcodec
@@ -104,6 +110,7 @@ from skeinforge_application.skeinforge_utilities import skeinforge_polyfile
 from skeinforge_application.skeinforge_utilities import skeinforge_profile
 from fabmetheus_utilities.vector3 import Vector3
 import math
+import os
 import sys
 import time
 
@@ -112,6 +119,46 @@ __date__ = '$Date: 2008/02/05 $'
 __license__ = 'GNU Affero General Public License http://www.gnu.org/licenses/agpl.html'
 
 
+globalAlternativeCenterCornersTable = {}
+
+
+def getAlternativeCenterCorners(repository):
+	'Get the corner maximum and minimum of the alternative center file, cached by its path, modification time and the object matrix.'
+	fileName = repository.alternativeCenter.value
+	if not os.path.isfile(fileName):
+		return getAlternativeCenterCornersByCarving(repository)
+	modificationTime = repr(os.path.getmtime(fileName))
+	cacheKey = (os.path.abspath(fileName), modificationTime, repository.matrix.value)
+	if cacheKey in globalAlternativeCenterCornersTable:
+		return globalAlternativeCenterCornersTable[cacheKey]
+	sidecarFileName = fileName + '.corners'
+	sidecarLines = []
+	if repository.alternativeCenterSidecar.value:
+		for line in archive.getTextLines(archive.getFileText(sidecarFileName, False)):
+			splitLine = line.split('\t')
+			if len(splitLine) == 4 and splitLine[0] == modificationTime:
+				if splitLine[1] == repository.matrix.value:
+					corners = (getVector3ByCommaString(splitLine[2]), getVector3ByCommaString(splitLine[3]))
+					globalAlternativeCenterCornersTable[cacheKey] = corners
+					return corners
+				sidecarLines.append(line)
+	corners = getAlternativeCenterCornersByCarving(repository)
+	globalAlternativeCenterCornersTable[cacheKey] = corners
+	if repository.alternativeCenterSidecar.value:
+		cornerMaximum, cornerMinimum = corners
+		cornerMaximumString = '%r,%r,%r' % (cornerMaximum.x, cornerMaximum.y, cornerMaximum.z)
+		cornerMinimumString = '%r,%r,%r' % (cornerMinimum.x, cornerMinimum.y, cornerMinimum.z)
+		sidecarLines.append('\t'.join([modificationTime, repository.matrix.value, cornerMaximumString, cornerMinimumString]))
+		archive.writeFileText(sidecarFileName, '\n'.join(sidecarLines) + '\n')
+	return corners
+
+def getAlternativeCenterCornersByCarving(repository):
+	'Get the corner maximum and minimum of the alternative center file by carving it.'
+	carving = svg_writer.getCarving(repository.alternativeCenter.value)
+	matrix.transformVector3sByMatrix(getObjectMatrixTetragrid(repository), carving.vertexes)
+	carving.getMinimumZ()
+	return carving.getCarveCornerMaximum(), carving.getCarveCornerMinimum()
+
 def getCraftedText( fileName, gcodeText = '', repository=None):
 	"Get carved text."
 	if fileName.endswith('.svg'):
@@ -130,6 +177,20 @@ def getNewRepository():
 	'Get new repository.'
 	return CarveRepository()
 
+def getObjectMatrixTetragrid(repository):
+	'Get the tetragrid of the ObjectMatrix setting, whose columns are the rows of the tetragrid.'
+	objectMatrix = map(float, repository.matrix.value.split(','))
+	return [
+		[objectMatrix[0], objectMatrix[3], objectMatrix[6], 0.0],
+		[objectMatrix[1], objectMatrix[4], objectMatrix[7], 0.0],
+		[objectMatrix[2], objectMatrix[5], objectMatrix[8], 0.0],
+		[0.0, 0.0, 0.0, 1.0]]
+
+def getVector3ByCommaString(commaString):
+	'Get the vector3 from the comma separated x, y and z.'
+	floats = map(float, commaString.split(','))
+	return Vector3(floats[0], floats[1], floats[2])
+
 def writeOutput(fileName, shouldAnalyze=True):
 	"Carve a GNU Triangulated Surface file."
 	startTime = time.time()
@@ -168,6 +229,7 @@ class CarveRepository(object):
 		importLatentStringVar = settings.LatentStringVar()
 		self.correctMesh = settings.Radio().getFromRadio( importLatentStringVar, 'Correct Mesh', self, True )
 		self.unprovenMesh = settings.Radio().getFromRadio( importLatentStringVar, 'Unproven Mesh', self, False )
+		self.repairMesh = settings.BooleanSetting().getFromValue('Repair Mesh', self, False)
 		self.svgViewer = settings.StringSetting().getFromValue('SVG Viewer:', self, 'webbrowser')
 		settings.LabelSeparator().getFromRepository(self)
 		self.executeTitle = 'Carve'
@@ -177,6 +239,7 @@ class CarveRepository(object):
 		self.objectSink = settings.FloatSpin().getFromValue(0.0, 'ObjectSink', self, 1000.0, 0.0)
 		self.matrix = settings.StringSetting().getFromValue('ObjectMatrix', self, '1,0,0,0,1,0,0,0,1')
 		self.alternativeCenter = settings.StringSetting().getFromValue('AlternativeCenterFile', self, '')
+		self.alternativeCenterSidecar = settings.BooleanSetting().getFromValue('AlternativeCenterSidecar', self, False)
 
 	def execute(self):
 		"Carve button has been clicked."
@@ -189,41 +252,23 @@ class CarveSkein(object):
 	"A class to carve a carving."
 	def getCarvedSVG(self, carving, fileName, repository):
 		"Parse gnu triangulated surface text and store the carved gcode."
-
-		matrix = map(float, repository.matrix.value.split(','))
-
-		for i in xrange(0, len(carving.vertexes)):
-			x = carving.vertexes[i].x
-			y = carving.vertexes[i].y
-			z = carving.vertexes[i].z
-			carving.vertexes[i] = Vector3(
-				x * matrix[0] + y * matrix[3] + z * matrix[6],
-				x * matrix[1] + y * matrix[4] + z * matrix[7],
-				x * matrix[2] + y * matrix[5] + z * matrix[8])
-
+		matrix.transformVector3sByMatrix(getObjectMatrixTetragrid(repository), carving.vertexes)
 		if repository.alternativeCenter.value != '':
-			carving2 = svg_writer.getCarving(repository.alternativeCenter.value)
-			for i in xrange(0, len(carving2.vertexes)):
-				x = carving2.vertexes[i].x
-				y = carving2.vertexes[i].y
-				z = carving2.vertexes[i].z
-				carving2.vertexes[i] = Vector3(
-					x * matrix[0] + y * matrix[3] + z * matrix[6],
-					x * matrix[1] + y * matrix[4] + z * matrix[7],
-					x * matrix[2] + y * matrix[5] + z * matrix[8])
-			minZ = carving2.getMinimumZ()
-			minSize = carving2.getCarveCornerMinimum()
-			maxSize = carving2.getCarveCornerMaximum()
+			maxSize, minSize = getAlternativeCenterCorners(repository)
+			minZ = minSize.z
 		else:
 			minZ = carving.getMinimumZ()
 			minSize = carving.getCarveCornerMinimum()
 			maxSize = carving.getCarveCornerMaximum()
-		for v in carving.vertexes:
-			v.z -= minZ + repository.objectSink.value
-			v.x -= minSize.x + (maxSize.x - minSize.x) / 2
-			v.y -= minSize.y + (maxSize.y - minSize.y) / 2
-			v.x += repository.centerX.value
-			v.y += repository.centerY.value
+		centerX = repository.centerX.value
+		centerY = repository.centerY.value
+		offsetX = minSize.x + (maxSize.x - minSize.x) / 2
+		offsetY = minSize.y + (maxSize.y - minSize.y) / 2
+		offsetZ = minZ + repository.objectSink.value
+		for vertex in carving.vertexes:
+			vertex.x = vertex.x - offsetX + centerX
+			vertex.y = vertex.y - offsetY + centerY
+			vertex.z -= offsetZ
 
 		layerHeight = repository.layerHeight.value
 		edgeWidth = repository.edgeWidth.value
@@ -231,6 +276,7 @@ class CarveSkein(object):
 		importRadius = 0.5 * repository.importCoarseness.value * abs(edgeWidth)
 		carving.setCarveImportRadius(max(importRadius, 0.001 * layerHeight))
 		carving.setCarveIsCorrectMesh(repository.correctMesh.value)
+		carving.setCarveIsRepairMesh(repository.repairMesh.value)
 		loopLayers = carving.getCarveBoundaryLayers()
 		if len(loopLayers) < 1:
 			print('Warning, there are no slices for the model, this could be because the model is too small for the Layer Height.')
@@ -177,33 +177,19 @@ class CoilSkein(object):
 		self.repository = repository
 		self.lines = archive.getTextLines(gcodeText)
 		self.parseInitialization()
-		self.parseBoundaries()
+		self.parseBoundaries(gcodeText)
 		self.parseUntilLayer()
 		self.addCoilLayers()
 		self.distanceFeedRate.addLines( self.shutdownLines )
 		return self.distanceFeedRate.output.getvalue()
 
-	def parseBoundaries(self):
-		"Parse the boundaries and add them to the boundary layers."
-		boundaryLoop = None
-		boundaryLayer = None
+	def parseBoundaries(self, gcodeText):
+		"Get the shared boundary layers and the shutdown lines."
+		self.boundaryLayers = skeinforge_craft.getBoundaryLayers(gcodeText, self.lines)
 		for line in self.lines[self.lineIndex :]:
-			splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
-			firstWord = gcodec.getFirstWord(splitLine)
 			if len( self.shutdownLines ) > 0:
 				self.shutdownLines.append(line)
-			if firstWord == '(</boundaryPerimeter>)':
-				boundaryLoop = None
-			elif firstWord == '(<boundaryPoint>':
-				location = gcodec.getLocationFromSplitLine(None, splitLine)
-				if boundaryLoop == None:
-					boundaryLoop = []
-					boundaryLayer.loops.append(boundaryLoop)
-				boundaryLoop.append(location.dropAxis())
-			elif firstWord == '(<layer>':
-				boundaryLayer = euclidean.LoopLayer(float(splitLine[1]))
-				self.boundaryLayers.append(boundaryLayer)
-			elif firstWord == '(</crafting>)':
+			elif gcodec.getFirstWord(gcodec.getSplitLineBeforeBracketSemicolon(line)) == '(</crafting>)':
 				self.shutdownLines = [ line ]
 		for boundaryLayer in self.boundaryLayers:
 			if not euclidean.isWiddershins( boundaryLayer.loops[0] ):
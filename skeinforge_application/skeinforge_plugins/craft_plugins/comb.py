@@ -10,6 +10,17 @@ http://fabmetheus.crsndoo.com/wiki/index.php/Skeinforge_Comb
 The default 'Activate Comb' checkbox is off.  When it is on, the functions described below will work, when it is off, nothing will be done.
 
 ==Settings==
+===Comb Type===
+Default is 'Around Boundaries'.
+
+====Around Boundaries====
+When selected, comb will go around the boundary which the travel line crosses, on the side of the boundary toward the fill.
+
+====Visibility Graph====
+When selected, comb will build a graph of the corners of the boundaries inset by the edge width for each layer, and will follow the shortest path along that graph between the start and end of each travel line on an island.  The legs between the corners stay at least an edge width inside the boundaries.  If there is no path inside the island, comb will go around the boundaries.
+
+Visibility Graph is a choice for the travel paths, not for speed.  The travel paths are usually shorter and keep away from the boundaries, but searching the graph takes time, so combing is about twice as slow as with Around Boundaries.
+
 ===Running Jump Space===
 Default: 2 mm
 
@@ -48,6 +59,8 @@ from fabmetheus_utilities import settings
 from skeinforge_application.skeinforge_utilities import skeinforge_craft
 from skeinforge_application.skeinforge_utilities import skeinforge_polyfile
 from skeinforge_application.skeinforge_utilities import skeinforge_profile
+import hashlib
+import heapq
 import sys
 
 
@@ -56,6 +69,11 @@ __date__ = '$Date: 2008/21/04 $'
 __license__ = 'GNU Affero General Public License http://www.gnu.org/licenses/agpl.html'
 
 
+globalCornerInsetOverEdgeWidth = 0.1
+globalMaximumMiterOverInset = 4.0
+globalMaximumNumberOfRoutes = 10000
+
+
 def getCraftedText(fileName, text, repository=None):
 	"Comb a gcode linear move text."
 	return getCraftedTextFromText(archive.getTextIfEmpty(fileName, text), repository)
@@ -107,10 +125,42 @@ def getJumpPointIfInside(boundary, otherPoint, edgeWidth, runningJumpSpace):
 		return jumpPoint
 	return None
 
+def getMiterInsetLoops(loops, inset):
+	'Get the loops with each edge moved by the inset toward the fill on its left, each corner is mitered and the miters are limited to the maximum miter over inset.'
+	miterInsetLoops = []
+	for loop in loops:
+		miterInsetLoop = []
+		miterInsetLoops.append(miterInsetLoop)
+		for pointIndex, center in enumerate(loop):
+			beginLeft = complex(0.0, 1.0) * euclidean.getNormalized(center - loop[pointIndex - 1])
+			endLeft = complex(0.0, 1.0) * euclidean.getNormalized(loop[(pointIndex + 1) % len(loop)] - center)
+			leftSum = beginLeft + endLeft
+			leftSumLength = abs(leftSum)
+			if leftSumLength <= 0.0:
+				miterInsetLoop.append(center + inset * beginLeft)
+				continue
+			miterLength = min(inset * leftSumLength / (1.0 + beginLeft.real * endLeft.real + beginLeft.imag * endLeft.imag), globalMaximumMiterOverInset * inset)
+			miterInsetLoop.append(center + miterLength / leftSumLength * leftSum)
+	return miterInsetLoops
+
 def getNewRepository():
 	'Get new repository.'
 	return CombRepository()
 
+def getReflexCorners(boundaries, inset):
+	'Get the points inset from the corners which turn toward the fill, where the shortest paths around the boundaries turn, with the directions from them to the neighbors of the corners.'
+	reflexCorners = []
+	for boundary in boundaries:
+		for pointIndex, center in enumerate(boundary):
+			beginSegment = euclidean.getNormalized(center - boundary[pointIndex - 1])
+			endSegment = euclidean.getNormalized(boundary[(pointIndex + 1) % len(boundary)] - center)
+			if beginSegment.real * endSegment.imag - beginSegment.imag * endSegment.real < 0.0:
+				leftNormal = euclidean.getNormalized(complex(0.0, 1.0) * (beginSegment + endSegment))
+				if abs(leftNormal) > 0.0:
+					insetPoint = center + inset * leftNormal
+					reflexCorners.append((insetPoint, boundary[pointIndex - 1] - insetPoint, boundary[(pointIndex + 1) % len(boundary)] - insetPoint))
+	return reflexCorners
+
 def getPathsByIntersectedLoop(begin, end, loop):
 	'Get both paths along the loop from the point closest to the begin to the point closest to the end.'
 	closestBeginDistanceIndex = euclidean.getClosestDistanceIndexToLine(begin, loop)
@@ -160,6 +210,11 @@ class CombRepository(object):
 		self.fileNameInput = settings.FileNameInput().getFromFileName( fabmetheus_interpret.getGNUTranslatorGcodeFileTypeTuples(), 'Open File for Comb', self, '')
 		self.openWikiManualHelpPage = settings.HelpPage().getOpenFromAbsolute('http://fabmetheus.crsndoo.com/wiki/index.php/Skeinforge_Comb')
 		self.activateComb = settings.BooleanSetting().getFromValue('Activate Comb', self, True )
+		settings.LabelSeparator().getFromRepository(self)
+		self.combType = settings.MenuButtonDisplay().getFromName('Comb Type:', self)
+		self.aroundBoundaries = settings.MenuRadio().getFromMenuButtonDisplay(self.combType, 'Around Boundaries', self, True)
+		self.visibilityGraph = settings.MenuRadio().getFromMenuButtonDisplay(self.combType, 'Visibility Graph', self, False)
+		settings.LabelSeparator().getFromRepository(self)
 		self.runningJumpSpace = settings.FloatSpin().getFromValue(0.0, 'Running Jump Space (mm):', self, 5.0, 2.0)
 		self.executeTitle = 'Comb'
 
@@ -174,6 +229,8 @@ class CombSkein(object):
 	"A class to comb a skein of extrusions."
 	def __init__(self):
 		'Initialize'
+		self.boundariesIndexTable = {}
+		self.boundariesKeyTable = {}
 		self.boundaryLoop = None
 		self.distanceFeedRate = gcodec.DistanceFeedRate()
 		self.extruderActive = False
@@ -187,8 +244,13 @@ class CombSkein(object):
 		self.oldLocation = None
 		self.oldZ = None
 		self.operatingFeedRatePerMinute = None
+		self.preparedBoundariesTable = {}
+		self.routeTable = {}
+		self.segmentGridTable = {}
 		self.travelFeedRateMinute = None
+		self.visibilityGraphTable = {}
 		self.widdershinTable = {}
+		self.widdershinsSegmentGridTable = {}
 
 	def addGcodePathZ( self, feedRateMinute, path, z ):
 		"Add a gcode path, without modifying the extruder, to the output."
@@ -201,7 +263,7 @@ class CombSkein(object):
 		if not self.extruderActive and self.oldLocation != None:
 			if len(self.getBoundaries()) > 0:
 				highestZ = max(location.z, self.oldLocation.z)
-				self.addGcodePathZ(self.travelFeedRateMinute, self.getAroundBetweenPath(self.oldLocation.dropAxis(), location.dropAxis()), highestZ)
+				self.addGcodePathZ(self.travelFeedRateMinute, self.getRememberedAroundBetweenPath(self.oldLocation.dropAxis(), location.dropAxis()), highestZ)
 		self.oldLocation = location
 
 	def addToLoop(self, location):
@@ -224,8 +286,7 @@ class CombSkein(object):
 		boundaryIndexesIndex = 0
 		while boundaryIndexesIndex < len(boundaryIndexes) - 1:
 			if boundaryIndexes[boundaryIndexesIndex + 1] == boundaryIndexes[boundaryIndexesIndex]:
-				loopFirst = boundaries[boundaryIndexes[boundaryIndexesIndex]]
-				pathBetween = self.getPathBetween(loopFirst, points[boundaryIndexesIndex : boundaryIndexesIndex + 4])
+				pathBetween = self.getPathBetween(boundaryIndexes[boundaryIndexesIndex], points[boundaryIndexesIndex : boundaryIndexesIndex + 4])
 				begin = points[boundaryIndexesIndex]
 				end = points[boundaryIndexesIndex + 3]
 				pathBetween = self.getInsidePointsAlong(begin, pathBetween[0], points) + pathBetween
@@ -245,10 +306,11 @@ class CombSkein(object):
 			segment = boundarySegment.segment
 			if boundarySegmentIndex < len(boundarySegments) - 1 and self.runningJumpSpace > 0.0:
 				segment = boundarySegment.getSegment(boundarySegmentIndex, boundarySegments, self.edgeWidth, self.runningJumpSpace)
-			aroundBetweenPath += self.getAroundBetweenLineSegment(segment[0], boundaries, segment[1])
+			aroundBetweenPath += self.getPathAlongLineSegment(segment[0], boundaries, segment[1])
 			if boundarySegmentIndex < len(boundarySegments) - 1:
 				aroundBetweenPath.append(segment[1])
 				aroundBetweenPath.append(boundarySegments[boundarySegmentIndex + 1].segment[0])
+		segmentGrid = self.getSegmentGrid()
 		for pointIndex in xrange(len(aroundBetweenPath) - 1, -1, -1):
 			pointBefore = begin
 			beforeIndex = pointIndex - 1
@@ -258,7 +320,7 @@ class CombSkein(object):
 			afterIndex = pointIndex + 1
 			if afterIndex < len(aroundBetweenPath):
 				pointAfter = aroundBetweenPath[afterIndex]
-			if not euclidean.isLineIntersectingLoops(boundaries, pointBefore, pointAfter):
+			if not segmentGrid.isLineIntersecting(pointBefore, pointAfter):
 				del aroundBetweenPath[pointIndex]
 		return aroundBetweenPath
 
@@ -268,6 +330,16 @@ class CombSkein(object):
 			return self.layerTable[self.layerZ]
 		return []
 
+	def getBoundariesKey(self):
+		'Get the key of the boundaries for the layer, which is the same for layers with identical boundaries.'
+		if self.layerZ in self.boundariesKeyTable:
+			return self.boundariesKeyTable[self.layerZ]
+		boundariesDigest = hashlib.sha1(repr(self.getBoundaries())).digest()
+		if boundariesDigest not in self.boundariesIndexTable:
+			self.boundariesIndexTable[boundariesDigest] = len(self.boundariesIndexTable)
+		self.boundariesKeyTable[self.layerZ] = self.boundariesIndexTable[boundariesDigest]
+		return self.boundariesKeyTable[self.layerZ]
+
 	def getBoundaryIndexes(self, begin, boundaries, end, points):
 		'Get boundary indexes and set the points in the way of the original line segment.'
 		boundaryIndexes = []
@@ -278,10 +350,7 @@ class CombSkein(object):
 		beginRotated = segmentYMirror * begin
 		endRotated = segmentYMirror * end
 		y = beginRotated.imag
-		for boundaryIndex in xrange(len(boundaries)):
-			boundary = boundaries[boundaryIndex]
-			boundaryRotated = euclidean.getRotatedComplexes(segmentYMirror, boundary)
-			euclidean.addXIntersectionIndexesFromLoopY(boundaryRotated, boundaryIndex, switchX, y)
+		self.getSegmentGrid().addXIntersectionIndexesNearLine(begin, end, segmentYMirror, switchX, y)
 		switchX.sort()
 		maximumX = max(beginRotated.real, endRotated.real)
 		minimumX = min(beginRotated.real, endRotated.real)
@@ -338,19 +407,29 @@ class CombSkein(object):
 		segmentHalfPerimeter = self.halfEdgeWidth / segmentLength * segment
 		justAfterBegin = begin + segmentHalfPerimeter
 		justBeforeEnd = end - segmentHalfPerimeter
-		widdershins = self.getWiddershins()
-		if not euclidean.isLineIntersectingLoops(widdershins, justAfterBegin, justBeforeEnd):
+		widdershinsSegmentGrid = self.getWiddershinsSegmentGrid()
+		if not widdershinsSegmentGrid.isLineIntersecting(justAfterBegin, justBeforeEnd):
 			return []
 		numberOfSteps = 10
 		stepLength = (segmentLength - self.doubleEdgeWidth) / float(numberOfSteps)
 		for step in xrange(1, numberOfSteps + 1):
 			along = begin + stepLength * step
-			if not euclidean.isLineIntersectingLoops(widdershins, along, justBeforeEnd):
+			if not widdershinsSegmentGrid.isLineIntersecting(along, justBeforeEnd):
 				return [along]
 		return []
 
-	def getPathBetween(self, loop, points):
+	def getPathAlongLineSegment(self, begin, boundaries, end):
+		'Get the path in the way of the line segment, along the visibility graph if it is selected and has a path.'
+		if self.repository.visibilityGraph.value:
+			shortestPath = self.getVisibilityGraph().getShortestPath(begin, end)
+			if shortestPath != None:
+				return shortestPath
+		return self.getAroundBetweenLineSegment(begin, boundaries, end)
+
+	def getPathBetween(self, loopIndex, points):
 		"Add a path between the edge and the fill."
+		loop = self.getBoundaries()[loopIndex]
+		preparedBoundaries = self.getPreparedBoundaries()
 		paths = getPathsByIntersectedLoop(points[1], points[2], loop)
 		shortestPath = paths[int(euclidean.getPathLength(paths[1]) < euclidean.getPathLength(paths[0]))]
 		if len(shortestPath) < 2:
@@ -382,17 +461,46 @@ class CombSkein(object):
 				between = center
 			if between == None:
 				centerSideWiddershins = center + centerPerpendicular
-				if euclidean.isPointInsideLoop(loop, centerSideWiddershins) == loopWiddershins:
+				if preparedBoundaries.getIsPointInsideLoop(loopIndex, centerSideWiddershins) == loopWiddershins:
 					between = centerSideWiddershins
 			if between == None:
 				centerSideClockwise = center - centerPerpendicular
-				if euclidean.isPointInsideLoop(loop, centerSideClockwise) == loopWiddershins:
+				if preparedBoundaries.getIsPointInsideLoop(loopIndex, centerSideClockwise) == loopWiddershins:
 					between = centerSideClockwise
 			if between == None:
 				between = center
 			pathBetween.append(between)
 		return pathBetween
 
+	def getPreparedBoundaries(self):
+		'Get the prepared boundaries for the layer.'
+		if self.layerZ not in self.preparedBoundariesTable:
+			self.preparedBoundariesTable[self.layerZ] = euclidean.PreparedLoops(self.getBoundaries())
+		return self.preparedBoundariesTable[self.layerZ]
+
+	def getRememberedAroundBetweenPath(self, begin, end):
+		'Get the path around the loops, remembering the paths between the same points and boundaries.'
+		routeKey = (self.getBoundariesKey(), begin, end)
+		if routeKey in self.routeTable:
+			return self.routeTable[routeKey]
+		if len(self.routeTable) >= globalMaximumNumberOfRoutes:
+			self.routeTable = {}
+		aroundBetweenPath = self.getAroundBetweenPath(begin, end)
+		self.routeTable[routeKey] = aroundBetweenPath
+		return aroundBetweenPath
+
+	def getSegmentGrid(self):
+		'Get the segment grid of the boundaries for the layer.'
+		if self.layerZ not in self.segmentGridTable:
+			self.segmentGridTable[self.layerZ] = euclidean.SegmentGrid(self.getBoundaries())
+		return self.segmentGridTable[self.layerZ]
+
+	def getVisibilityGraph(self):
+		'Get the visibility graph of the boundaries for the layer.'
+		if self.layerZ not in self.visibilityGraphTable:
+			self.visibilityGraphTable[self.layerZ] = VisibilityGraph(self.getBoundaries(), self.edgeWidth, self.getPreparedBoundaries(), self.getSegmentGrid())
+		return self.visibilityGraphTable[self.layerZ]
+
 	def getWiddershins(self):
 		'Get widdershins for the layer.'
 		if self.layerZ in self.widdershinTable:
@@ -403,6 +511,12 @@ class CombSkein(object):
 				self.widdershinTable[self.layerZ].append(boundary)
 		return self.widdershinTable[self.layerZ]
 
+	def getWiddershinsSegmentGrid(self):
+		'Get the segment grid of the widdershins boundaries for the layer.'
+		if self.layerZ not in self.widdershinsSegmentGridTable:
+			self.widdershinsSegmentGridTable[self.layerZ] = euclidean.SegmentGrid(self.getWiddershins())
+		return self.widdershinsSegmentGridTable[self.layerZ]
+
 	def parseBoundariesLayers(self, line):
 		"Parse a gcode line."
 		splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
@@ -448,7 +562,7 @@ class CombSkein(object):
 			return
 		if firstWord == 'G1':
 			self.addIfTravel(splitLine)
-			self.layerZ = self.nextLayerZ
+			self.setLayerZ(self.nextLayerZ)
 		elif firstWord == 'M101':
 			self.extruderActive = True
 		elif firstWord == 'M103':
@@ -457,9 +571,21 @@ class CombSkein(object):
 			self.layerCount.printProgressIncrement('comb')
 			self.nextLayerZ = float(splitLine[1])
 			if self.layerZ == None:
-				self.layerZ = self.nextLayerZ
+				self.setLayerZ(self.nextLayerZ)
 		self.distanceFeedRate.addLineCheckAlteration(line)
 
+	def setLayerZ(self, layerZ):
+		'Set the layer z, and drop the tables of the previous layer when the layer changes.'
+		if layerZ == self.layerZ:
+			return
+		self.boundariesKeyTable = {}
+		self.layerZ = layerZ
+		self.preparedBoundariesTable = {}
+		self.segmentGridTable = {}
+		self.visibilityGraphTable = {}
+		self.widdershinTable = {}
+		self.widdershinsSegmentGridTable = {}
+
 
 class DistancePoint(object):
 	'A class to get the distance of the point along a segment inside a loop.'
@@ -479,6 +605,121 @@ class DistancePoint(object):
 				return
 
 
+class VisibilityGraph(object):
+	'A class to find the shortest path between points on an island, along the reflex corners which can see each other.'
+	def __init__(self, boundaries, edgeWidth, preparedBoundaries, segmentGrid):
+		'Initialize, the corners are only found when a travel line is in the way of the boundaries.'
+		self.boundaries = boundaries
+		self.edgeWidth = edgeWidth
+		self.insetSegmentGrid = None
+		self.insideLegTable = {}
+		self.islandIndexes = []
+		self.islandPointIndexesTable = {}
+		self.neighborDirections = []
+		self.points = None
+		self.preparedBoundaries = preparedBoundaries
+		self.segmentGrid = segmentGrid
+		self.tangentsTable = {}
+
+	def __repr__(self):
+		'Get the string representation of this VisibilityGraph.'
+		return 'VisibilityGraph %s points' % len(self.islandIndexes)
+
+	def getShortestPath(self, begin, end):
+		'Get the points between the begin and end of the A* shortest path, or None if there is no path.  A leg is only checked against the boundaries when it is taken off the heap, so most legs are never checked.'
+		if not self.segmentGrid.isLineIntersecting(begin, end):
+			return []
+		if self.points == None:
+			self.setCorners()
+		islandIndex = self.preparedBoundaries.getSmallestEnclosureIndex(begin)
+		if islandIndex not in self.islandPointIndexesTable:
+			return None
+		beginIndex = len(self.points)
+		endIndex = beginIndex + 1
+		closedIndexSet = set()
+		heap = []
+		previousIndexes = {}
+		for otherIndex in self.islandPointIndexesTable[islandIndex]:
+			otherPoint = self.points[otherIndex]
+			distance = abs(otherPoint - begin)
+			heap.append((distance + abs(end - otherPoint), distance, otherIndex, beginIndex))
+		heapq.heapify(heap)
+		while len(heap) > 0:
+			distance, pointIndex, previousIndex = heapq.heappop(heap)[1 :]
+			if pointIndex in closedIndexSet:
+				continue
+			if not self.isLegInside(begin, end, pointIndex, previousIndex):
+				continue
+			closedIndexSet.add(pointIndex)
+			previousIndexes[pointIndex] = previousIndex
+			if pointIndex == endIndex:
+				shortestPath = []
+				pointIndex = previousIndexes[endIndex]
+				while pointIndex != beginIndex:
+					shortestPath.append(self.points[pointIndex])
+					pointIndex = previousIndexes[pointIndex]
+				shortestPath.reverse()
+				return shortestPath
+			point = self.points[pointIndex]
+			for otherIndex, otherDistance in self.getTangents(pointIndex):
+				if otherIndex not in closedIndexSet:
+					otherDistance += distance
+					heapq.heappush(heap, (otherDistance + abs(end - self.points[otherIndex]), otherDistance, otherIndex, pointIndex))
+			endDistance = distance + abs(end - point)
+			heapq.heappush(heap, (endDistance, endDistance, endIndex, pointIndex))
+		return None
+
+	def getTangents(self, pointIndex):
+		'Get the indexes and distances of the other corners on the island, along lines which are tangent at both corners, otherwise no shortest path goes along them.'
+		if pointIndex in self.tangentsTable:
+			return self.tangentsTable[pointIndex]
+		point = self.points[pointIndex]
+		tangents = []
+		for otherIndex in self.islandPointIndexesTable[self.islandIndexes[pointIndex]]:
+			otherPoint = self.points[otherIndex]
+			if otherPoint != point and self.isTangent(otherIndex, point) and self.isTangent(pointIndex, otherPoint):
+				tangents.append((otherIndex, abs(otherPoint - point)))
+		self.tangentsTable[pointIndex] = tangents
+		return tangents
+
+	def isLegInside(self, begin, end, pointIndex, previousIndex):
+		'Determine if the leg from the previous point to the point stays inside the boundaries, and for a leg between corners an edge width inside.'
+		if previousIndex == len(self.points):
+			return not self.segmentGrid.isLineIntersecting(begin, self.points[pointIndex])
+		if pointIndex == len(self.points) + 1:
+			return not self.segmentGrid.isLineIntersecting(self.points[previousIndex], end)
+		legKey = (min(pointIndex, previousIndex), max(pointIndex, previousIndex))
+		if legKey not in self.insideLegTable:
+			self.insideLegTable[legKey] = not self.insetSegmentGrid.isLineIntersecting(self.points[pointIndex], self.points[previousIndex])
+		return self.insideLegTable[legKey]
+
+	def isTangent(self, pointIndex, otherPoint):
+		'Determine if the line from the other point to the corner of the index leaves both neighbors of the corner on the same side, otherwise no shortest path turns there.'
+		direction = otherPoint - self.points[pointIndex]
+		beginDirection, endDirection = self.neighborDirections[pointIndex]
+		beginCross = direction.real * beginDirection.imag - direction.imag * beginDirection.real
+		endCross = direction.real * endDirection.imag - direction.imag * endDirection.real
+		return beginCross * endCross >= 0.0
+
+	def setCorners(self):
+		'Set the reflex corners of the boundaries inset by the edge width, bucketed by the island around them, and the grid of the boundaries and the inset boundaries.'
+		insetBoundaries = getMiterInsetLoops(self.boundaries, self.edgeWidth)
+		self.insetSegmentGrid = euclidean.SegmentGrid(self.boundaries + insetBoundaries)
+		self.points = []
+		for boundaryIndex, insetBoundary in enumerate(insetBoundaries):
+			reflexCorners = getReflexCorners([insetBoundary], globalCornerInsetOverEdgeWidth * self.edgeWidth)
+			if len(reflexCorners) < 1:
+				continue
+			islandIndex = boundaryIndex
+			if not euclidean.isWiddershins(self.boundaries[boundaryIndex]):
+				islandIndex = self.preparedBoundaries.getSmallestEnclosureIndex(reflexCorners[0][0])
+			for point, beginDirection, endDirection in reflexCorners:
+				euclidean.addElementToListDictionary(len(self.points), islandIndex, self.islandPointIndexesTable)
+				self.islandIndexes.append(islandIndex)
+				self.neighborDirections.append((beginDirection, endDirection))
+				self.points.append(point)
+
+
 def main():
 	"Display the comb dialog."
 	if len(sys.argv) > 1:
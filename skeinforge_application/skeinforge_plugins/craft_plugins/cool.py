@@ -191,8 +191,10 @@ class CoolSkein(object):
 	'A class to cool a skein of extrusions.'
 	def __init__(self):
 		self.boundaryLayer = None
+		self.boundaryLayers = []
 		self.coolTemperature = None
 		self.distanceFeedRate = gcodec.DistanceFeedRate()
+		self.distanceFeedRate.output = gcodec.OutputWithoutDuplication('M108')
 		self.feedRateMinute = 960.0
 		self.minFeedrateMinute = 300
 		self.highestZ = 1.0
@@ -285,6 +287,8 @@ class CoolSkein(object):
 		self.minimumArea = 4.0 * repository.minimumOrbitalRadius.value * repository.minimumOrbitalRadius.value
 		self.minFeedrateMinute = repository.minimumFeedRate.value * 60
 		self.parseInitialization()
+		if repository.orbit.value:
+			self.boundaryLayers = skeinforge_craft.getBoundaryLayers(gcodeText, self.lines)
 		self.boundingRectangle = gcodec.BoundingRectangle().getFromGcodeLines(self.lines[self.lineIndex :], 0.5 * self.edgeWidth)
 		margin = 0.2 * self.edgeWidth
 		halfCornerMargin = self.halfCorner + complex(margin, margin)
@@ -295,7 +299,7 @@ class CoolSkein(object):
 			self.parseLine(line)
 		if repository.turnFanOffAtEnding.value:
 			self.distanceFeedRate.addLine('M107')
-		return gcodec.getGcodeWithoutDuplication('M108', self.distanceFeedRate.output.getvalue())
+		return self.distanceFeedRate.output.getvalue()
 
 	def getLayerTime(self):
 		'Get the time the extruder spends on the layer.'
@@ -417,8 +421,6 @@ class CoolSkein(object):
 			self.oldFlowRate = float(splitLine[1][1 :])
 			self.addFlowRate(self.multiplier * self.oldFlowRate)
 			return
-		elif firstWord == '(<boundaryPoint>':
-			self.boundaryLoop.append(gcodec.getLocationFromSplitLine(None, splitLine).dropAxis())
 		elif firstWord == '(<layer>':
 			self.layerCount.printProgressIncrement('cool')
 			"print 'Layer %d' % (self.layerCount.layerIndex)"
@@ -439,7 +441,8 @@ class CoolSkein(object):
 				if self.oldFlowRate != None:
 					self.addFlowRate(self.multiplier * self.oldFlowRate)
 			z = float(splitLine[1])
-			self.boundaryLayer = euclidean.LoopLayer(z)
+			if self.layerCount.layerIndex < len(self.boundaryLayers):
+				self.boundaryLayer = self.boundaryLayers[self.layerCount.layerIndex]
 			self.highestZ = max(z, self.highestZ)
 			self.distanceFeedRate.addLinesSetAbsoluteDistanceMode(self.coolEndLines)
 			return
@@ -451,9 +454,6 @@ class CoolSkein(object):
 				self.coolTemperature = None
 			if self.oldFlowRate != None:
 				self.addFlowRate(self.oldFlowRate)
-		elif firstWord == '(<nestedRing>)':
-			self.boundaryLoop = []
-			self.boundaryLayer.loops.append(self.boundaryLoop)
 		self.distanceFeedRate.addLine(line)
 
 	def setMultiplier(self, remainingOrbitTime):
@@ -222,7 +222,7 @@ class DimensionSkein(object):
 		self.lines = archive.getTextLines(gcodeText)
 		self.parseInitialization()
 		if not self.repository.retractWithinIsland.value:
-			self.parseBoundaries()
+			self.parseBoundaries(gcodeText)
 		self.flowScaleSixty = 60.0 * self.layerHeight * self.edgeWidth / filamentPackingArea
 		if self.operatingFlowRate == None:
 			print('Warning, there is no operatingFlowRate so dimension will do nothing.')
@@ -233,6 +233,7 @@ class DimensionSkein(object):
 		self.extruderRetractionSpeedMinuteString = self.distanceFeedRate.getRounded(60.0 * self.repository.extruderRetractionSpeed.value)
 		if self.maximumZFeedRatePerSecond != None and self.travelFeedRatePerSecond != None:
 			self.zDistanceRatio = self.travelFeedRatePerSecond / self.maximumZFeedRatePerSecond
+		self.parseNextThreads()
 		for lineIndex in xrange(self.lineIndex, len(self.lines)):
 			self.parseLine( lineIndex )
 		return self.distanceFeedRate.output.getvalue()
@@ -276,28 +277,22 @@ class DimensionSkein(object):
 		'Get the travel distance to the next thread.'
 		if self.oldLocation == None:
 			return None
-		isActive = False
+		nextThreadIndex = self.nextThreadIndexes[lineIndex + 1]
+		if nextThreadIndex == None:
+			return None
 		location = self.oldLocation
-		for afterIndex in xrange(lineIndex + 1, len(self.lines)):
-			line = self.lines[afterIndex]
-			splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
-			firstWord = gcodec.getFirstWord(splitLine)
-			if firstWord == 'G1':
-				if isActive:
-					if not self.repository.retractWithinIsland.value:
-						locationEnclosureIndex = self.getSmallestEnclosureIndex(location.dropAxis())
-						if locationEnclosureIndex != self.getSmallestEnclosureIndex(self.oldLocation.dropAxis()):
-							return None
-					locationMinusOld = location - self.oldLocation
-					xyTravel = abs(locationMinusOld.dropAxis())
-					zTravelMultiplied = locationMinusOld.z * self.zDistanceRatio
-					return math.sqrt(xyTravel * xyTravel + zTravelMultiplied * zTravelMultiplied)
+		for afterIndex in xrange(lineIndex + 1, nextThreadIndex):
+			splitLine = self.movementSplitLines[afterIndex]
+			if splitLine != None:
 				location = gcodec.getLocationFromSplitLine(location, splitLine)
-			elif firstWord == 'M101':
-				isActive = True
-			elif firstWord == 'M103':
-				isActive = False
-		return None
+		if not self.repository.retractWithinIsland.value:
+			locationEnclosureIndex = self.getSmallestEnclosureIndex(location.dropAxis())
+			if locationEnclosureIndex != self.getSmallestEnclosureIndex(self.oldLocation.dropAxis()):
+				return None
+		locationMinusOld = location - self.oldLocation
+		xyTravel = abs(locationMinusOld.dropAxis())
+		zTravelMultiplied = locationMinusOld.z * self.zDistanceRatio
+		return math.sqrt(xyTravel * xyTravel + zTravelMultiplied * zTravelMultiplied)
 
 	def getExtrusionDistanceString( self, distance, splitLine ):
 		'Get the extrusion distance string.'
@@ -337,30 +332,11 @@ class DimensionSkein(object):
 
 	def getSmallestEnclosureIndex(self, point):
 		'Get the index of the smallest boundary loop which encloses the point.'
-		boundaryLayer = self.boundaryLayers[self.layerIndex]
-		for loopIndex, loop in enumerate(boundaryLayer.loops):
-			if euclidean.isPointInsideLoop(loop, point):
-				return loopIndex
-		return None
-
-	def parseBoundaries(self):
-		'Parse the boundaries and add them to the boundary layers.'
-		boundaryLoop = None
-		boundaryLayer = None
-		for line in self.lines[self.lineIndex :]:
-			splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
-			firstWord = gcodec.getFirstWord(splitLine)
-			if firstWord == '(</boundaryPerimeter>)':
-				boundaryLoop = None
-			elif firstWord == '(<boundaryPoint>':
-				location = gcodec.getLocationFromSplitLine(None, splitLine)
-				if boundaryLoop == None:
-					boundaryLoop = []
-					boundaryLayer.loops.append(boundaryLoop)
-				boundaryLoop.append(location.dropAxis())
-			elif firstWord == '(<layer>':
-				boundaryLayer = euclidean.LoopLayer(float(splitLine[1]))
-				self.boundaryLayers.append(boundaryLayer)
+		return self.boundaryLayers[self.layerIndex].getPreparedLoops().getSmallestEnclosureIndex(point)
+
+	def parseBoundaries(self, gcodeText):
+		'Get the shared boundary layers and sort their loops.'
+		self.boundaryLayers = skeinforge_craft.getBoundaryLayers(gcodeText, self.lines)
 		for boundaryLayer in self.boundaryLayers:
 			triangle_mesh.sortLoopsInOrderOfArea(False, boundaryLayer.loops)
 
@@ -391,10 +367,30 @@ class DimensionSkein(object):
 				self.travelFeedRatePerSecond = float(splitLine[1])
 			self.distanceFeedRate.addLine(line)
 
+	def parseNextThreads(self):
+		'Split the lines backward once, and find for each line the index of the first move of the next thread after it.'
+		activeIndex = None
+		inactiveIndex = None
+		self.movementSplitLines = [None] * len(self.lines)
+		self.nextThreadIndexes = [None] * (len(self.lines) + 1)
+		self.splitLines = [None] * len(self.lines)
+		for lineIndex in xrange(len(self.lines) - 1, self.lineIndex - 1, -1):
+			splitLine = gcodec.getSplitLineBeforeBracketSemicolon(self.lines[lineIndex].lstrip())
+			self.splitLines[lineIndex] = splitLine
+			firstWord = gcodec.getFirstWord(splitLine)
+			if firstWord == 'G1':
+				self.movementSplitLines[lineIndex] = splitLine
+				activeIndex = lineIndex
+			elif firstWord == 'M101':
+				inactiveIndex = activeIndex
+			elif firstWord == 'M103':
+				activeIndex = inactiveIndex
+			self.nextThreadIndexes[lineIndex] = inactiveIndex
+
 	def parseLine( self, lineIndex ):
 		'Parse a gcode line and add it to the dimension skein.'
 		line = self.lines[lineIndex].lstrip()
-		splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
+		splitLine = self.splitLines[lineIndex]
 		if len(splitLine) < 1:
 			return
 		firstWord = splitLine[0]
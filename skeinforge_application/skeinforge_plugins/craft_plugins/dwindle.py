@@ -113,6 +113,7 @@ class DwindleSkein(object):
 	def __init__(self):
 		'Initialize.'
  		self.distanceFeedRate = gcodec.DistanceFeedRate()
+		self.distanceFeedRate.output = gcodec.OutputWithoutDuplication('M108')
 		self.feedRateMinute = 959.0
 		self.isActive = False
 		self.layerIndex = -1
@@ -158,7 +159,7 @@ class DwindleSkein(object):
 		for self.lineIndex in xrange(self.lineIndex, len(self.lines)):
 			line = self.lines[self.lineIndex]
 			self.parseLine(line)
-		return gcodec.getGcodeWithoutDuplication('M108', self.distanceFeedRate.output.getvalue())
+		return self.distanceFeedRate.output.getvalue()
 
 	def parseInitialization(self):
 		'Parse gcode initialization and store the parameters.'
@@ -64,9 +64,16 @@ When selected, export will delete the time consuming crafting comments, but leav
 ====Delete All Comments====
 When selected, export will delete all comments.  The comments are not necessary to run a fabricator.  Some printers do not support comments at all so the safest way is choose this option.
 
+===Compress Output with Gzip===
+Default is off.
+
+When selected, the exported file will be compressed with gzip and '.gz' will be added to its name, for example XYZ_export.gcode.gz.  This only applies to text output, if the export plugin writes its own binary output, that output is not compressed.
+
 ===Export Operations===
 Export presents the user with a choice of the export plugins in the export_plugins folder.  The chosen plugin will then modify the gcode or translate it into another format.  There is also the "Do Not Change Output" choice, which will not change the output.  An export plugin is a script in the export_plugins folder which has the getOutput function, the globalIsReplaceable variable and if it's output is not replaceable, the writeOutput function.
 
+If the plugin also has the getOutputSkein function, or if "Do Not Change Output" is chosen, the gcode is streamed line by line through export, the plugin and the replace file straight to the exported file and to the "Also Send Output To" output, so the whole exported text is never held in memory.
+
 ===File Extension===
 Default is gcode.
 
@@ -79,6 +86,8 @@ When export is exporting the code, if there is a tab separated file  with the na
 
 Export looks for the alteration file in the alterations folder in the .skeinforge folder in the home directory.  Export does not care if the text file names are capitalized, but some file systems do not handle file name cases properly, so to be on the safe side you should give them lower case names.  If it doesn't find the file it then looks in the alterations folder in the skeinforge_plugins folder.
 
+The replacements give the same result as replacing each string in turn in the order of the file.  The strings are replaced in batches of a few thousand lines at a time.  When the file has many strings, each batch is first searched for any of them with a single regular expression, which is built once and kept until the file is changed, and the batches without any of the strings are left as they are.
+
 ===Save Penultimate Gcode===
 Default is off.
 
@@ -113,7 +122,9 @@ from skeinforge_application.skeinforge_utilities import skeinforge_craft
 from skeinforge_application.skeinforge_utilities import skeinforge_polyfile
 from skeinforge_application.skeinforge_utilities import skeinforge_profile
 import cStringIO
+import gzip
 import os
+import re
 import sys
 import time
 
@@ -124,6 +135,13 @@ __date__ = '$Date: 2008/21/04 $'
 __license__ = 'GNU Affero General Public License http://www.gnu.org/licenses/agpl.html'
 
 
+# Below this number of strings, replacing them one after another in a batch of lines is about as fast as searching the batch for any of them first.
+globalMinimumNumberOfStringsForSearch = 16
+# The streamed lines are written to the outputs in batches of this many lines, because writing each line on its own is slow.
+globalNumberOfLinesPerWrite = 4096
+globalReplaceTableDictionary = {}
+
+
 def getCraftedTextFromText(gcodeText, repository=None):
 	'Export a gcode linear move text.'
 	if gcodec.isProcedureDoneOrFileIsEmpty( gcodeText, 'export'):
@@ -134,6 +152,14 @@ def getCraftedTextFromText(gcodeText, repository=None):
 		return gcodeText
 	return ExportSkein().getCraftedGcode(repository, gcodeText)
 
+def closeOutputToFile(outputTo, outputToFile):
+	'Close the also send output to file, or end and flush the standard output.'
+	if outputTo.endswith('stderr') or outputTo.endswith('stdout'):
+		outputToFile.write('\n')
+		outputToFile.flush()
+		return
+	outputToFile.close()
+
 def getDescriptionCarve(lines):
 	'Get the description for carve.'
 	descriptionCarve = ''
@@ -196,6 +222,22 @@ def getDistanceGcode(exportText):
 			oldLocation = location
 	return exportText
 
+def getExportFile(fileNameExport, repository):
+	'Get the export file, gzip compressed if compress output with gzip is selected, return None if it can not be opened.'
+	try:
+		if repository.compressOutputWithGzip.value:
+			return gzip.open(fileNameExport, 'wb')
+		return open(fileNameExport, 'w+')
+	except IOError:
+		print('The file ' + fileNameExport + ' can not be written to.')
+	return None
+
+def getExportFileName(fileNameSuffix, repository):
+	'Get the export file name, with the gz extension if compress output with gzip is selected.'
+	if repository.compressOutputWithGzip.value:
+		return fileNameSuffix + '.gz'
+	return fileNameSuffix
+
 def getFirstValue(gcodeText, word):
 	'Get the value from the first line which starts with the given word.'
 	for line in archive.getTextLines(gcodeText):
@@ -204,23 +246,65 @@ def getFirstValue(gcodeText, word):
 			return splitLine[1]
 	return ''
 
+def getIsStreamable(selectedPluginModule):
+	'Determine if the export can be streamed line by line through the selected plugin.'
+	if selectedPluginModule == None:
+		return True
+	return selectedPluginModule.globalIsReplaceable and hasattr(selectedPluginModule, 'getOutputSkein')
+
 def getNewRepository():
 	'Get new repository.'
 	return ExportRepository()
 
+def getOutputToFile(outputTo):
+	'Get the file or standard output to also send the output to, return None if it can not be opened.'
+	if outputTo.endswith('stderr'):
+		return sys.stderr
+	if outputTo.endswith('stdout'):
+		return sys.stdout
+	try:
+		return open(outputTo, 'w+')
+	except IOError:
+		print('The file ' + outputTo + ' can not be written to.')
+	return None
+
 def getReplaceableExportGcode(nameOfReplaceFile, replaceableExportGcode):
 	'Get text with strings replaced according to replace.csv file.'
-	replaceLines = settings.getAlterationLines(nameOfReplaceFile)
-	if len(replaceLines) < 1:
+	replaceTable = getReplaceTable(nameOfReplaceFile)
+	if len(replaceTable.replacePairs) < 1:
 		return replaceableExportGcode
-	for replaceLine in replaceLines:
-		splitLine = replaceLine.replace('\\n', '\t').split('\t')
-		if len(splitLine) > 0:
-			replaceableExportGcode = replaceableExportGcode.replace(splitLine[0], '\n'.join(splitLine[1 :]))
 	output = cStringIO.StringIO()
-	gcodec.addLinesToCString(output, archive.getTextLines(replaceableExportGcode))
+	gcodec.addLinesToCString(output, archive.getTextLines(replaceTable.getReplacedText(replaceableExportGcode)))
 	return output.getvalue()
 
+def getReplacePairs(replaceText):
+	'Get the string and replacement pairs from the replace file text, without the empty strings and the pairs which would not change anything.'
+	replacePairs = []
+	for replaceLine in archive.getTextLines(replaceText):
+		splitLine = replaceLine.replace('\\n', '\t').split('\t')
+		replacement = '\n'.join(splitLine[1 :])
+		if splitLine[0] != '' and splitLine[0] != replacement:
+			replacePairs.append((splitLine[0], replacement))
+	return replacePairs
+
+def getReplaceTable(nameOfReplaceFile):
+	'Get the replace table for the replace file, which is cached until the file is changed.'
+	replaceFilePath = settings.getAlterationFilePath(nameOfReplaceFile)
+	replaceFileKey = None
+	if replaceFilePath != '':
+		replaceFileStat = os.stat(replaceFilePath)
+		replaceFileKey = (replaceFilePath, replaceFileStat.st_mtime, replaceFileStat.st_size)
+	if nameOfReplaceFile in globalReplaceTableDictionary:
+		cachedKey, replaceTable = globalReplaceTableDictionary[nameOfReplaceFile]
+		if cachedKey == replaceFileKey:
+			return replaceTable
+	replaceText = ''
+	if replaceFilePath != '':
+		replaceText = archive.getFileText(replaceFilePath)
+	replaceTable = ReplaceTable(getReplacePairs(replaceText))
+	globalReplaceTableDictionary[nameOfReplaceFile] = (replaceFileKey, replaceTable)
+	return replaceTable
+
 def getSelectedPluginModule( plugins ):
 	'Get the selected plugin module.'
 	for plugin in plugins:
@@ -287,29 +371,84 @@ def writeOutput(fileName, shouldAnalyze=True):
 		archive.writeFileText(fileNamePenultimate, gcodeText)
 		filePenultimateWritten = True
 		print('The penultimate file is saved as ' + archive.getSummarizedFileName(fileNamePenultimate))
-	exportGcode = getCraftedTextFromText(gcodeText, repository)
 	window = None
 	if shouldAnalyze and repository.analyzeGcode.value:
 		window = skeinforge_analyze.writeOutput(fileName, fileNamePenultimate, fileNameSuffix, filePenultimateWritten, gcodeText)
-	replaceableExportGcode = None
 	selectedPluginModule = getSelectedPluginModule(repository.exportPlugins)
-	if selectedPluginModule == None:
-		replaceableExportGcode = exportGcode
+	if getIsStreamable(selectedPluginModule):
+		writeStreamedOutput(fileNameSuffix, gcodeText, repository, selectedPluginModule)
 	else:
-		if selectedPluginModule.globalIsReplaceable:
-			replaceableExportGcode = selectedPluginModule.getOutput(exportGcode)
-		else:
-			selectedPluginModule.writeOutput(fileNameSuffix, exportGcode)
+		writeTextOutput(fileNameSuffix, gcodeText, repository, selectedPluginModule)
+	print('It took %s to export the file.' % euclidean.getDurationString(time.time() - startTime))
+	return window
+
+def writeStreamedGcode(gcodeText, outputs, replaceTable, repository, selectedPluginModule):
+	'Stream the gcode line by line through export, the selected plugin and the replace table to the outputs.'
+	exportReplacer = ExportReplacer(outputs, replaceTable)
+	writers = [exportReplacer]
+	parseLine = None
+	if selectedPluginModule != None:
+		parseLine = selectedPluginModule.getOutputSkein(writers[0]).parseLine
+	if not gcodec.isProcedureDoneOrFileIsEmpty(gcodeText, 'export') and repository.activateExport.value:
+		exportSkein = ExportSkein()
+		exportSkein.output = writers[0]
+		if parseLine != None:
+			exportSkein.output = ExportLineWriter(parseLine)
+			writers.insert(0, exportSkein.output)
+		exportSkein.repository = repository
+		parseLine = exportSkein.parseLine
+	if parseLine == None:
+		writers[0].write(gcodeText)
+	else:
+		lines = archive.getTextLines(gcodeText)
+		for lineIndex in xrange(0, len(lines), globalNumberOfLinesPerWrite):
+			for line in lines[lineIndex : lineIndex + globalNumberOfLinesPerWrite]:
+				parseLine(line)
+			for writer in writers:
+				writer.writeBatch()
+	for writer in writers:
+		writer.close()
+
+def writeStreamedOutput(fileNameSuffix, gcodeText, repository, selectedPluginModule):
+	'Stream the gcode line by line through export, the selected plugin and the replace file to the export file.'
+	fileNameExport = getExportFileName(fileNameSuffix, repository)
+	exportFile = getExportFile(fileNameExport, repository)
+	outputs = []
+	if exportFile != None:
+		outputs.append(exportFile)
+	outputTo = repository.alsoSendOutputTo.value
+	outputToFile = None
+	if outputTo != '':
+		outputToFile = getOutputToFile(outputTo)
+		if outputToFile != None:
+			outputs.append(outputToFile)
+	writeStreamedGcode(gcodeText, outputs, getReplaceTable(repository.nameOfReplaceFile.value), repository, selectedPluginModule)
+	if exportFile != None:
+		exportFile.close()
+		print('The exported file is saved as ' + archive.getSummarizedFileName(fileNameExport))
+	if outputToFile != None:
+		closeOutputToFile(outputTo, outputToFile)
+
+def writeTextOutput(fileNameSuffix, gcodeText, repository, selectedPluginModule):
+	'Export the whole gcode text through the selected plugin, for plugins which can not be streamed.'
+	exportGcode = getCraftedTextFromText(gcodeText, repository)
+	replaceableExportGcode = None
+	if selectedPluginModule.globalIsReplaceable:
+		replaceableExportGcode = selectedPluginModule.getOutput(exportGcode)
+	else:
+		selectedPluginModule.writeOutput(fileNameSuffix, exportGcode)
 	if replaceableExportGcode != None:
 		replaceableExportGcode = getReplaceableExportGcode(repository.nameOfReplaceFile.value, replaceableExportGcode)
-		archive.writeFileText( fileNameSuffix, replaceableExportGcode )
-		print('The exported file is saved as ' + archive.getSummarizedFileName(fileNameSuffix))
+		fileNameExport = getExportFileName(fileNameSuffix, repository)
+		exportFile = getExportFile(fileNameExport, repository)
+		if exportFile != None:
+			exportFile.write(replaceableExportGcode)
+			exportFile.close()
+			print('The exported file is saved as ' + archive.getSummarizedFileName(fileNameExport))
 	if repository.alsoSendOutputTo.value != '':
 		if replaceableExportGcode == None:
 			replaceableExportGcode = selectedPluginModule.getOutput(exportGcode)
 		sendOutputTo(repository.alsoSendOutputTo.value, replaceableExportGcode)
-	print('It took %s to export the file.' % euclidean.getDurationString(time.time() - startTime))
-	return window
 
 
 class ExportRepository(object):
@@ -330,6 +469,7 @@ class ExportRepository(object):
 		self.doNotDeleteComments = settings.MenuRadio().getFromMenuButtonDisplay(self.commentChoice, 'Do Not Delete Comments', self, False)
 		self.deleteCraftingComments = settings.MenuRadio().getFromMenuButtonDisplay(self.commentChoice, 'Delete Crafting Comments', self, False)
 		self.deleteAllComments = settings.MenuRadio().getFromMenuButtonDisplay(self.commentChoice, 'Delete All Comments', self, True)
+		self.compressOutputWithGzip = settings.BooleanSetting().getFromValue('Compress Output with Gzip', self, False)
 		exportPluginsFolderPath = archive.getAbsoluteFrozenFolderPath(archive.getCraftPluginsDirectoryPath('export.py'), 'export_plugins')
 		exportStaticDirectoryPath = os.path.join(exportPluginsFolderPath, 'static_plugins')
 		exportPluginFileNames = archive.getPluginFileNamesFromDirectoryPath(exportPluginsFolderPath)
@@ -365,6 +505,72 @@ class ExportRepository(object):
 			writeOutput(fileName)
 
 
+class ExportLineWriter(object):
+	'A file like class to gather the text written to it, and send its lines on to a line parser in batches.'
+	def __init__(self, parseLine):
+		'Initialize.'
+		self.parseLine = parseLine
+		self.partialLine = ''
+		self.texts = []
+		#The written texts are gathered by the append of the list, which is much quicker than a write method, and parsed by writeBatch.
+		self.write = self.texts.append
+
+	def close(self):
+		'Parse the rest of the batch and the partial line which is left at the end.'
+		self.writeBatch()
+		self.parseLine(self.partialLine)
+		self.partialLine = ''
+
+	def writeBatch(self):
+		'Parse the complete lines of the batch, and keep the partial line until the rest of it is written.'
+		lines = archive.getTextLines(self.partialLine + ''.join(self.texts))
+		del self.texts[:]
+		if len(lines) < 1:
+			return
+		self.partialLine = lines.pop()
+		for line in lines:
+			self.parseLine(line)
+
+
+class ExportReplacer(object):
+	'A class to write the text to the outputs in batches, with the strings of the replace file replaced in each batch of lines.'
+	def __init__(self, outputs, replaceTable):
+		'Initialize.'
+		self.outputs = outputs
+		self.replaceTable = replaceTable
+		self.texts = []
+		#The written texts are gathered by the append of the list, which is much quicker than a write method, and written to the outputs by writeBatch.
+		self.write = self.texts.append
+
+	def close(self):
+		'Write the rest of the batch and the partial line, the outputs are closed by their owner.'
+		self.writeBatch()
+		if len(self.texts) > 0:
+			self.write('\n')
+			self.writeBatch()
+
+	def getReplacedText(self, text):
+		'Get the text with the strings replaced and without empty lines, like the replaced lines of the text path.'
+		text = self.replaceTable.getReplacedText(text)
+		if '\r' not in text and '\n\n' not in text and not text.startswith('\n'):
+			return text
+		output = cStringIO.StringIO()
+		gcodec.addLinesToCString(output, archive.getTextLines(text))
+		return output.getvalue()
+
+	def writeBatch(self):
+		'Write the complete lines of the batch to the outputs, and keep the partial line for the next batch if there are strings to replace.'
+		text = ''.join(self.texts)
+		del self.texts[:]
+		if len(self.replaceTable.replacePairs) > 0:
+			#A string of the replace file never has a newline, so it is never split between batches which end after a newline.
+			endIndex = text.rfind('\n') + 1
+			self.texts.append(text[endIndex :])
+			text = self.getReplacedText(text[: endIndex])
+		for output in self.outputs:
+			output.write(text)
+
+
 class ExportSkein(object):
 	'A class to export a skein of extrusions.'
 	def __init__(self):
@@ -424,6 +630,26 @@ class ExportSkein(object):
 		self.addLine(line)
 
 
+class ReplaceTable(object):
+	'A class to replace the strings of a replace file, skipping the texts which have none of them.'
+	def __init__(self, replacePairs):
+		'Compile the search for any of the strings to be replaced, if there are enough strings for it to be faster.'
+		self.replacePairs = replacePairs
+		self.replaceSearch = None
+		if len(replacePairs) < globalMinimumNumberOfStringsForSearch:
+			return
+		self.replaceSearch = re.compile('|'.join([re.escape(replacePair[0]) for replacePair in replacePairs])).search
+
+	def getReplacedText(self, text):
+		'Get the text with the strings replaced one after another in the order of the replace file.'
+		if self.replaceSearch != None:
+			if self.replaceSearch(text) == None:
+				return text
+		for replacePair in self.replacePairs:
+			text = text.replace(replacePair[0], replacePair[1])
+		return text
+
+
 def main():
 	'Display the export dialog.'
 	if len(sys.argv) > 1:
@@ -2,7 +2,7 @@
 This page is in the table of contents.
 Gcode time segment is an export plugin to convert gcode from float position to number of steps.
 
-An export plugin is a script in the export_plugins folder which has the getOutput function, the globalIsReplaceable variable and if it's output is not replaceable, the writeOutput function.  It is meant to be run from the export tool.  To ensure that the plugin works on platforms which do not handle file capitalization properly, give the plugin a lower case name.
+An export plugin is a script in the export_plugins folder which has the getOutput function, the globalIsReplaceable variable and if it's output is not replaceable, the writeOutput function.  If the plugin also has the getOutputSkein function, export streams the gcode through it line by line instead of building the whole text.  It is meant to be run from the export tool.  To ensure that the plugin works on platforms which do not handle file capitalization properly, give the plugin a lower case name.
 
 The getOutput function of this script takes a gcode text and returns it with the positions converted into number of steps and time.  The writeOutput function of this script takes a gcode text and writes that with the positions converted into number of steps and time.
 
@@ -108,6 +108,16 @@ def getOutput(gcodeText, repository=None):
 		settings.getReadRepository(repository)
 	return GcodeTimeSegmentSkein().getCraftedGcode(gcodeText, repository)
 
+def getOutputSkein(output, repository=None):
+	'Get the skein which exports each line given to its parseLine function to the output.'
+	if repository == None:
+		repository = GcodeTimeSegmentRepository()
+		settings.getReadRepository(repository)
+	gcodeTimeSegmentSkein = GcodeTimeSegmentSkein()
+	gcodeTimeSegmentSkein.output = output
+	gcodeTimeSegmentSkein.repository = repository
+	return gcodeTimeSegmentSkein
+
 def writeOutput( fileName, gcodeText = ''):
 	"Write the exported version of a gcode file."
 	gcodeText = gcodec.getGcodeFileText(fileName, gcodeText)
@@ -2,7 +2,7 @@
 This page is in the table of contents.
 Gcode_small is an export plugin to remove the comments and the redundant z and feed rate parameters from a gcode file.
 
-An export plugin is a script in the export_plugins folder which has the getOutput function, the globalIsReplaceable variable and if it's output is not replaceable, the writeOutput function.  It is meant to be run from the export tool.  To ensure that the plugin works on platforms which do not handle file capitalization properly, give the plugin a lower case name.
+An export plugin is a script in the export_plugins folder which has the getOutput function, the globalIsReplaceable variable and if it's output is not replaceable, the writeOutput function.  If the plugin also has the getOutputSkein function, export streams the gcode through it line by line instead of building the whole text.  It is meant to be run from the export tool.  To ensure that the plugin works on platforms which do not handle file capitalization properly, give the plugin a lower case name.
 
 The getOutput function of this script takes a gcode text and returns that text without comments and redundant z and feed rate parameters.  The writeOutput function of this script takes a gcode text and writes that text without comments and redundant z and feed rate parameters to a file.
 
@@ -40,6 +40,12 @@ def getOutput(gcodeText):
 	'Get the exported version of a gcode file.'
 	return GcodeSmallSkein().getCraftedGcode(gcodeText)
 
+def getOutputSkein(output):
+	'Get the skein which exports each line given to its parseLine function to the output.'
+	gcodeSmallSkein = GcodeSmallSkein()
+	gcodeSmallSkein.output = output
+	return gcodeSmallSkein
+
 def getSplitLineBeforeBracketSemicolon(line):
 	"Get the split line before a bracket or semicolon."
 	bracketSemicolonIndex = min( line.find(';'), line.find('(') )
@@ -982,8 +982,9 @@ class FillSkein(object):
 		paths = euclidean.getPathsFromEndpoints(endpoints, 5.0 * self.infillWidth, pixelTable, self.sharpestProduct, aroundWidth)
 		if gridCircular:
 			startAngle = euclidean.globalGoldenAngle * float(layerIndex)
+			preparedRotatedLoops = euclidean.PreparedLoops(rotatedLoops)
 			for gridPoint in self.getGridPoints(fillLoops, reverseRotation):
-				self.addGridCircle(gridPoint, infillPaths, layerRotation, pixelTable, rotatedLoops, layerRotation, aroundWidth)
+				self.addGridCircle(gridPoint, infillPaths, layerRotation, pixelTable, preparedRotatedLoops, layerRotation, aroundWidth)
 		else:
 			if self.isGridToBeExtruded():
 				self.addGrid(
@@ -1050,14 +1051,14 @@ class FillSkein(object):
 				else:
 					paths[ pathGroupIndex ] += explodedPath[1 :]
 
-	def addGridCircle(self, center, infillPaths, layerRotation, pixelTable, rotatedLoops, startRotation, width):
+	def addGridCircle(self, center, infillPaths, layerRotation, pixelTable, preparedRotatedLoops, startRotation, width):
 		'Add circle to the grid.'
 		startAngle = -math.atan2(startRotation.imag, startRotation.real)
 		loop = euclidean.getComplexPolygon(center, self.gridCircleRadius, 17, startAngle)
 		loopPixelDictionary = {}
 		euclidean.addLoopToPixelTable(loop, loopPixelDictionary, width)
 		if not euclidean.isPixelTableIntersecting(pixelTable, loopPixelDictionary):
-			if euclidean.getIsInFilledRegion(rotatedLoops, euclidean.getLeftPoint(loop)):
+			if preparedRotatedLoops.getIsInFilledRegion(euclidean.getLeftPoint(loop)):
 				addLoop(self.infillWidth, infillPaths, loop, layerRotation)
 				return
 		insideIndexPaths = []
@@ -1070,7 +1071,7 @@ class FillSkein(object):
 			euclidean.addSquareTwoToPixelDictionary(segmentDictionary, nextPoint, None, width)
 			shouldAddLoop = not euclidean.isPixelTableIntersecting(pixelTable, segmentDictionary)
 			if shouldAddLoop:
-				shouldAddLoop = euclidean.getIsInFilledRegion(rotatedLoops, point)
+				shouldAddLoop = preparedRotatedLoops.getIsInFilledRegion(point)
 			if shouldAddLoop:
 				if insideIndexPath == None:
 					insideIndexPath = [pointIndex]
@@ -9,6 +9,11 @@ http://fabmetheus.crsndoo.com/wiki/index.php/Skeinforge_Home
 The default 'Activate Home' checkbox is on.  When it is on, the functions described below will work, when it is off, nothing will be done.
 
 ==Settings==
+===Fuse Line Stages===
+Default is off.
+
+When selected, home is run as a line stage together with the plugins next to it in the craft sequence which also have "Fuse Line Stages" selected.  Each stage passes batches of lines on to the next, so the text between them is never built, and the output is the same as when they are run one after another.  Home, lash, limit and unpause have this setting.
+
 ===Name of Home File===
 Default: home.gcode
 
@@ -50,6 +55,16 @@ __date__ = '$Date: 2008/21/04 $'
 __license__ = 'GNU Affero General Public License http://www.gnu.org/licenses/agpl.html'
 
 
+def getCraftedLineBatches(gcodeText, lineBatches, repository=None):
+	'Get the homed line batches, the gcode text is the text before the fused stages.'
+	if gcodec.isProcedureDoneOrFileIsEmpty(gcodeText, 'home'):
+		return lineBatches
+	if repository == None:
+		repository = settings.getReadRepository(HomeRepository())
+	if not repository.activateHome.value:
+		return lineBatches
+	return HomeSkein().getCraftedLineBatches(lineBatches, repository)
+
 def getCraftedText( fileName, text, repository = None ):
 	"Home a gcode linear move file or text."
 	return getCraftedTextFromText(archive.getTextIfEmpty(fileName, text), repository)
@@ -81,6 +96,7 @@ class HomeRepository(object):
 		self.fileNameInput = settings.FileNameInput().getFromFileName( fabmetheus_interpret.getGNUTranslatorGcodeFileTypeTuples(), 'Open File for Home', self, '')
 		self.openWikiManualHelpPage = settings.HelpPage().getOpenFromAbsolute('http://fabmetheus.crsndoo.com/wiki/index.php/Skeinforge_Home')
 		self.activateHome = settings.BooleanSetting().getFromValue('Activate Home', self, False )
+		self.fuseLineStages = settings.BooleanSetting().getFromValue('Fuse Line Stages', self, False)
 		self.nameOfHomeFile = settings.StringSetting().getFromValue('Name of Home File:', self, 'home.gcode')
 		self.executeTitle = 'Home'
  
@@ -143,13 +159,28 @@ class HomeSkein(object):
 		if len(self.homeLines) < 1:
 			return gcodeText
 		self.lines = archive.getTextLines(gcodeText)
-		self.parseInitialization( repository )
+		self.parseInitialization()
 		for self.lineIndex in xrange(self.lineIndex, len(self.lines)):
 			line = self.lines[self.lineIndex]
 			self.parseLine(line)
 		return self.distanceFeedRate.output.getvalue()
 
-	def parseInitialization( self, repository ):
+	def getCraftedLineBatches(self, lineBatches, repository):
+		'Parse the gcode line batches and yield the home gcode line batches.'
+		self.repository = repository
+		self.homeLines = settings.getAlterationFileLines(repository.nameOfHomeFile.value)
+		if len(self.homeLines) < 1:
+			for lines in lineBatches:
+				yield lines
+			return
+		self.distanceFeedRate.output = gcodec.OutputLines()
+		for lines in gcodec.getLineBatchesAfterInitialization(lineBatches, self):
+			for line in lines:
+				self.parseLine(line)
+			yield self.distanceFeedRate.output.getLines()
+		yield self.distanceFeedRate.output.getLastLines()
+
+	def parseInitialization(self):
 		'Parse gcode initialization and store the parameters.'
 		for self.lineIndex in xrange(len(self.lines)):
 			line = self.lines[self.lineIndex]
@@ -86,6 +86,7 @@ class JorisSkein(object):
 	def __init__(self):
 		'Initialize.'
 		self.distanceFeedRate = gcodec.DistanceFeedRate()
+		self.distanceFeedRate.output = gcodec.OutputWithoutDuplication('M108')
 		self.lines = None
 		self.layerIndex = -1
 		self.feedRateMinute = 959.0
@@ -104,7 +105,7 @@ class JorisSkein(object):
 		for self.lineIndex in xrange(self.lineIndex, len(self.lines)):
 			line = self.lines[self.lineIndex]
 			self.parseLine(line)
-		return gcodec.getGcodeWithoutDuplication('M108', self.distanceFeedRate.output.getvalue())
+		return self.distanceFeedRate.output.getvalue()
 		
 	def parseInitialization(self):
 		'Parse gcode initialization and store the parameters.'
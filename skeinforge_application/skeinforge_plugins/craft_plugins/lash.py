@@ -14,6 +14,16 @@ The default values are from the settings in Erik's 3D-to-5D-Gcode, I believe the
 The default 'Activate Lash' checkbox is off.  When it is on, the functions described below will work, when it is off, nothing will be done.
 
 ==Settings==
+===Fuse Line Stages===
+Default is off.
+
+When selected, lash is run as a line stage together with the plugins next to it in the craft sequence which also have "Fuse Line Stages" selected.  Each stage passes batches of lines on to the next, so the text between them is never built, and the output is the same as when they are run one after another.  Home, lash, limit and unpause have this setting.  When the "Number of Layer Processes" is more than one, lash is not fused.
+
+===Number of Layer Processes===
+Default is one.
+
+Defines the number of processes which lash the layers, in chunks of consecutive layers.  When it is more than one, the layers are split into that many chunks, which are lashed at the same time by a process pool, and the output is the same as with one process.  When it is zero, there is one layer process for each processor.
+
 ===X Backlash===
 Default is 0.2 millimeters.
 
@@ -57,6 +67,19 @@ __date__ = '$Date: 2008/21/04 $'
 __license__ = 'GNU Affero General Public License http://www.gnu.org/licenses/agpl.html'
 
 
+globalCarriedLayerState = ['location']
+
+
+def getCraftedLineBatches(gcodeText, lineBatches, repository=None):
+	'Get the lashed line batches, the gcode text is the text before the fused stages.'
+	if gcodec.isProcedureDoneOrFileIsEmpty(gcodeText, 'lash'):
+		return lineBatches
+	if repository == None:
+		repository = settings.getReadRepository(LashRepository())
+	if not repository.activateLash.value:
+		return lineBatches
+	return LashSkein().getCraftedLineBatches(lineBatches, repository)
+
 def getCraftedText( fileName, text, lashRepository = None ):
 	"Get a lashed gcode linear move text."
 	return getCraftedTextFromText( archive.getTextIfEmpty(fileName, text), lashRepository )
@@ -69,12 +92,16 @@ def getCraftedTextFromText( gcodeText, lashRepository = None ):
 		lashRepository = settings.getReadRepository( LashRepository() )
 	if not lashRepository.activateLash.value:
 		return gcodeText
-	return LashSkein().getCraftedGcode( gcodeText, lashRepository )
+	return skeinforge_craft.getLayerChunkedGcode(gcodeText, 'lash', lashRepository)
 
 def getNewRepository():
 	'Get new repository.'
 	return LashRepository()
 
+def getSkeinCraftedGcode(gcodeText, repository):
+	'Get the lash gcode from the whole text or from a layer chunk.'
+	return LashSkein().getCraftedGcode(gcodeText, repository)
+
 def writeOutput(fileName, shouldAnalyze=True):
 	"Lash a gcode linear move file."
 	skeinforge_craft.writeChainTextWithNounMessage(fileName, 'lash', shouldAnalyze)
@@ -88,6 +115,8 @@ class LashRepository(object):
 		self.fileNameInput = settings.FileNameInput().getFromFileName( fabmetheus_interpret.getGNUTranslatorGcodeFileTypeTuples(), 'Open File for Lash', self, '')
 		self.openWikiManualHelpPage = settings.HelpPage().getOpenFromAbsolute('http://fabmetheus.crsndoo.com/wiki/index.php/Skeinforge_Lash')
 		self.activateLash = settings.BooleanSetting().getFromValue('Activate Lash', self, False )
+		self.fuseLineStages = settings.BooleanSetting().getFromValue('Fuse Line Stages', self, False)
+		self.numberOfLayerProcesses = settings.IntSpin().getFromValue(0, 'Number of Layer Processes (integer):', self, 16, 1)
 		self.xBacklash = settings.FloatSpin().getFromValue( 0.1, 'X Backlash (mm):', self, 0.5, 0.2 )
 		self.yBacklash = settings.FloatSpin().getFromValue( 0.1, 'Y Backlash (mm):', self, 0.5, 0.3 )
 		self.executeTitle = 'Lash'
@@ -120,6 +149,18 @@ class LashSkein(object):
 			self.parseLash(line)
 		return self.distanceFeedRate.output.getvalue()
 
+	def getCraftedLineBatches(self, lineBatches, lashRepository):
+		'Parse the gcode line batches and yield the lash gcode line batches.'
+		self.distanceFeedRate.output = gcodec.OutputLines()
+		self.lashRepository = lashRepository
+		self.xBacklash = lashRepository.xBacklash.value
+		self.yBacklash = lashRepository.yBacklash.value
+		for lines in gcodec.getLineBatchesAfterInitialization(lineBatches, self):
+			for line in lines:
+				self.parseLash(line)
+			yield self.distanceFeedRate.output.getLines()
+		yield self.distanceFeedRate.output.getLastLines()
+
 	def getLashedLine( self, line, location, splitLine ):
 		"Get lashed gcode line."
 		if self.oldLocation == None:
@@ -12,11 +12,21 @@ The maximum z feed rate is defined in speed.
 The default 'Activate Limit' checkbox is on.  When it is on, the functions described below will work, when it is off, nothing will be done.
 
 ==Settings==
+===Fuse Line Stages===
+Default is off.
+
+When selected, limit is run as a line stage together with the plugins next to it in the craft sequence which also have "Fuse Line Stages" selected.  Each stage passes batches of lines on to the next, so the text between them is never built, and the output is the same as when they are run one after another.  Home, lash, limit and unpause have this setting.  When the "Number of Layer Processes" is more than one, limit is not fused.
+
 ===Maximum Initial Feed Rate===
 Default is one millimeter per second.
 
 Defines the maximum speed of the inital tool head move.
 
+===Number of Layer Processes===
+Default is one.
+
+Defines the number of processes which limit the layers, in chunks of consecutive layers.  When it is more than one, the layers are split into that many chunks, which are limited at the same time by a process pool, and the output is the same as with one process.  When it is zero, there is one layer process for each processor.
+
 ==Examples==
 The following examples limit the file Screw Holder Bottom.stl.  The examples are run in a terminal in the folder which contains Screw Holder Bottom.stl and limit.py.
 
@@ -50,6 +60,19 @@ __date__ = '$Date: 2008/28/04 $'
 __license__ = 'GNU Affero General Public License http://www.gnu.org/licenses/agpl.html'
 
 
+globalCarriedLayerState = ['extruder', 'location']
+
+
+def getCraftedLineBatches(gcodeText, lineBatches, repository=None):
+	'Get the limited line batches, the gcode text is the text before the fused stages.'
+	if gcodec.isProcedureDoneOrFileIsEmpty(gcodeText, 'limit'):
+		return lineBatches
+	if repository == None:
+		repository = settings.getReadRepository(LimitRepository())
+	if not repository.activateLimit.value:
+		return lineBatches
+	return LimitSkein().getCraftedLineBatches(lineBatches, repository)
+
 def getCraftedText(fileName, gcodeText='', repository=None):
 	'Limit a gcode file or text.'
 	return getCraftedTextFromText( archive.getTextIfEmpty(fileName, gcodeText), repository )
@@ -62,12 +85,16 @@ def getCraftedTextFromText(gcodeText, repository=None):
 		repository = settings.getReadRepository(LimitRepository())
 	if not repository.activateLimit.value:
 		return gcodeText
-	return LimitSkein().getCraftedGcode(gcodeText, repository)
+	return skeinforge_craft.getLayerChunkedGcode(gcodeText, 'limit', repository)
 
 def getNewRepository():
 	'Get new repository.'
 	return LimitRepository()
 
+def getSkeinCraftedGcode(gcodeText, repository):
+	'Get the limit gcode from the whole text or from a layer chunk.'
+	return LimitSkein().getCraftedGcode(gcodeText, repository)
+
 def writeOutput(fileName, shouldAnalyze=True):
 	'Limit a gcode file.'
 	skeinforge_craft.writeChainTextWithNounMessage(fileName, 'limit', shouldAnalyze)
@@ -81,7 +108,9 @@ class LimitRepository(object):
 		self.fileNameInput = settings.FileNameInput().getFromFileName( fabmetheus_interpret.getGNUTranslatorGcodeFileTypeTuples(), 'Open File for Limit', self, '')
 		self.openWikiManualHelpPage = settings.HelpPage().getOpenFromAbsolute('http://fabmetheus.crsndoo.com/wiki/index.php/Skeinforge_Limit')
 		self.activateLimit = settings.BooleanSetting().getFromValue('Activate Limit', self, False)
+		self.fuseLineStages = settings.BooleanSetting().getFromValue('Fuse Line Stages', self, False)
 		self.maximumInitialFeedRate = settings.FloatSpin().getFromValue(0.5, 'Maximum Initial Feed Rate (mm/s):', self, 10.0, 1.0)
+		self.numberOfLayerProcesses = settings.IntSpin().getFromValue(0, 'Number of Layer Processes (integer):', self, 16, 1)
 		self.executeTitle = 'Limit'
 
 	def execute(self):
@@ -108,9 +137,22 @@ class LimitSkein(object):
 		self.maximumZDrillFeedRatePerSecond = min(self.maximumZDrillFeedRatePerSecond, self.maximumZFeedRatePerSecond)
 		self.maximumZCurrentFeedRatePerSecond = self.maximumZFeedRatePerSecond
 		for lineIndex in xrange(self.lineIndex, len(self.lines)):
-			self.parseLine( lineIndex )
+			self.parseLine(self.lines[lineIndex])
 		return self.distanceFeedRate.output.getvalue()
 
+	def getCraftedLineBatches(self, lineBatches, repository):
+		'Parse the gcode line batches and yield the limit gcode line batches.'
+		self.distanceFeedRate.output = gcodec.OutputLines()
+		self.repository = repository
+		lineBatches = gcodec.getLineBatchesAfterInitialization(lineBatches, self)
+		self.maximumZDrillFeedRatePerSecond = min(self.maximumZDrillFeedRatePerSecond, self.maximumZFeedRatePerSecond)
+		self.maximumZCurrentFeedRatePerSecond = self.maximumZFeedRatePerSecond
+		for lines in lineBatches:
+			for line in lines:
+				self.parseLine(line)
+			yield self.distanceFeedRate.output.getLines()
+		yield self.distanceFeedRate.output.getLastLines()
+
 	def getLimitedInitialMovement(self, line, splitLine):
 		'Get a limited linear movement.'
 		if self.oldLocation == None:
@@ -163,9 +205,9 @@ class LimitSkein(object):
 				self.maximumZFeedRatePerSecond = float(splitLine[1])
 			self.distanceFeedRate.addLine(line)
 
-	def parseLine( self, lineIndex ):
+	def parseLine(self, line):
 		'Parse a gcode line and add it to the limit skein.'
-		line = self.lines[lineIndex].lstrip()
+		line = line.lstrip()
 		splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
 		if len(splitLine) < 1:
 			return
@@ -243,7 +243,7 @@ class MillSkein(object):
 		self.repository = repository
 		self.lines = archive.getTextLines(gcodeText)
 		self.parseInitialization()
-		self.parseBoundaries()
+		self.parseBoundaries(gcodeText)
 		for line in self.lines[self.lineIndex :]:
 			self.parseLine(line)
 		return self.distanceFeedRate.output.getvalue()
@@ -279,24 +279,9 @@ class MillSkein(object):
 			verticalSegmentTable[ xIntersectionsTableKey ] = segments
 		return verticalSegmentTable
 
-	def parseBoundaries(self):
-		'Parse the boundaries and add them to the boundary layers.'
-		boundaryLoop = None
-		boundaryLayer = None
-		for line in self.lines[self.lineIndex :]:
-			splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
-			firstWord = gcodec.getFirstWord(splitLine)
-			if firstWord == '(</boundaryPerimeter>)':
-				boundaryLoop = None
-			elif firstWord == '(<boundaryPoint>':
-				location = gcodec.getLocationFromSplitLine(None, splitLine)
-				if boundaryLoop == None:
-					boundaryLoop = []
-					boundaryLayer.loops.append(boundaryLoop)
-				boundaryLoop.append(location.dropAxis())
-			elif firstWord == '(<layer>':
-				boundaryLayer = euclidean.LoopLayer(float(splitLine[1]))
-				self.boundaryLayers.append(boundaryLayer)
+	def parseBoundaries(self, gcodeText):
+		'Get the shared boundary layers and add the outset loops and tables to them.'
+		self.boundaryLayers = skeinforge_craft.getBoundaryLayers(gcodeText, self.lines)
 		if len(self.boundaryLayers) < 2:
 			return
 		for boundaryLayer in self.boundaryLayers:
@@ -63,7 +63,6 @@ from __future__ import absolute_import
 import __init__
 
 from fabmetheus_utilities.fabmetheus_tools import fabmetheus_interpret
-from fabmetheus_utilities.vector3 import Vector3
 from fabmetheus_utilities import archive
 from fabmetheus_utilities import euclidean
 from fabmetheus_utilities import gcodec
@@ -91,6 +90,7 @@ def getCraftedTextFromText(gcodeText, repository=None):
 		repository = settings.getReadRepository(MultiplyRepository())
 	if not repository.activateMultiply.value:
 		return gcodeText
+	skeinforge_craft.clearBoundaryLayers()
 	return MultiplySkein().getCraftedGcode(gcodeText, repository)
 
 def getNewRepository():
@@ -144,21 +144,15 @@ class MultiplySkein(object):
 		self.oldLocation = None
 		self.rowIndex = 0
 		self.shouldAccumulate = True
+		self.templateOldLocation = None
 
-	def addElement(self, offset):
+	def addElement(self, elementTemplate, offset):
 		'Add moved element to the output.'
-		for line in self.layerLines:
-			splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
-			firstWord = gcodec.getFirstWord(splitLine)
-			if firstWord == '(<boundaryPoint>':
-				movedLocation = self.getMovedLocationSetOldLocation(offset, splitLine)
-				line = self.distanceFeedRate.getBoundaryLine(movedLocation)
-			elif firstWord == 'G1':
-				movedLocation = self.getMovedLocationSetOldLocation(offset, splitLine)
-				line = self.distanceFeedRate.getLinearGcodeMovement(movedLocation.dropAxis(), movedLocation.z)
-			elif firstWord == '(<infillPoint>':
-				movedLocation = self.getMovedLocationSetOldLocation(offset, splitLine)
-				line = self.distanceFeedRate.getInfillBoundaryLine(movedLocation)
+		fixedPointFormatter = self.distanceFeedRate.getFixedPointFormatter()
+		for line in elementTemplate:
+			if line.__class__ == tuple:
+				beginning, x, y, ending = line
+				line = beginning + fixedPointFormatter.getString(x + offset.real) + ' Y' + fixedPointFormatter.getString(y + offset.imag) + ending
 			self.distanceFeedRate.addLine(line)
 
 	def addLayer(self):
@@ -166,6 +160,7 @@ class MultiplySkein(object):
 		self.addRemoveThroughLayer()
 		if not self.repository.reverseSequenceEveryOddLayer.value:
 			self.rowIndex = 0
+		elementTemplate = None
 		for rowIndex in xrange(self.repository.numberOfRows.value):
 			yRowOffset = float(rowIndex) * self.extentPlusSeparation.imag
 			if self.layerIndex % 2 == 1 and self.repository.reverseSequenceEveryOddLayer.value:
@@ -174,7 +169,8 @@ class MultiplySkein(object):
 				xColumnOffset = float(columnIndex) * self.extentPlusSeparation.real
 				if self.rowIndex % 2 == 1:
 					xColumnOffset = self.arrayExtent.real - xColumnOffset
-				self.addElement(complex(xColumnOffset, yRowOffset) + self.offset)
+				elementTemplate = self.getElementTemplate(elementTemplate)
+				self.addElement(elementTemplate, complex(xColumnOffset, yRowOffset) + self.offset)
 			self.rowIndex += 1
 		settings.printProgress(self.layerIndex, 'multiply')
 		if len(self.layerLines) > 1:
@@ -205,11 +201,32 @@ class MultiplySkein(object):
 			self.parseLine(line)
 		return self.distanceFeedRate.output.getvalue()
 
-	def getMovedLocationSetOldLocation(self, offset, splitLine):
-		'Get the moved location and set the old location.'
+	def getElementTemplate(self, elementTemplate):
+		'Get the layer lines parsed once, with each movement split around its x and y so that it can be moved by every offset.'
+		if elementTemplate != None and self.oldLocation == self.templateOldLocation:
+			return elementTemplate
+		self.templateOldLocation = self.oldLocation
+		elementTemplate = []
+		for line in self.layerLines:
+			splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
+			firstWord = gcodec.getFirstWord(splitLine)
+			if firstWord == '(<boundaryPoint>':
+				location = self.getLocationSetOldLocation(splitLine)
+				line = ('(<boundaryPoint> X', location.x, location.y, ' Z%s </boundaryPoint>)' % self.distanceFeedRate.getRounded(location.z))
+			elif firstWord == 'G1':
+				location = self.getLocationSetOldLocation(splitLine)
+				line = ('G1 X', location.x, location.y, ' Z' + self.distanceFeedRate.getRounded(location.z))
+			elif firstWord == '(<infillPoint>':
+				location = self.getLocationSetOldLocation(splitLine)
+				line = ('(<infillPoint> X', location.x, location.y, ' Z%s </infillPoint>)' % self.distanceFeedRate.getRounded(location.z))
+			elementTemplate.append(line)
+		return elementTemplate
+
+	def getLocationSetOldLocation(self, splitLine):
+		'Get the location and set the old location.'
 		location = gcodec.getLocationFromSplitLine(self.oldLocation, splitLine)
 		self.oldLocation = location
-		return Vector3(location.x + offset.real, location.y + offset.imag, location.z)
+		return location
 
 	def parseInitialization(self):
 		'Parse gcode initialization and store the parameters.'
@@ -151,6 +151,7 @@ class OozebaneSkein(object):
 		self.oldLocation = None
 		self.operatingFeedRateMinute = 959.0
 		self.shutdownStepIndex = 999999999
+		self.splitLines = None
 		self.startupStepIndex = 999999999
 
 	def addAfterStartupLine( self, splitLine ):
@@ -176,8 +177,7 @@ class OozebaneSkein(object):
 		"Get the feed rate of the first active move over the operating feed rate."
 		isSearchExtruderActive = self.isExtruderActive
 		for afterIndex in xrange(self.lineIndex, len(self.lines)):
-			line = self.lines[ afterIndex ]
-			splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
+			splitLine = self.splitLines[afterIndex]
 			firstWord = gcodec.getFirstWord(splitLine)
 			if firstWord == 'G1':
 				if isSearchExtruderActive:
@@ -189,7 +189,7 @@ class OozebaneSkein(object):
 
 	def getAddAfterStartupLines(self, line):
 		"Get and / or add after the startup lines."
-		splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
+		splitLine = self.splitLines[self.lineIndex]
 		while self.isDistanceAfterThreadBeginningGreater():
 			self.addAfterStartupLine(splitLine)
 		if self.startupStepIndex >= len( self.afterStartupDistances ):
@@ -203,7 +203,7 @@ class OozebaneSkein(object):
 		distanceThreadBeginning = self.getDistanceToThreadBeginning()
 		if distanceThreadBeginning == None:
 			return line
-		splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
+		splitLine = self.splitLines[self.lineIndex]
 		self.extruderInactiveLongEnough = False
 		self.isStartupEarly = True
 		location = gcodec.getLocationFromSplitLine(self.oldLocation, splitLine)
@@ -228,7 +228,7 @@ class OozebaneSkein(object):
 		if self.shutdownStepIndex >= len( self.earlyShutdownDistances ):
 			self.shutdownStepIndex = len( self.earlyShutdownDistances ) + 99999999
 			return False
-		splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
+		splitLine = self.splitLines[self.lineIndex]
 		distanceThreadEnd = self.getDistanceToExtruderOffCommand( self.earlyShutdownDistances[ self.shutdownStepIndex ] )
 		location = gcodec.getLocationFromSplitLine(self.oldLocation, splitLine)
 		if distanceThreadEnd == None:
@@ -268,6 +268,9 @@ class OozebaneSkein(object):
 	def getCraftedGcode( self, gcodeText, oozebaneRepository ):
 		"Parse gcode text and store the oozebane gcode."
 		self.lines = archive.getTextLines(gcodeText)
+		self.splitLines = []
+		for line in self.lines:
+			self.splitLines.append(gcodec.getSplitLineBeforeBracketSemicolon(line))
 		self.oozebaneRepository = oozebaneRepository
 		self.parseInitialization( oozebaneRepository )
 		for self.lineIndex in xrange(self.lineIndex, len(self.lines)):
@@ -277,14 +280,12 @@ class OozebaneSkein(object):
 
 	def getDistanceAfterThreadBeginning(self):
 		"Get the distance after the beginning of the thread."
-		line = self.lines[self.lineIndex]
-		splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
+		splitLine = self.splitLines[self.lineIndex]
 		lastThreadLocation = gcodec.getLocationFromSplitLine(self.oldLocation, splitLine)
 		totalDistance = 0.0
 		extruderOnReached = False
 		for beforeIndex in xrange( self.lineIndex - 1, 3, - 1 ):
-			line = self.lines[ beforeIndex ]
-			splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
+			splitLine = self.splitLines[beforeIndex]
 			firstWord = gcodec.getFirstWord(splitLine)
 			if firstWord == 'G1':
 				location = gcodec.getLocationFromSplitLine( lastThreadLocation, splitLine )
@@ -298,13 +299,11 @@ class OozebaneSkein(object):
 
 	def getDistanceToExtruderOffCommand( self, remainingDistance ):
 		"Get the distance to the word."
-		line = self.lines[self.lineIndex]
-		splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
+		splitLine = self.splitLines[self.lineIndex]
 		lastThreadLocation = gcodec.getLocationFromSplitLine(self.oldLocation, splitLine)
 		totalDistance = 0.0
 		for afterIndex in xrange( self.lineIndex + 1, len(self.lines) ):
-			line = self.lines[ afterIndex ]
-			splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
+			splitLine = self.splitLines[afterIndex]
 			firstWord = gcodec.getFirstWord(splitLine)
 			if firstWord == 'G1':
 				location = gcodec.getLocationFromSplitLine( lastThreadLocation, splitLine )
@@ -320,13 +319,11 @@ class OozebaneSkein(object):
 		"Get the distance to the beginning of the thread."
 		if self.earlyStartupDistance == None:
 			return None
-		line = self.lines[self.lineIndex]
-		splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
+		splitLine = self.splitLines[self.lineIndex]
 		lastThreadLocation = gcodec.getLocationFromSplitLine(self.oldLocation, splitLine)
 		totalDistance = 0.0
 		for afterIndex in xrange( self.lineIndex + 1, len(self.lines) ):
-			line = self.lines[ afterIndex ]
-			splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
+			splitLine = self.splitLines[afterIndex]
 			firstWord = gcodec.getFirstWord(splitLine)
 			if firstWord == 'G1':
 				location = gcodec.getLocationFromSplitLine( lastThreadLocation, splitLine )
@@ -341,14 +338,12 @@ class OozebaneSkein(object):
 	def getDistanceToThreadBeginningAfterThreadEnd( self, remainingDistance ):
 		"Get the distance to the thread beginning after the end of this thread."
 		extruderOnReached = False
-		line = self.lines[self.lineIndex]
-		splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
+		splitLine = self.splitLines[self.lineIndex]
 		lastThreadLocation = gcodec.getLocationFromSplitLine(self.oldLocation, splitLine)
 		threadEndReached = False
 		totalDistance = 0.0
 		for afterIndex in xrange( self.lineIndex + 1, len(self.lines) ):
-			line = self.lines[ afterIndex ]
-			splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
+			splitLine = self.splitLines[afterIndex]
 			firstWord = gcodec.getFirstWord(splitLine)
 			if firstWord == 'G1':
 				location = gcodec.getLocationFromSplitLine( lastThreadLocation, splitLine )
@@ -382,7 +377,7 @@ class OozebaneSkein(object):
 
 	def getOozebaneLine(self, line):
 		"Get oozebaned gcode line."
-		splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
+		splitLine = self.splitLines[self.lineIndex]
 		self.feedRateMinute = gcodec.getFeedRateMinute( self.feedRateMinute, splitLine )
 		if self.oldLocation == None:
 			return line
@@ -444,7 +439,7 @@ class OozebaneSkein(object):
 
 	def parseLine(self, line):
 		"Parse a gcode line and add it to the bevel gcode."
-		splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
+		splitLine = self.splitLines[self.lineIndex]
 		if len(splitLine) < 1:
 			return
 		firstWord = splitLine[0]
@@ -542,8 +537,7 @@ class OozebaneSkein(object):
 		if self.oldLocation != None:
 			self.distanceFromThreadEndToThreadBeginning = lastThreadLocation.distance( self.oldLocation )
 		for afterIndex in xrange( self.lineIndex + 1, len(self.lines) ):
-			line = self.lines[ afterIndex ]
-			splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
+			splitLine = self.splitLines[afterIndex]
 			firstWord = gcodec.getFirstWord(splitLine)
 			if firstWord == 'G1':
 				location = gcodec.getLocationFromSplitLine( lastThreadLocation, splitLine )
@@ -233,6 +233,7 @@ def getCraftedTextFromText(gcodeText, repository=None):
 		repository = settings.getReadRepository( RaftRepository() )
 	if not repository.activateRaft.value:
 		return gcodeText
+	skeinforge_craft.clearBoundaryLayers()
 	return RaftSkein().getCraftedGcode(gcodeText, repository)
 
 def getCrossHatchPointLine( crossHatchPointLineTable, y ):
@@ -423,6 +424,7 @@ class RaftSkein(object):
 		self.boundaryLayers = []
 		self.coolingRate = None
 		self.distanceFeedRate = gcodec.DistanceFeedRate()
+		self.distanceFeedRate.output = gcodec.OutputWithoutDuplication('M108')
 		self.edgeWidth = 0.6
 		self.extrusionStart = True
 		self.extrusionTop = 0.0
@@ -754,11 +756,11 @@ class RaftSkein(object):
 		euclidean.subtractXIntersectionsTable( aboveIntersectionsTable, outsetIntersectionsTable )
 		for aboveIntersectionsTableKey in aboveIntersectionsTable.keys():
 			supportIntersectionsTableKey = int( round( float( aboveIntersectionsTableKey ) / numberOfSubSteps ) )
-			xIntersectionIndexList = []
+			xIntersectionsLists = []
 			if supportIntersectionsTableKey in supportLayer.xIntersectionsTable:
-				euclidean.addXIntersectionIndexesFromXIntersections( 0, xIntersectionIndexList, supportLayer.xIntersectionsTable[ supportIntersectionsTableKey ] )
-			euclidean.addXIntersectionIndexesFromXIntersections( 1, xIntersectionIndexList, aboveIntersectionsTable[ aboveIntersectionsTableKey ] )
-			supportLayer.xIntersectionsTable[ supportIntersectionsTableKey ] = euclidean.getJoinOfXIntersectionIndexes( xIntersectionIndexList )
+				xIntersectionsLists.append( supportLayer.xIntersectionsTable[ supportIntersectionsTableKey ] )
+			xIntersectionsLists.append( aboveIntersectionsTable[ aboveIntersectionsTableKey ] )
+			supportLayer.xIntersectionsTable[ supportIntersectionsTableKey ] = euclidean.getJoinOfXIntersectionsLists( xIntersectionsLists )
 
 	def addTemperatureLineIfDifferent(self, temperature):
 		'Add a line of temperature if different.'
@@ -841,7 +843,7 @@ class RaftSkein(object):
 		self.addTemperatureLineIfDifferent( self.objectFirstLayerPerimeterTemperature )
 		for line in self.lines[self.lineIndex :]:
 			self.parseLine(line)
-		return gcodec.getGcodeWithoutDuplication('M108', self.distanceFeedRate.output.getvalue())
+		return self.distanceFeedRate.output.getvalue()
 
 	def getElevatedBoundaryLine( self, splitLine ):
 		'Get elevated boundary gcode line.'
@@ -76,6 +76,7 @@ def getCraftedTextFromText(fileName, svgText, repository=None):
 	if repository == None:
 		repository = settings.getReadRepository(ScaleRepository())
 	if repository.activateScale.value:
+		skeinforge_craft.clearBoundaryLayers()
 		return ScaleSkein().getCraftedGcode(fileName, repository, svgText)
 	return svgText
 
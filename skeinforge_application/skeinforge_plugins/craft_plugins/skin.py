@@ -150,6 +150,7 @@ class SkinSkein(object):
 		'Initialize.'
 		self.clipOverEdgeWidth = 0.0
  		self.distanceFeedRate = gcodec.DistanceFeedRate()
+		self.distanceFeedRate.output = gcodec.OutputWithoutDuplication('M108')
 		self.edge = None
 		self.feedRateMinute = 959.0
 		self.infill = None
@@ -288,33 +289,16 @@ class SkinSkein(object):
 		self.parseInitialization()
 		self.clipLength = 0.5 * self.clipOverEdgeWidth * self.edgeWidth
 		self.skinInfillInset = 0.5 * (self.infillWidth + self.skinInfillWidth) * (1.0 - self.infillPerimeterOverlap)
-		self.parseBoundaries()
+		self.parseBoundaries(gcodeText)
 		for self.lineIndex in xrange(self.lineIndex, len(self.lines)):
 			line = self.lines[self.lineIndex]
 			self.parseLine(line)
-		return gcodec.getGcodeWithoutDuplication('M108', self.distanceFeedRate.output.getvalue())
-
-	def parseBoundaries(self):
-		'Parse the boundaries and add them to the boundary layers.'
-		self.boundaryLayers = []
-		self.layerIndexTop = -1
-		boundaryLoop = None
-		boundaryLayer = None
-		for line in self.lines[self.lineIndex :]:
-			splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
-			firstWord = gcodec.getFirstWord(splitLine)
-			if firstWord == '(</boundaryPerimeter>)':
-				boundaryLoop = None
-			elif firstWord == '(<boundaryPoint>':
-				location = gcodec.getLocationFromSplitLine(None, splitLine)
-				if boundaryLoop == None:
-					boundaryLoop = []
-					boundaryLayer.loops.append(boundaryLoop)
-				boundaryLoop.append(location.dropAxis())
-			elif firstWord == '(<layer>':
-				boundaryLayer = euclidean.LoopLayer(float(splitLine[1]))
-				self.boundaryLayers.append(boundaryLayer)
-				self.layerIndexTop += 1
+		return self.distanceFeedRate.output.getvalue()
+
+	def parseBoundaries(self, gcodeText):
+		'Get the shared boundary layers and the layers from the bottom.'
+		self.boundaryLayers = skeinforge_craft.getBoundaryLayers(gcodeText, self.lines)
+		self.layerIndexTop = len(self.boundaryLayers) - 1
 		for boundaryLayerIndex, boundaryLayer in enumerate(self.boundaryLayers):
 			if len(boundaryLayer.loops) > 0:
 				self.layersFromBottom += boundaryLayerIndex
@@ -166,6 +166,7 @@ class SkirtSkein(object):
 	def __init__(self):
 		'Initialize variables.'
 		self.distanceFeedRate = gcodec.DistanceFeedRate()
+		self.distanceFeedRate.output = gcodec.OutputWithoutDuplication('M108')
 		self.feedRateMinute = 961.0
 		self.isExtruderActive = False
 		self.isSupportLayer = False
@@ -309,7 +310,7 @@ class SkirtSkein(object):
 		for self.lineIndex in xrange(self.lineIndex, len(self.lines)):
 			line = self.lines[self.lineIndex]
 			self.parseLine(line)
-		return gcodec.getGcodeWithoutDuplication('M108', self.distanceFeedRate.output.getvalue())
+		return self.distanceFeedRate.output.getvalue()
 
 	def getHorizontalXIntersectionsTable(self, loop):
 		'Get the horizontal x intersections table from the loop.'
@@ -15,6 +15,11 @@ Default is 28 milliseconds, which Shane found for the Arduino.
 
 Defines the delay on the microprocessor that will be at least partially compensated for.
 
+===Fuse Line Stages===
+Default is off.
+
+When selected, unpause is run as a line stage together with the plugins next to it in the craft sequence which also have "Fuse Line Stages" selected.  Each stage passes batches of lines on to the next, so the text between them is never built, and the output is the same as when they are run one after another.  Home, lash, limit and unpause have this setting.
+
 ===Maximum Speed===
 Default is 1.3.
 
@@ -54,6 +59,16 @@ __date__ = '$Date: 2008/21/04 $'
 __license__ = 'GNU Affero General Public License http://www.gnu.org/licenses/agpl.html'
 
 
+def getCraftedLineBatches(gcodeText, lineBatches, repository=None):
+	'Get the unpaused line batches, the gcode text is the text before the fused stages.'
+	if gcodec.isProcedureDoneOrFileIsEmpty(gcodeText, 'unpause'):
+		return lineBatches
+	if repository == None:
+		repository = settings.getReadRepository(UnpauseRepository())
+	if not repository.activateUnpause.value:
+		return lineBatches
+	return UnpauseSkein().getCraftedLineBatches(lineBatches, repository)
+
 def getCraftedText( fileName, gcodeText, repository=None):
 	"Unpause a gcode linear move file or text."
 	return getCraftedTextFromText( archive.getTextIfEmpty( fileName, gcodeText ), repository )
@@ -93,6 +108,7 @@ class UnpauseRepository(object):
 		self.openWikiManualHelpPage = settings.HelpPage().getOpenFromAbsolute('http://fabmetheus.crsndoo.com/wiki/index.php/Skeinforge_Unpause')
 		self.activateUnpause = settings.BooleanSetting().getFromValue('Activate Unpause', self, False )
 		self.delay = settings.FloatSpin().getFromValue( 2.0, 'Delay (milliseconds):', self, 42.0, 28.0 )
+		self.fuseLineStages = settings.BooleanSetting().getFromValue('Fuse Line Stages', self, False)
 		self.maximumSpeed = settings.FloatSpin().getFromValue( 1.1, 'Maximum Speed (ratio):', self, 1.9, 1.3 )
 		self.executeTitle = 'Unpause'
 
@@ -125,6 +141,19 @@ class UnpauseSkein(object):
 			self.parseLine(line)
 		return self.distanceFeedRate.output.getvalue()
 
+	def getCraftedLineBatches(self, lineBatches, repository):
+		'Parse the gcode line batches and yield the unpause gcode line batches.'
+		self.delaySecond = repository.delay.value * 0.001
+		self.distanceFeedRate.output = gcodec.OutputLines()
+		self.maximumSpeed = repository.maximumSpeed.value
+		self.minimumSpeedUpReciprocal = 1.0 / self.maximumSpeed
+		self.repository = repository
+		for lines in gcodec.getLineBatchesAfterInitialization(lineBatches, self):
+			for line in lines:
+				self.parseLine(line)
+			yield self.distanceFeedRate.output.getLines()
+		yield self.distanceFeedRate.output.getLastLines()
+
 	def getUnpausedArcMovement( self, line, splitLine ):
 		"Get an unpaused arc movement."
 		self.feedRateMinute = gcodec.getFeedRateMinute( self.feedRateMinute, splitLine )
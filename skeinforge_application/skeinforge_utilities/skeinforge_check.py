@@ -0,0 +1,166 @@
+"""
+Skeinforge check runs the speed checks of the streamed export, to check that streaming the gcode is not slower than
+exporting the whole text, and the identity check of the fused line stages.
+
+The fused check crafts the gcode with home, lash, limit and unpause activated, once one procedure after another and
+once fused into line stages, like when they have "Fuse Line Stages" selected.  It passes if the fused gcode is byte
+identical to the gcode crafted one procedure after another.
+
+The export checks export the gcode with "Do Not Change Output" and with the gcode_small plugin, with no replace strings, and
+with one, eight and a hundred replace strings.  Each export is run through the whole text path, which exports the text,
+replaces the strings in the whole text and splits it into lines, and through the streamed path, which export uses for
+those choices.  It passes if the outputs are the same and if the quickest streamed run is not slower than the quickest
+text run, by more than the timing tolerance.
+
+Usage:	python skeinforge_check.py [<filename>]
+	If there is no file name, the test.stl file in the fabmetheus folder is crafted.  The file is crafted up to home for
+	the fused check, and up to export for the export checks.
+
+The script prints the time of each check, and returns 1 if a check failed.
+
+"""
+
+from __future__ import absolute_import
+#Init has to be imported first because it has code to workaround the python bug where relative imports don't work if the module is imported as a main module.
+import __init__
+
+from fabmetheus_utilities import archive
+from fabmetheus_utilities import gcodec
+from skeinforge_application.skeinforge_plugins.craft_plugins import export
+from skeinforge_application.skeinforge_utilities import skeinforge_craft
+import cStringIO
+import math
+import os
+import sys
+import time
+
+
+__author__ = 'Enrique Perez (perez_enrique@yahoo.com)'
+__date__ = '$Date: 2008/21/04 $'
+__license__ = 'GNU Affero General Public License http://www.gnu.org/licenses/agpl.html'
+
+
+globalFusableProcedures = ['home', 'lash', 'limit', 'unpause']
+# Each timed run exports the gcode as many times as it takes for the run to last this long, so that a short file can be timed.
+globalMinimumRunSeconds = 0.5
+globalNumberOfRuns = 5
+# The streamed export passes if it is not slower than the text export by more than this fraction, which is about the timing noise.
+globalTimeTolerance = 0.05
+
+
+def getCraftedGcodeText(fileName, gcodeText, procedure):
+	'Get the gcode text crafted up to the procedure, without the procedure.'
+	procedures = skeinforge_craft.getProcedures(procedure, gcodeText)
+	return skeinforge_craft.getChainTextFromProcedures(fileName, procedures[: -1], gcodeText)
+
+def getExportCheckMessage(gcodeText, replacePairs, repository, selectedPluginModule):
+	'Export the gcode through the text and the streamed paths, print their times, and get the error message, which is empty if the check passed.'
+	replaceTable = export.ReplaceTable(replacePairs)
+	beginTime = time.clock()
+	textGcode = getTextExportGcode(gcodeText, replacePairs, repository, selectedPluginModule)
+	numberOfExports = int(math.ceil(globalMinimumRunSeconds / max(time.clock() - beginTime, 0.001)))
+	streamedTimes = []
+	textTimes = []
+	for runIndex in xrange(globalNumberOfRuns):
+		streamedTime = 0.0
+		textTime = 0.0
+		#The text and streamed exports take turns, so that a change in the speed of the computer slows both of them.
+		for exportIndex in xrange(numberOfExports):
+			beginTime = time.clock()
+			getTextExportGcode(gcodeText, replacePairs, repository, selectedPluginModule)
+			middleTime = time.clock()
+			output = cStringIO.StringIO()
+			export.writeStreamedGcode(gcodeText, [output], replaceTable, repository, selectedPluginModule)
+			streamedTime += time.clock() - middleTime
+			textTime += middleTime - beginTime
+		streamedTimes.append(streamedTime / float(numberOfExports))
+		textTimes.append(textTime / float(numberOfExports))
+		if output.getvalue() != textGcode:
+			return 'The streamed gcode is different from the text gcode.'
+	print('The text export took %.3f seconds and the streamed export took %.3f seconds.' % (min(textTimes), min(streamedTimes)))
+	if min(streamedTimes) > (1.0 + globalTimeTolerance) * min(textTimes):
+		return 'The streamed export is slower than the text export.'
+	return ''
+
+def getFusedCheckMessage(gcodeText):
+	'Craft the gcode with the fusable procedures one after another and fused, print their times, and get the error message, which is empty if the check passed.'
+	craftModules = []
+	repositories = []
+	for procedure in globalFusableProcedures:
+		craftModule = skeinforge_craft.getCraftModule(procedure)
+		repository = craftModule.getNewRepository()
+		getattr(repository, 'activate' + procedure.capitalize()).value = True
+		craftModules.append(craftModule)
+		repositories.append(repository)
+	repositories[0].nameOfHomeFile.value = 'example_home.gcode'
+	beginTime = time.clock()
+	chainGcode = gcodeText
+	for craftModule, repository in zip(craftModules, repositories):
+		chainGcode = craftModule.getCraftedTextFromText(chainGcode, repository)
+	chainTime = time.clock() - beginTime
+	beginTime = time.clock()
+	fusedGcode = skeinforge_craft.getFusedText(craftModules, gcodeText, repositories)
+	print('The procedures took %.3f seconds one after another and %.3f seconds fused.' % (chainTime, time.clock() - beginTime))
+	if chainGcode == gcodeText:
+		return 'The procedures did not change the gcode, so there was nothing to compare.'
+	if fusedGcode != chainGcode:
+		return 'The fused gcode is different from the gcode crafted one procedure after another.'
+	return ''
+
+def getReplacePairsDictionary():
+	'Get the replace pairs of each check, with strings on most lines, on some lines and on none.'
+	replacePairs = [('M101', 'M101 ; on'), ('M103', 'M103 ; off'), ('F1200.0', 'F1800.0'), ('M108', 'M108 S210'), ('M104', 'M109'), ('G21', 'G21\nG28'), ('E', 'A'), ('G90', 'G90 ; absolute')]
+	manyReplacePairs = replacePairs + [('M%s ' % (500 + pairIndex), 'M%s ' % (600 + pairIndex)) for pairIndex in xrange(92)]
+	return {'no': [], 'one': [('G1 ', 'G01 ')], 'eight': replacePairs, 'a hundred': manyReplacePairs}
+
+def getTextExportGcode(gcodeText, replacePairs, repository, selectedPluginModule):
+	'Get the gcode exported the way the whole text is exported.'
+	exportGcode = export.getCraftedTextFromText(gcodeText, repository)
+	if selectedPluginModule != None:
+		exportGcode = selectedPluginModule.getOutput(exportGcode)
+	if len(replacePairs) < 1:
+		return exportGcode
+	for replacePair in replacePairs:
+		exportGcode = exportGcode.replace(replacePair[0], replacePair[1])
+	output = cStringIO.StringIO()
+	gcodec.addLinesToCString(output, archive.getTextLines(exportGcode))
+	return output.getvalue()
+
+
+def main():
+	'Run the fused and the export checks.'
+	fileName = archive.getFabmetheusPath('test.stl')
+	if len(sys.argv) > 1:
+		fileName = ' '.join(sys.argv[1 :])
+	gcodeText = getCraftedGcodeText(fileName, gcodec.getGcodeFileText(fileName, ''), 'home')
+	if gcodeText == '':
+		print('The file %s could not be crafted.' % fileName)
+		return 1
+	isPassed = True
+	print('Checking the fused line stages.')
+	checkMessage = getFusedCheckMessage(gcodeText)
+	if checkMessage == '':
+		print('The fused check passed.')
+	else:
+		print('The fused check failed: %s' % checkMessage)
+		isPassed = False
+	gcodeText = getCraftedGcodeText(fileName, gcodeText, 'export')
+	repository = export.ExportRepository()
+	gcodeSmallModule = archive.getModuleWithDirectoryPath(archive.getCraftPluginsDirectoryPath(os.path.join('export_plugins', 'static_plugins')), 'gcode_small')
+	replacePairsDictionary = getReplacePairsDictionary()
+	for pluginName, selectedPluginModule in [('Do Not Change Output', None), ('gcode_small', gcodeSmallModule)]:
+		for replaceName in ['no', 'one', 'eight', 'a hundred']:
+			checkName = '%s with %s replace strings' % (pluginName, replaceName)
+			print('Checking %s.' % checkName)
+			checkMessage = getExportCheckMessage(gcodeText, replacePairsDictionary[replaceName], repository, selectedPluginModule)
+			if checkMessage == '':
+				print('The %s check passed.' % checkName)
+			else:
+				print('The %s check failed: %s' % (checkName, checkMessage))
+				isPassed = False
+	if not isPassed:
+		return 1
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -17,7 +17,11 @@ from fabmetheus_utilities import settings
 from skeinforge_application.skeinforge_utilities import skeinforge_analyze
 from skeinforge_application.skeinforge_utilities import skeinforge_polyfile
 from skeinforge_application.skeinforge_utilities import skeinforge_profile
+import hashlib
+import itertools
+import multiprocessing
 import os
+import re
 import sys
 import time
 
@@ -27,6 +31,66 @@ __date__ = '$Date: 2008/21/04 $'
 __license__ = 'GNU Affero General Public License http://www.gnu.org/licenses/agpl.html'
 
 
+globalArcOrRelativeExpression = re.compile(r'^[ \t]*(G2|G3|G91)([\s(;]|$)', re.MULTILINE)
+globalBoundaryLineExpression = re.compile(r'^[ \t]*\((?:<layer>|<boundaryPoint>|</boundaryPerimeter>\)).*$', re.MULTILINE)
+globalFusedLineBatchSize = 4096
+globalLayerChunkEnd = '(<layerChunkEnd>)'
+globalLayerChunkStart = '(<layerChunkStart>)'
+
+
+def clearBoundaryLayers():
+	'Clear the shared boundary layers, this is called by the plugins which move or change the boundaries.'
+	globalBoundaryLayerStore.clear()
+
+def getBoundaryLayers(gcodeText, lines):
+	'Get a copy of the boundary layers of the gcode, which are only parsed again if the boundaries have changed.'
+	return globalBoundaryLayerStore.getBoundaryLayers(gcodeText, lines)
+
+def getBoundarySignature(gcodeText):
+	'Get the digest of all the layer, boundary point and boundary perimeter end lines, which changes when the boundaries change.'
+	return hashlib.sha1('\n'.join(globalBoundaryLineExpression.findall(gcodeText))).digest()
+
+def getCarriedLayerLines(carriedLayerState, initializationEndIndex, lines, lineIndex):
+	'Get the lines which bring a skein to the carried state at the line index, found by going back from it to the end of the initialization.'
+	carriedLayerLines = []
+	feedRateMinute = None
+	isExtruderFound = 'extruder' not in carriedLayerState
+	isFlowRateFound = 'flowRate' not in carriedLayerState
+	isLocationFound = 'location' not in carriedLayerState
+	locationLineIndex = None
+	locationValues = {'F' : None, 'X' : None, 'Y' : None, 'Z' : None}
+	while lineIndex > initializationEndIndex + 1 and not (isExtruderFound and isFlowRateFound and isLocationFound):
+		lineIndex -= 1
+		line = lines[lineIndex]
+		if line.startswith('G1') and not isLocationFound:
+			splitLine = gcodec.getSplitLineBeforeBracketSemicolon(line)
+			if gcodec.getFirstWord(splitLine) == 'G1':
+				if locationLineIndex == None:
+					locationLineIndex = lineIndex
+				for letter in locationValues:
+					if locationValues[letter] == None:
+						if letter == 'F':
+							locationValues[letter] = gcodec.getFeedRateMinute(None, splitLine)
+						else:
+							locationValues[letter] = gcodec.getDoubleFromCharacterSplitLine(letter, splitLine)
+				isLocationFound = None not in locationValues.values()
+		elif (line.startswith('M101') or line.startswith('M103')) and not isExtruderFound:
+			firstWord = gcodec.getFirstWord(gcodec.getSplitLineBeforeBracketSemicolon(line))
+			if firstWord == 'M101' or firstWord == 'M103':
+				carriedLayerLines.append((lineIndex, firstWord))
+				isExtruderFound = True
+		elif line.startswith('M108') and not isFlowRateFound:
+			if gcodec.getFirstWord(gcodec.getSplitLineBeforeBracketSemicolon(line)) == 'M108':
+				carriedLayerLines.append((lineIndex, line))
+				isFlowRateFound = True
+	if locationLineIndex != None:
+		locationLine = 'G1 X%r Y%r Z%r' % tuple([getZeroIfNone(locationValues[letter]) for letter in 'XYZ'])
+		if locationValues['F'] != None:
+			locationLine += ' F%r' % locationValues['F']
+		carriedLayerLines.append((locationLineIndex, locationLine))
+	carriedLayerLines.sort()
+	return [carriedLayerLine[1] for carriedLayerLine in carriedLayerLines]
+
 def getChainText( fileName, procedure ):
 	"Get a crafted shape file."
 	text=''
@@ -38,19 +102,42 @@ def getChainText( fileName, procedure ):
 def getChainTextFromProcedures(fileName, procedures, text):
 	'Get a crafted shape file from a list of procedures.'
 	lastProcedureTime = time.time()
-	for procedure in procedures:
-		craftModule = getCraftModule(procedure)
-		if craftModule != None:
+	clearBoundaryLayers()
+	for procedureGroup in getProcedureGroups(procedures):
+		if len(procedureGroup) > 1:
+			text = getFusedText([getCraftModule(procedure) for procedure in procedureGroup], text)
+		else:
+			craftModule = getCraftModule(procedureGroup[0])
+			if craftModule == None:
+				continue
 			text = craftModule.getCraftedText(fileName, text)
-			if text == '':
-				print('Warning, the text was not recognized in getChainTextFromProcedures in skeinforge_craft for')
-				print(fileName)
-				return ''
-			if gcodec.isProcedureDone( text, procedure ):
-				print('%s procedure took %s (%d).' % (procedure.capitalize(), euclidean.getDurationString(time.time() - lastProcedureTime), len(text)))
-				lastProcedureTime = time.time()
+		if text == '':
+			print('Warning, the text was not recognized in getChainTextFromProcedures in skeinforge_craft for')
+			print(fileName)
+			clearBoundaryLayers()
+			return ''
+		doneProcedures = []
+		for procedure in procedureGroup:
+			if gcodec.isProcedureDone(text, procedure):
+				doneProcedures.append(procedure.capitalize())
+		if len(doneProcedures) == 1:
+			print('%s procedure took %s (%d).' % (doneProcedures[0], euclidean.getDurationString(time.time() - lastProcedureTime), len(text)))
+			lastProcedureTime = time.time()
+		elif len(doneProcedures) > 1:
+			print('%s procedures took %s (%d).' % (', '.join(doneProcedures), euclidean.getDurationString(time.time() - lastProcedureTime), len(text)))
+			lastProcedureTime = time.time()
+	clearBoundaryLayers()
 	return text
 
+def getCraftedLayerChunk(arguments):
+	'Get the crafted text of a layer chunk, this is called in the layer processes.'
+	chunkText, pluginName, preferenceValues = arguments
+	craftModule = getCraftModule(pluginName)
+	repository = craftModule.getNewRepository()
+	for preference, value in zip(repository.preferences, preferenceValues):
+		preference.value = value
+	return getTextBetweenLayerChunkMarkers(craftModule.getSkeinCraftedGcode(chunkText, repository))
+
 def getCraftModule(pluginName):
 	'Get craft module.'
 	return archive.getModuleWithDirectoryPath(getPluginsDirectoryPath(), pluginName)
@@ -66,6 +153,18 @@ def getCraftValue(preferenceName, preferences):
 			return preference.value
 	return None
 
+def getFusedText(craftModules, text, repositories=None):
+	'Get the text crafted by the fused craft modules, each passes its line batches on to the next, so the text is only split and joined once.'
+	if repositories == None:
+		repositories = [None] * len(craftModules)
+	lines = archive.getTextLines(text)
+	lineBatches = []
+	for lineIndex in xrange(0, len(lines), globalFusedLineBatchSize):
+		lineBatches.append(lines[lineIndex : lineIndex + globalFusedLineBatchSize])
+	for craftModule, repository in zip(craftModules, repositories):
+		lineBatches = craftModule.getCraftedLineBatches(text, lineBatches, repository)
+	return '\n'.join(itertools.chain.from_iterable(lineBatches))
+
 def getLastModule():
 	"Get the last tool."
 	craftSequence = getReadCraftSequence()
@@ -73,10 +172,79 @@ def getLastModule():
 		return None
 	return getCraftModule( craftSequence[-1] )
 
+def getLayerChunkedGcode(gcodeText, pluginName, repository):
+	'Get the gcode crafted by the plugin skein, with the layers crafted in chunks by a process pool if the repository has more than one layer process.'
+	craftModule = getCraftModule(pluginName)
+	numberOfLayerProcesses = getNumberOfLayerProcesses(repository.numberOfLayerProcesses.value)
+	if numberOfLayerProcesses < 2:
+		return craftModule.getSkeinCraftedGcode(gcodeText, repository)
+	chunkTexts = getLayerChunkTexts(craftModule.globalCarriedLayerState, gcodeText, numberOfLayerProcesses)
+	if chunkTexts == None:
+		return craftModule.getSkeinCraftedGcode(gcodeText, repository)
+	arguments = []
+	preferenceValues = []
+	for preference in repository.preferences:
+		preferenceValues.append(preference.value)
+	for chunkText in chunkTexts:
+		arguments.append((chunkText, pluginName, preferenceValues))
+	pool = multiprocessing.Pool(numberOfLayerProcesses)
+	try:
+		craftedChunks = pool.map(getCraftedLayerChunk, arguments)
+	finally:
+		pool.close()
+		pool.join()
+	return ''.join(craftedChunks)
+
+def getLayerChunkTexts(carriedLayerState, gcodeText, numberOfChunks):
+	'Get the texts of the layer chunks, each with the initialization and the carried state, or None if the layers can not be split.'
+	initializationEndIndex = None
+	layerStartIndexes = []
+	lines = archive.getTextLines(gcodeText)
+	for lineIndex, line in enumerate(lines):
+		if initializationEndIndex == None:
+			if line.startswith('(</extruderInitialization>)'):
+				initializationEndIndex = lineIndex
+		elif line.startswith('(<layer>'):
+			layerStartIndexes.append(lineIndex)
+	if len(layerStartIndexes) < 2:
+		return None
+	initializationEndTextIndex = gcodeText.find('(</extruderInitialization>)')
+	if globalArcOrRelativeExpression.search(gcodeText, initializationEndTextIndex) != None:
+		return None
+	isAlterationPossible = gcodeText.find('(<alteration>)', initializationEndTextIndex) > -1
+	chunkStartIndexes = []
+	numberOfChunks = min(numberOfChunks, len(layerStartIndexes))
+	for chunkIndex in xrange(1, numberOfChunks):
+		chunkStartIndexes.append(layerStartIndexes[chunkIndex * len(layerStartIndexes) / numberOfChunks])
+	chunkTexts = []
+	initializationLines = lines[: initializationEndIndex + 1]
+	chunkBeginIndex = 0
+	for chunkEndIndex in chunkStartIndexes + [len(lines)]:
+		chunkLines = []
+		if chunkBeginIndex > 0:
+			if isAlterationPossible and isInAlteration(initializationEndIndex, lines, chunkBeginIndex):
+				return None
+			chunkLines = initializationLines + getCarriedLayerLines(carriedLayerState, initializationEndIndex, lines, chunkBeginIndex) + [globalLayerChunkStart]
+		chunkLines += lines[chunkBeginIndex : chunkEndIndex]
+		if chunkEndIndex < len(lines):
+			chunkLines.append(globalLayerChunkEnd)
+		chunkTexts.append('\n'.join(chunkLines) + '\n')
+		chunkBeginIndex = chunkEndIndex
+	return chunkTexts
+
 def getNewRepository():
 	'Get new repository.'
 	return CraftRepository()
 
+def getNumberOfLayerProcesses(numberOfLayerProcesses):
+	'Get the number of layer processes, if the setting is zero it is the number of processors.'
+	if numberOfLayerProcesses > 0:
+		return numberOfLayerProcesses
+	try:
+		return multiprocessing.cpu_count()
+	except NotImplementedError:
+		return 1
+
 def getPluginFileNames():
 	"Get craft plugin fileNames."
 	craftSequence = getReadCraftSequence()
@@ -87,6 +255,19 @@ def getPluginsDirectoryPath():
 	"Get the plugins directory path."
 	return archive.getCraftPluginsDirectoryPath()
 
+def getProcedureGroups(procedures):
+	'Get the procedures in groups, consecutive procedures which are fused are grouped and each other procedure is in a group by itself.'
+	procedureGroups = []
+	wasFusable = False
+	for procedure in procedures:
+		isFusable = isCraftModuleFusable(getCraftModule(procedure))
+		if isFusable and wasFusable:
+			procedureGroups[-1].append(procedure)
+		else:
+			procedureGroups.append([procedure])
+		wasFusable = isFusable
+	return procedureGroups
+
 def getProcedures(procedure, text):
 	'Get the procedures up to and including the given procedure.'
 	craftSequence = getReadCraftSequence()
@@ -104,6 +285,46 @@ def getReadCraftSequence():
 	"Get profile sequence."
 	return skeinforge_profile.getCraftTypePluginModule().getCraftSequence()
 
+def getTextBetweenLayerChunkMarkers(text):
+	'Get the text after the layer chunk start line, if any, and before the layer chunk end line, if any.'
+	startIndex = text.find(globalLayerChunkStart + '\n')
+	if startIndex > -1:
+		text = text[startIndex + len(globalLayerChunkStart) + 1 :]
+	endIndex = text.find(globalLayerChunkEnd + '\n')
+	if endIndex > -1:
+		text = text[: endIndex]
+	return text
+
+def getZeroIfNone(value):
+	'Get zero if the value is None, otherwise get the value.'
+	if value == None:
+		return 0.0
+	return value
+
+def isCraftModuleFusable(craftModule):
+	'Determine if the craft module has line batch stages, has Fuse Line Stages selected and is not crafted in layer chunks by several processes.'
+	if craftModule == None:
+		return False
+	if not hasattr(craftModule, 'getCraftedLineBatches'):
+		return False
+	repository = settings.getReadRepository(craftModule.getNewRepository())
+	if not repository.fuseLineStages.value:
+		return False
+	if hasattr(repository, 'numberOfLayerProcesses'):
+		return getNumberOfLayerProcesses(repository.numberOfLayerProcesses.value) < 2
+	return True
+
+def isInAlteration(initializationEndIndex, lines, lineIndex):
+	'Determine if the line index is inside an alteration, by going back from it to the last alteration tag.'
+	while lineIndex > initializationEndIndex + 1:
+		lineIndex -= 1
+		line = lines[lineIndex]
+		if line.startswith('(<alteration>)'):
+			return True
+		if line.startswith('(</alteration>)'):
+			return False
+	return False
+
 def writeChainTextWithNounMessage(fileName, procedure, shouldAnalyze=True):
 	'Get and write a crafted shape file.'
 	print('')
@@ -156,6 +377,36 @@ def writeSVGTextWithNounMessage(fileName, repository, shouldAnalyze=True):
 		settings.openSVGPage(fileNameSuffix, repository.svgViewer.value)
 
 
+class BoundaryLayerStore(object):
+	'A class to share the boundary layers between the craft plugins, so that each plugin does not parse them again.'
+	def __init__(self):
+		'Initialize.'
+		self.clear()
+
+	def __repr__(self):
+		'Get the string representation of this BoundaryLayerStore.'
+		return 'BoundaryLayerStore %s' % str(self.signature)
+
+	def clear(self):
+		'Clear the boundary layers.'
+		self.boundaryLayers = None
+		self.signature = None
+
+	def getBoundaryLayers(self, gcodeText, lines):
+		'Get a copy of the boundary layers, parsing the lines only if the boundary signature of the gcode has changed.'
+		signature = getBoundarySignature(gcodeText)
+		if self.boundaryLayers == None or signature != self.signature:
+			self.boundaryLayers = gcodec.getBoundaryLayers(lines)
+			self.signature = signature
+		boundaryLayers = []
+		for boundaryLayer in self.boundaryLayers:
+			boundaryLayerCopy = euclidean.LoopLayer(boundaryLayer.z)
+			for loop in boundaryLayer.loops:
+				boundaryLayerCopy.loops.append(loop[:])
+			boundaryLayers.append(boundaryLayerCopy)
+		return boundaryLayers
+
+
 class CraftRadioButtonsSaveListener(object):
 	"A class to update the craft radio buttons."
 	def addToDialog( self, gridPosition ):
@@ -219,6 +470,9 @@ class CraftRepository(object):
 			writeOutput(fileName)
 
 
+globalBoundaryLayerStore = BoundaryLayerStore()
+
+
 def main():
 	"Write craft output."
 	writeOutput(' '.join(sys.argv[1 :]), False)